@@ -1,15 +1,30 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+from functools import wraps
 import logging
 import os
 import sys
 import json
+import time
 from datetime import datetime
 
 # Add the current directory to the path so we can import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from model_loader import load_model, get_model_info, predict_health_risk
+from model_loader import (
+    load_model, get_model_info, predict_health_risk,
+    enable_micro_batching, get_micro_batching_stats, get_prediction_cache_stats,
+    reload_model, start_model_watcher, get_model_version_id
+)
+from payloads import REQUIRED_FIELDS, TEST_PATIENT, PatientDataError, parse_patient
+from bulk_scoring import MAX_BATCH_RECORDS, score_patient_records, stream_ndjson_scores
+from metrics import current_endpoint, stage_timer, record_request, render_metrics
+from request_profiler import request_profiler
+from structured_logging import configure_logging, log_event
+from responses import (
+    format_prediction_response, format_patient_analysis, prediction_error_body, install_json_provider
+)
+import settings
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -18,6 +33,51 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+install_json_provider(app)  # orjson when available
+
+@app.before_request
+def start_request_metrics():
+    """Label this request's stage timings with its route and start its clock"""
+    g.metrics_started = time.perf_counter()
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    current_endpoint.set(g.metrics_endpoint)
+
+@app.before_request
+def start_request_profiling():
+    """Profile this request when a profiling session is armed and selects it"""
+    if request_profiler.armed and not request.path.startswith(('/admin', '/metrics')):
+        g.profile_handle = request_profiler.begin_request()
+
+@app.teardown_request
+def finish_request_profiling(error=None):
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        request_profiler.end_request(handle)
+
+@app.after_request
+def finish_request_metrics(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        record_request(g.metrics_endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+@app.after_request
+def add_model_version_header(response):
+    """Tag every response with the version of the model that served it"""
+    version = get_model_version_id()
+    if version:
+        response.headers['X-Model-Version'] = version
+    return response
+
+def admin_required(view):
+    """Guard /admin routes with HEALTHGUARD_ADMIN_TOKEN, or localhost-only when no token is set"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        error = settings.admin_access_error(request.headers.get('X-Admin-Token'), request.remote_addr)
+        if error:
+            return jsonify({'error': error}), 403
+        return view(*args, **kwargs)
+    return wrapper
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -44,69 +104,89 @@ def predict_risk():
     """Main endpoint for health risk prediction"""
     try:
         # Get patient data from request
-        patient_data = request.get_json()
+        with stage_timer('parse'):
+            patient_data = request.get_json()
         
         if not patient_data:
             return jsonify({'error': 'No patient data provided'}), 400
         
-        logger.info(f"🔍 Received prediction request for patient: {patient_data.get('name', 'Unknown')}")
+        logger.debug("🔍 Received prediction request")
         
-        # Extract and validate required fields
-        required_fields = ['age', 'gender']
-        for field in required_fields:
-            if field not in patient_data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Process patient data for ML model
-        ml_data = {
-            'age': int(patient_data.get('age', 30)),
-            'gender': patient_data.get('gender', 'Male'),
-            'smoking_history': patient_data.get('smoking_history', 'never'),
-            'bmi': float(patient_data.get('bmi', 25.0)),
-            'hba1c': float(patient_data.get('hba1c', patient_data.get('HbA1c_level', 5.5))),
-            'blood_glucose': float(patient_data.get('blood_glucose', patient_data.get('sbp', 100))),
-            'disease': patient_data.get('disease', ''),
-            'hypertension': patient_data.get('hypertension', 0),
-            'heart_disease': patient_data.get('heart_disease', 0)
-        }
+        # Validate and coerce every field in one pass; bad input is a 400 with per-field errors
+        try:
+            ml_data = parse_patient(patient_data, required=REQUIRED_FIELDS)
+        except PatientDataError as e:
+            return jsonify(e.to_body()), 400
         
         # Make prediction using enhanced model
         prediction_result = predict_health_risk(ml_data)
         
         # Format response
-        response = {
-            'risk_level': prediction_result['risk_level'],
-            'risk_score': prediction_result['risk_score'],
-            'confidence': prediction_result['confidence'],
-            'recommendations': prediction_result['recommendations'],
-            'risk_factors': prediction_result['risk_factors'],
-            'model_version': prediction_result['model_version'],
-            'features_used': prediction_result['features_used'],
-            'timestamp': datetime.now().isoformat(),
-            'patient_info': {
-                'name': patient_data.get('name', 'Unknown'),
-                'age': ml_data['age'],
-                'gender': ml_data['gender']
-            }
-        }
+        with stage_timer('serialize'):
+            response = jsonify(format_prediction_response(patient_data, ml_data, prediction_result))
         
-        logger.info(f"🎯 Prediction completed: {prediction_result['risk_level']} risk for {patient_data.get('name', 'Unknown')}")
+        log_event(logger, "🎯 Prediction completed", sampled=True,
+                  risk_level=prediction_result['risk_level'], risk_score=round(prediction_result['risk_score'], 3))
         
-        return jsonify(response), 200
+        return response, 200
         
     except Exception as e:
         logger.error(f"❌ Prediction error: {str(e)}")
-        return jsonify({
-            'error': 'Prediction failed',
-            'message': str(e),
-            'timestamp': datetime.now().isoformat()
-        }), 500
+        return jsonify(prediction_error_body(e)), 500
+
+@app.route('/predict-risk/batch', methods=['POST'])
+def predict_risk_batch():
+    """Score a list of patients with a single vectorized forward pass"""
+    try:
+        with stage_timer('parse'):
+            payload = request.get_json()
+        patients = payload.get('patients') if isinstance(payload, dict) else payload
+        
+        if not isinstance(patients, list) or not patients:
+            return jsonify({'error': 'No patient data provided'}), 400
+        if len(patients) > MAX_BATCH_RECORDS:
+            return jsonify({'error': f'Too many patient records (max {MAX_BATCH_RECORDS})'}), 413
+        
+        logger.debug(f"🔍 Received batch prediction request for {len(patients)} patients")
+        
+        # Validate every record the way /predict-risk does; only valid ones reach the model
+        results = score_patient_records(patients)
+        scored = sum(1 for result in results if result['status'] == 200)
+        
+        log_event(logger, "🎯 Batch prediction completed", sampled=True, records=len(patients), scored=scored)
+        
+        with stage_timer('serialize'):
+            response = jsonify({
+                'results': results,
+                'count': len(results),
+                'timestamp': datetime.now().isoformat()
+            })
+        return response, 200
+        
+    except Exception as e:
+        logger.error(f"❌ Batch prediction error: {str(e)}")
+        return jsonify(prediction_error_body(e)), 500
+
+@app.route('/predict-risk/stream', methods=['POST'])
+def predict_risk_stream():
+    """Score newline-delimited JSON patients, streaming NDJSON results as each chunk finishes"""
+    logger.info("🔍 Received streaming prediction request")
+    
+    results = stream_ndjson_scores(
+        request.stream,
+        chunk_size=settings.STREAM_CHUNK_SIZE,
+        max_line_bytes=settings.STREAM_MAX_LINE_BYTES
+    )
+    return Response(stream_with_context(results), mimetype='application/x-ndjson')
 
 @app.route('/model-info', methods=['GET'])
 def model_info():
     """Get detailed model information"""
     try:
-        model_info = get_model_info()
+        model_info = dict(get_model_info())
+        model_info['model_version_id'] = get_model_version_id()
+        model_info['micro_batching'] = get_micro_batching_stats()
+        model_info['prediction_cache'] = get_prediction_cache_stats()
         return jsonify(model_info), 200
     except Exception as e:
         logger.error(f"Failed to get model info: {str(e)}")
@@ -131,17 +211,7 @@ def test_prediction():
     """Test endpoint with sample data"""
     try:
         # Sample patient data for testing
-        test_data = {
-            'age': 45,
-            'gender': 'Male',
-            'smoking_history': 'former',
-            'bmi': 28.5,
-            'hba1c': 6.2,
-            'blood_glucose': 120,
-            'disease': 'hypertension',
-            'hypertension': 1,
-            'heart_disease': 0
-        }
+        test_data = dict(TEST_PATIENT)
         
         prediction_result = predict_health_risk(test_data)
         
@@ -160,62 +230,30 @@ def test_prediction():
 def patient_analysis():
     """Comprehensive patient analysis endpoint"""
     try:
-        patient_data = request.get_json()
+        with stage_timer('parse'):
+            patient_data = request.get_json()
         
         if not patient_data:
             return jsonify({'error': 'No patient data provided'}), 400
         
-        logger.info(f"🔬 Comprehensive analysis for: {patient_data.get('name', 'Unknown')}")
+        logger.debug("🔬 Received analysis request")
         
         # Enhanced patient data processing
-        enhanced_data = {
-            'age': int(patient_data.get('age', 30)),
-            'gender': patient_data.get('gender', 'Male'),
-            'smoking_history': patient_data.get('smoking_history', 'never'),
-            'bmi': float(patient_data.get('bmi', 25.0)),
-            'hba1c': float(patient_data.get('hba1c', 5.5)),
-            'blood_glucose': float(patient_data.get('blood_glucose', 100)),
-            'sbp': int(patient_data.get('sbp', 120)),
-            'disease': patient_data.get('disease', ''),
-            'hypertension': 1 if 'hypertension' in str(patient_data.get('disease', '')).lower() else 0,
-            'heart_disease': 1 if 'heart' in str(patient_data.get('disease', '')).lower() else 0
-        }
+        try:
+            enhanced_data = parse_patient(patient_data)
+        except PatientDataError as e:
+            return jsonify(e.to_body()), 400
         
         # Get ML prediction
         prediction_result = predict_health_risk(enhanced_data)
         
         # Enhanced response with additional insights
-        response = {
-            'patient_summary': {
-                'name': patient_data.get('name', 'Unknown'),
-                'age': enhanced_data['age'],
-                'gender': enhanced_data['gender'],
-                'bmi_category': get_bmi_category(enhanced_data['bmi']),
-                'glucose_status': get_glucose_status(enhanced_data['blood_glucose']),
-                'bp_status': get_bp_status(enhanced_data['sbp'])
-            },
-            'risk_assessment': {
-                'level': prediction_result['risk_level'],
-                'score': round(prediction_result['risk_score'] * 100, 1),
-                'confidence': round(prediction_result['confidence'] * 100, 1),
-                'category': get_risk_category(prediction_result['risk_level'])
-            },
-            'health_insights': {
-                'risk_factors': prediction_result['risk_factors'],
-                'recommendations': prediction_result['recommendations'],
-                'priority_actions': get_priority_actions(prediction_result['risk_level']),
-                'monitoring_frequency': get_monitoring_frequency(prediction_result['risk_level'])
-            },
-            'model_info': {
-                'version': prediction_result['model_version'],
-                'features_analyzed': len(prediction_result['features_used']),
-                'accuracy': get_model_info().get('efficiency_percentage', 'Unknown')
-            },
-            'timestamp': datetime.now().isoformat()
-        }
+        with stage_timer('serialize'):
+            response = jsonify(format_patient_analysis(patient_data, enhanced_data, prediction_result))
         
-        logger.info(f"🎯 Analysis completed: {prediction_result['risk_level']} risk")
-        return jsonify(response), 200
+        log_event(logger, "🎯 Analysis completed", sampled=True,
+                  risk_level=prediction_result['risk_level'], risk_score=round(prediction_result['risk_score'], 3))
+        return response, 200
         
     except Exception as e:
         logger.error(f"❌ Analysis error: {str(e)}")
@@ -225,63 +263,73 @@ def patient_analysis():
             'timestamp': datetime.now().isoformat()
         }), 500
 
-def get_bmi_category(bmi):
-    """Categorize BMI"""
-    if bmi < 18.5:
-        return "Underweight"
-    elif bmi < 25:
-        return "Normal"
-    elif bmi < 30:
-        return "Overweight"
-    else:
-        return "Obese"
-
-def get_glucose_status(glucose):
-    """Categorize blood glucose"""
-    if glucose < 100:
-        return "Normal"
-    elif glucose < 126:
-        return "Prediabetic"
-    else:
-        return "Diabetic"
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: per-stage latency histograms, request and fallback counters"""
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
-def get_bp_status(sbp):
-    """Categorize blood pressure"""
-    if sbp < 120:
-        return "Normal"
-    elif sbp < 130:
-        return "Elevated"
-    elif sbp < 140:
-        return "Stage 1 Hypertension"
-    else:
-        return "Stage 2 Hypertension"
-
-def get_risk_category(risk_level):
-    """Get detailed risk category"""
-    categories = {
-        'LOW': 'Minimal health risk - maintain current lifestyle',
-        'MEDIUM': 'Moderate risk - lifestyle changes recommended',
-        'HIGH': 'High risk - immediate medical attention advised'
-    }
-    return categories.get(risk_level, 'Unknown risk level')
+@app.route('/admin/reload-model', methods=['POST'])
+@admin_required
+def admin_reload_model():
+    """Hot-reload the model from models/ without restarting the server"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        result = reload_model(force=bool(payload.get('force', False)))
+        return jsonify(dict(result, timestamp=datetime.now().isoformat())), 200
+    except Exception as e:
+        logger.error(f"❌ Model reload failed: {str(e)}")
+        return jsonify({
+            'error': 'Model reload failed',
+            'message': str(e),
+            'model_version_id': get_model_version_id(),
+            'timestamp': datetime.now().isoformat()
+        }), 500
 
-def get_priority_actions(risk_level):
-    """Get priority actions based on risk level"""
-    actions = {
-        'LOW': ['Continue healthy habits', 'Annual checkups', 'Regular exercise'],
-        'MEDIUM': ['Lifestyle modifications', 'Quarterly checkups', 'Diet changes'],
-        'HIGH': ['Immediate medical consultation', 'Daily monitoring', 'Medication review']
-    }
-    return actions.get(risk_level, [])
+@app.route('/admin/profile', methods=['GET', 'POST', 'DELETE'])
+@admin_required
+def admin_profile():
+    """Arm (POST), inspect (GET) or stop (DELETE) live request profiling"""
+    try:
+        if request.method == 'POST':
+            payload = request.get_json(silent=True) or {}
+            status = request_profiler.start(
+                requests=payload.get('requests'),
+                sample_rate=payload.get('sample_rate'),
+                max_requests=int(payload.get('max_requests', 1000)),
+                mode=payload.get('mode', 'cprofile'),
+                interval_ms=float(payload.get('interval_ms', 1.0))
+            )
+        elif request.method == 'DELETE':
+            request_profiler.stop()
+            status = request_profiler.status()
+        else:
+            status = request_profiler.status()
+        return jsonify(status), 200
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
 
-def get_monitoring_frequency(risk_level):
-    """Get monitoring frequency recommendation"""
-    frequency = {
-        'LOW': 'Annual monitoring',
-        'MEDIUM': 'Quarterly monitoring',
-        'HIGH': 'Weekly or daily monitoring'
-    }
-    return frequency.get(risk_level, 'Consult healthcare provider')
+@app.route('/admin/profile/<kind>', methods=['GET'])
+@admin_required
+def admin_profile_results(kind):
+    """Download profiling results: pstats, pstats text, collapsed stacks or torch operator timings"""
+    if kind == 'pstats':
+        body, mimetype = request_profiler.pstats_bytes(), 'application/octet-stream'
+    elif kind == 'pstats.txt':
+        body, mimetype = request_profiler.pstats_text(), 'text/plain'
+    elif kind == 'collapsed':
+        body, mimetype = request_profiler.collapsed_stacks(), 'text/plain'
+    elif kind == 'torch':
+        body, mimetype = request_profiler.torch_ops_text(), 'text/plain'
+    else:
+        return jsonify({'error': 'Endpoint not found'}), 404
+    
+    if body is None:
+        return jsonify({'error': f'No {kind} results recorded', 'profiler': request_profiler.status()}), 404
+    
+    response = Response(body, mimetype=mimetype)
+    if kind == 'pstats':
+        response.headers['Content-Disposition'] = 'attachment; filename=healthguard.pstats'
+    return response
 
 @app.errorhandler(404)
 def not_found(error):
@@ -292,6 +340,7 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    configure_logging()
     logger.info("🚀 Starting Healthcare DApp API...")
     
     try:
@@ -303,6 +352,16 @@ if __name__ == '__main__':
             logger.info(f"🏗️ Architecture: {model_info.get('architecture', 'Unknown')}")
             logger.info(f"🔢 Features: {model_info.get('input_features', 'Unknown')}")
             
+            if settings.MODEL_WATCH_INTERVAL_SECONDS > 0:
+                start_model_watcher(settings.MODEL_WATCH_INTERVAL_SECONDS)
+            
+            if settings.MICRO_BATCHING_ENABLED:
+                enable_micro_batching(
+                    max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+                    max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+                    timeout_s=settings.MICRO_BATCH_TIMEOUT_SECONDS
+                )
+            
             # Start Flask app
             logger.info("🌐 Starting Flask server...")
             app.run(
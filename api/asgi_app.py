@@ -0,0 +1,466 @@
+"""ASGI variant of the Healthcare DApp API.
+
+Serves the same routes as app.py on an event loop, so thousands of mostly
+idle dashboard connections cost a coroutine each instead of an OS thread.
+Request parsing and response encoding stay on the loop; model inference runs
+in a bounded thread pool (``HEALTHGUARD_INFERENCE_THREADS``), which is also
+where live profiling attaches, since the loop thread is shared. Run from the
+repository root (where models/ lives)::
+
+    uvicorn asgi_app:app --app-dir api --host 127.0.0.1 --port 5000
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import wraps
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Match, Route
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_loader import (
+    load_model, get_model_info, predict_health_risk,
+    enable_micro_batching, get_micro_batching_stats, get_prediction_cache_stats,
+    reload_model, start_model_watcher, get_model_version_id
+)
+from payloads import REQUIRED_FIELDS, TEST_PATIENT, PatientDataError, parse_json_body, parse_patient
+from bulk_scoring import MAX_BATCH_RECORDS, NDJSONLineSplitter, score_ndjson_chunk, score_patient_records
+from metrics import current_endpoint, stage_timer, record_request, render_metrics
+from request_profiler import request_profiler
+from structured_logging import configure_logging, log_event
+from responses import encode_json, format_prediction_response, format_patient_analysis, prediction_error_body
+import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bounded pool for model inference; created at startup
+inference_executor = None
+
+class JSONBytesResponse(Response):
+    media_type = 'application/json'
+    
+    def render(self, content):
+        return encode_json(content)
+
+def json_response(body, status_code=200):
+    response = JSONBytesResponse(body, status_code=status_code)
+    version = get_model_version_id()
+    if version:
+        response.headers['X-Model-Version'] = version
+    return response
+
+def profiled_call(fn, *args):
+    """Run ``fn`` under the request profiler when a session is armed and selects this call"""
+    handle = request_profiler.begin_request() if request_profiler.armed else None
+    try:
+        return fn(*args)
+    finally:
+        if handle is not None:
+            request_profiler.end_request(handle)
+
+async def run_inference(fn, *args):
+    """Run a blocking model call in the inference pool without blocking the loop"""
+    # Carry the request's context (its metrics endpoint label) into the pool thread
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, context.run, profiled_call, fn, *args)
+
+def admin_required(view):
+    """Guard /admin routes with HEALTHGUARD_ADMIN_TOKEN, or localhost-only when no token is set"""
+    @wraps(view)
+    async def wrapper(request):
+        error = settings.admin_access_error(request.headers.get('X-Admin-Token'),
+                                            request.client.host if request.client else None)
+        if error:
+            return json_response({'error': error}, 403)
+        return await view(request)
+    return wrapper
+
+def torch_threads_for_inference():
+    """torch intra-op threads so concurrent forward passes don't oversubscribe the cores"""
+    if settings.TORCH_THREADS > 0:
+        return settings.TORCH_THREADS
+    # With micro-batching only the batcher thread runs forward passes
+    concurrent_forwards = 1 if settings.MICRO_BATCHING_ENABLED else settings.INFERENCE_THREADS
+    return max(1, (os.cpu_count() or 1) // concurrent_forwards)
+
+@asynccontextmanager
+async def lifespan(app):
+    global inference_executor
+    configure_logging()
+    logger.info("🚀 Starting Healthcare DApp ASGI API...")
+    
+    if not load_model():
+        raise RuntimeError("Failed to load model. Please run training_pipeline.py first!")
+    
+    inference_executor = ThreadPoolExecutor(max_workers=max(1, settings.INFERENCE_THREADS),
+                                            thread_name_prefix='inference')
+    
+    n_threads = torch_threads_for_inference()
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(n_threads)
+    
+    if settings.MODEL_WATCH_INTERVAL_SECONDS > 0:
+        start_model_watcher(settings.MODEL_WATCH_INTERVAL_SECONDS)
+    
+    if settings.MICRO_BATCHING_ENABLED:
+        enable_micro_batching(
+            max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+            max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+            timeout_s=settings.MICRO_BATCH_TIMEOUT_SECONDS
+        )
+    
+    logger.info(f"🧵 Inference pool: {settings.INFERENCE_THREADS} threads, {n_threads} torch threads")
+    try:
+        yield
+    finally:
+        inference_executor.shutdown(wait=False, cancel_futures=True)
+
+async def health_check(request):
+    """Health check endpoint"""
+    try:
+        model_info = get_model_info()
+        return json_response({
+            'status': 'healthy',
+            'message': 'Healthcare DApp API is running',
+            'model_loaded': 'model_type' in model_info,
+            'model_info': model_info,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.error(f"Health check failed: {str(e)}")
+        return json_response({
+            'status': 'error',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }, 500)
+
+async def predict_risk(request):
+    """Main endpoint for health risk prediction"""
+    try:
+        body = await request.body()
+        with stage_timer('parse'):
+            patient_data = parse_json_body(body)
+        
+        if not patient_data:
+            return json_response({'error': 'No patient data provided'}, 400)
+        
+        logger.debug("🔍 Received prediction request")
+        
+        try:
+            ml_data = parse_patient(patient_data, required=REQUIRED_FIELDS)
+        except PatientDataError as e:
+            return json_response(e.to_body(), 400)
+        
+        prediction_result = await run_inference(predict_health_risk, ml_data)
+        with stage_timer('serialize'):
+            response = json_response(format_prediction_response(patient_data, ml_data, prediction_result))
+        
+        log_event(logger, "🎯 Prediction completed", sampled=True,
+                  risk_level=prediction_result['risk_level'], risk_score=round(prediction_result['risk_score'], 3))
+        
+        return response
+    
+    except Exception as e:
+        logger.error(f"❌ Prediction error: {str(e)}")
+        return json_response(prediction_error_body(e), 500)
+
+async def predict_risk_batch(request):
+    """Score a list of patients with a single vectorized forward pass"""
+    try:
+        body = await request.body()
+        with stage_timer('parse'):
+            payload = parse_json_body(body)
+        patients = payload.get('patients') if isinstance(payload, dict) else payload
+        
+        if not isinstance(patients, list) or not patients:
+            return json_response({'error': 'No patient data provided'}, 400)
+        if len(patients) > MAX_BATCH_RECORDS:
+            return json_response({'error': f'Too many patient records (max {MAX_BATCH_RECORDS})'}, 413)
+        
+        logger.debug(f"🔍 Received batch prediction request for {len(patients)} patients")
+        
+        # Validate every record the way /predict-risk does; only valid ones reach the model
+        results = await run_inference(score_patient_records, patients)
+        scored = sum(1 for result in results if result['status'] == 200)
+        
+        log_event(logger, "🎯 Batch prediction completed", sampled=True, records=len(patients), scored=scored)
+        
+        with stage_timer('serialize'):
+            response = json_response({
+                'results': results,
+                'count': len(results),
+                'timestamp': datetime.now().isoformat()
+            })
+        return response
+    
+    except Exception as e:
+        logger.error(f"❌ Batch prediction error: {str(e)}")
+        return json_response(prediction_error_body(e), 500)
+
+class PredictRiskStream:
+    """Score newline-delimited JSON patients, streaming NDJSON results as each chunk finishes.
+    
+    A plain ASGI endpoint rather than a StreamingResponse: the response is
+    written while the request body is still arriving, and StreamingResponse
+    would compete with us for ``receive()`` while watching for disconnects.
+    """
+    async def __call__(self, scope, receive, send):
+        logger.info("🔍 Received streaming prediction request")
+        chunk_size = settings.STREAM_CHUNK_SIZE
+        max_line_bytes = settings.STREAM_MAX_LINE_BYTES
+        
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'application/x-ndjson'),
+                (b'x-model-version', (get_model_version_id() or '').encode('ascii'))
+            ]
+        })
+        
+        splitter = NDJSONLineSplitter(max_line_bytes)
+        pending = []
+        more_body = True
+        
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            more_body = message.get('more_body', False)
+            pending.extend(splitter.feed(message.get('body', b'')))
+            if not more_body:
+                pending.extend(splitter.flush())
+            
+            while len(pending) >= chunk_size or (pending and not more_body):
+                chunk = pending[:chunk_size]
+                del pending[:chunk_size]
+                output = await run_inference(score_ndjson_chunk, chunk, max_line_bytes)
+                if output:
+                    await send({'type': 'http.response.body', 'body': output, 'more_body': True})
+        
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+async def patient_analysis(request):
+    """Comprehensive patient analysis endpoint"""
+    try:
+        body = await request.body()
+        with stage_timer('parse'):
+            patient_data = parse_json_body(body)
+        
+        if not patient_data:
+            return json_response({'error': 'No patient data provided'}, 400)
+        
+        logger.debug("🔬 Received analysis request")
+        
+        try:
+            enhanced_data = parse_patient(patient_data)
+        except PatientDataError as e:
+            return json_response(e.to_body(), 400)
+        prediction_result = await run_inference(predict_health_risk, enhanced_data)
+        with stage_timer('serialize'):
+            response = json_response(format_patient_analysis(patient_data, enhanced_data, prediction_result))
+        
+        log_event(logger, "🎯 Analysis completed", sampled=True,
+                  risk_level=prediction_result['risk_level'], risk_score=round(prediction_result['risk_score'], 3))
+        return response
+    
+    except Exception as e:
+        logger.error(f"❌ Analysis error: {str(e)}")
+        return json_response({
+            'error': 'Analysis failed',
+            'message': str(e),
+            'timestamp': datetime.now().isoformat()
+        }, 500)
+
+async def model_info(request):
+    """Get detailed model information"""
+    try:
+        model_info = dict(get_model_info())
+        model_info['model_version_id'] = get_model_version_id()
+        model_info['micro_batching'] = get_micro_batching_stats()
+        model_info['prediction_cache'] = get_prediction_cache_stats()
+        return json_response(model_info)
+    except Exception as e:
+        logger.error(f"Failed to get model info: {str(e)}")
+        return json_response({'error': str(e)}, 500)
+
+async def get_features(request):
+    """Get model feature information"""
+    try:
+        model_info = get_model_info()
+        return json_response({
+            'feature_names': model_info.get('feature_names', []),
+            'input_features': model_info.get('input_features', 0),
+            'architecture': model_info.get('architecture', 'Unknown')
+        })
+    except Exception as e:
+        logger.error(f"Failed to get features: {str(e)}")
+        return json_response({'error': str(e)}, 500)
+
+async def test_prediction(request):
+    """Test endpoint with sample data"""
+    try:
+        test_data = dict(TEST_PATIENT)
+        prediction_result = await run_inference(predict_health_risk, test_data)
+        
+        return json_response({
+            'message': 'Test prediction successful',
+            'test_data': test_data,
+            'prediction': prediction_result,
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        logger.error(f"Test prediction failed: {str(e)}")
+        return json_response({'error': str(e)}, 500)
+
+async def metrics(request):
+    """Prometheus metrics: per-stage latency histograms, request and fallback counters"""
+    return Response(render_metrics(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+@admin_required
+async def admin_reload_model(request):
+    """Hot-reload the model from models/ without restarting the server"""
+    try:
+        try:
+            payload = parse_json_body(await request.body()) or {}
+        except ValueError:
+            payload = {}
+        force = bool(payload.get('force', False)) if isinstance(payload, dict) else False
+        # Loading and warming up the new bundle blocks; keep it off the loop and out of the inference pool
+        result = await run_in_threadpool(reload_model, force)
+        return json_response(dict(result, timestamp=datetime.now().isoformat()))
+    except Exception as e:
+        logger.error(f"❌ Model reload failed: {str(e)}")
+        return json_response({
+            'error': 'Model reload failed',
+            'message': str(e),
+            'model_version_id': get_model_version_id(),
+            'timestamp': datetime.now().isoformat()
+        }, 500)
+
+@admin_required
+async def admin_profile(request):
+    """Arm (POST), inspect (GET) or stop (DELETE) live request profiling"""
+    try:
+        if request.method == 'POST':
+            try:
+                payload = parse_json_body(await request.body()) or {}
+            except ValueError:
+                payload = {}
+            status = request_profiler.start(
+                requests=payload.get('requests'),
+                sample_rate=payload.get('sample_rate'),
+                max_requests=int(payload.get('max_requests', 1000)),
+                mode=payload.get('mode', 'cprofile'),
+                interval_ms=float(payload.get('interval_ms', 1.0))
+            )
+        elif request.method == 'DELETE':
+            request_profiler.stop()
+            status = request_profiler.status()
+        else:
+            status = request_profiler.status()
+        return json_response(status)
+    except (AttributeError, TypeError, ValueError) as e:
+        return json_response({'error': str(e)}, 400)
+
+@admin_required
+async def admin_profile_results(request):
+    """Download profiling results: pstats, pstats text, collapsed stacks or torch operator timings"""
+    kind = request.path_params['kind']
+    if kind == 'pstats':
+        body, media_type = request_profiler.pstats_bytes(), 'application/octet-stream'
+    elif kind == 'pstats.txt':
+        body, media_type = request_profiler.pstats_text(), 'text/plain'
+    elif kind == 'collapsed':
+        body, media_type = request_profiler.collapsed_stacks(), 'text/plain'
+    elif kind == 'torch':
+        body, media_type = request_profiler.torch_ops_text(), 'text/plain'
+    else:
+        return json_response({'error': 'Endpoint not found'}, 404)
+    
+    if body is None:
+        return json_response({'error': f'No {kind} results recorded', 'profiler': request_profiler.status()}, 404)
+    
+    headers = {'Content-Disposition': 'attachment; filename=healthguard.pstats'} if kind == 'pstats' else None
+    return Response(body, media_type=media_type, headers=headers)
+
+async def not_found(request, exc):
+    return json_response({'error': 'Endpoint not found'}, 404)
+
+async def internal_error(request, exc):
+    return json_response({'error': 'Internal server error'}, 500)
+
+class RequestMetricsMiddleware:
+    """Label each request's stage timings with its route; record its status and duration"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        started = time.perf_counter()
+        endpoint = endpoint_label(scope)
+        current_endpoint.set(endpoint)
+        status = 500
+        
+        async def send_with_metrics(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                record_request(endpoint, status, time.perf_counter() - started)
+        
+        await self.app(scope, receive, send_with_metrics)
+
+app = Starlette(
+    routes=[
+        Route('/health', health_check, methods=['GET']),
+        Route('/predict-risk', predict_risk, methods=['POST']),
+        Route('/predict-risk/batch', predict_risk_batch, methods=['POST']),
+        Route('/predict-risk/stream', PredictRiskStream(), methods=['POST']),
+        Route('/patient-analysis', patient_analysis, methods=['POST']),
+        Route('/model-info', model_info, methods=['GET']),
+        Route('/features', get_features, methods=['GET']),
+        Route('/test-prediction', test_prediction, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/admin/reload-model', admin_reload_model, methods=['POST']),
+        Route('/admin/profile', admin_profile, methods=['GET', 'POST', 'DELETE']),
+        Route('/admin/profile/{kind}', admin_profile_results, methods=['GET'])
+    ],
+    exception_handlers={404: not_found, 500: internal_error},
+    middleware=[Middleware(RequestMetricsMiddleware)],
+    lifespan=lifespan
+)
+
+# Request metrics are labelled by route; anything else counts as 'unmatched'
+ROUTE_PATHS = frozenset(route.path for route in app.routes if not route.param_convertors)
+PARAMETERIZED_ROUTES = [route for route in app.routes if route.param_convertors]
+
+def endpoint_label(scope):
+    """The route template a request matches, for metrics labels"""
+    if scope['path'] in ROUTE_PATHS:
+        return scope['path']
+    for route in PARAMETERIZED_ROUTES:
+        if route.matches(scope)[0] != Match.NONE:
+            return route.path
+    return 'unmatched'
+
+if __name__ == '__main__':
+    import uvicorn
+    
+    host, _, port = settings.BIND.rpartition(':')
+    uvicorn.run(app, host=host, port=int(port))
@@ -0,0 +1,207 @@
+"""Offline batch scoring of patient records from CSV or Parquet.
+
+Reads the input in chunks, scores each chunk in a process pool whose workers
+load the model once, and writes one result row per input row. Records go
+through the same validation, preprocessing, model and rules as
+/predict-risk, so every row matches what the API would return for it.
+Columns are the fields /predict-risk accepts; empty cells count as missing.
+Run from the repository root (where models/ lives)::
+
+    python api/batch_score.py patients.csv scores.parquet --workers 4
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OUTPUT_COLUMNS = [
+    'row', 'status', 'risk_level', 'risk_score', 'confidence',
+    'risk_factors', 'recommendations', 'model_version_id', 'error'
+]
+
+def _init_worker(torch_threads):
+    """Load the model once per worker process"""
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    from model_loader import load_model
+    if not load_model():
+        raise RuntimeError("Failed to load model. Please run training_pipeline.py first!")
+    
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(torch_threads)
+
+def _clean_record(record):
+    """Drop empty cells so they count as missing fields, as in a JSON request"""
+    return {
+        key: value for key, value in record.items()
+        if value is not None and not (isinstance(value, float) and math.isnan(value))
+    }
+
+def score_chunk(task):
+    """Score one chunk of records; return its results as output columns"""
+    from bulk_scoring import score_patient_records
+    
+    first_row, records = task
+    results = score_patient_records([_clean_record(record) for record in records])
+    
+    columns = {column: [] for column in OUTPUT_COLUMNS}
+    for offset, result in enumerate(results):
+        body = result['body']
+        scored = result['status'] == 200
+        
+        columns['row'].append(first_row + offset)
+        columns['status'].append(result['status'])
+        columns['risk_level'].append(body['risk_level'] if scored else None)
+        columns['risk_score'].append(body['risk_score'] if scored else None)
+        columns['confidence'].append(body['confidence'] if scored else None)
+        columns['risk_factors'].append(json.dumps(body['risk_factors'], ensure_ascii=False) if scored else None)
+        columns['recommendations'].append(json.dumps(body['recommendations'], ensure_ascii=False) if scored else None)
+        columns['model_version_id'].append(body['model_version_id'] if scored else None)
+        if scored:
+            columns['error'].append(None)
+        elif 'message' in body:
+            columns['error'].append(f"{body['error']}: {body['message']}")
+        else:
+            columns['error'].append(body['error'])
+    
+    return columns
+
+def _file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension == '.csv':
+        return 'csv'
+    raise ValueError(f"Unsupported file type '{extension}' (expected .csv or .parquet)")
+
+def iter_input_chunks(path, chunk_size):
+    """Yield lists of record dicts, ``chunk_size`` rows at a time"""
+    if _file_format(path) == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+    else:
+        for frame in pd.read_csv(path, chunksize=chunk_size):
+            yield frame.to_dict('records')
+
+class CsvResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._header = True
+    
+    def write(self, columns):
+        pd.DataFrame(columns, columns=OUTPUT_COLUMNS).to_csv(self._file, header=self._header, index=False)
+        self._header = False
+    
+    def close(self):
+        self._file.close()
+
+class ParquetResultWriter:
+    """Append each chunk as a Parquet row group"""
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        self._pa = pa
+        self.schema = pa.schema([
+            ('row', pa.int64()),
+            ('status', pa.int16()),
+            ('risk_level', pa.string()),
+            ('risk_score', pa.float64()),
+            ('confidence', pa.float64()),
+            ('risk_factors', pa.string()),
+            ('recommendations', pa.string()),
+            ('model_version_id', pa.string()),
+            ('error', pa.string())
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema)
+    
+    def write(self, columns):
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self.schema))
+    
+    def close(self):
+        self._writer.close()
+
+def open_result_writer(path):
+    if _file_format(path) == 'parquet':
+        return ParquetResultWriter(path)
+    return CsvResultWriter(path)
+
+def score_file(input_path, output_path, workers=None, chunk_size=5000, torch_threads=1):
+    """Score every row of ``input_path`` into ``output_path``; return a summary"""
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    
+    # Write next to the destination and move into place only when complete
+    tmp_path = f"{output_path}.tmp{os.path.splitext(output_path)[1]}"
+    writer = open_result_writer(tmp_path)
+    rows = scored = 0
+    
+    def collect(future):
+        nonlocal rows, scored
+        columns = future.result()
+        writer.write(columns)
+        rows += len(columns['row'])
+        scored += sum(1 for status in columns['status'] if status == 200)
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(torch_threads,)) as pool:
+            # A bounded window of chunks in flight keeps memory flat and output in input order
+            in_flight = deque()
+            next_row = 0
+            for records in iter_input_chunks(input_path, chunk_size):
+                in_flight.append(pool.submit(score_chunk, (next_row, records)))
+                next_row += len(records)
+                if len(in_flight) >= workers * 2:
+                    collect(in_flight.popleft())
+            while in_flight:
+                collect(in_flight.popleft())
+        writer.close()
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'scored': scored,
+        'errors': rows - scored,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed > 0 else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='patient records (.csv or .parquet)')
+    parser.add_argument('output', help='results file (.csv or .parquet)')
+    parser.add_argument('--workers', type=int, default=None, help='scoring processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per chunk sent to a worker')
+    parser.add_argument('--torch-threads', type=int, default=1, help='torch intra-op threads per worker')
+    args = parser.parse_args()
+    
+    logger.info(f"🏥 Scoring {args.input} -> {args.output}")
+    summary = score_file(args.input, args.output, workers=args.workers,
+                         chunk_size=args.chunk_size, torch_threads=args.torch_threads)
+    
+    logger.info(f"✅ Scored {summary['rows']:,} rows ({summary['errors']:,} errors) in {summary['seconds']:.1f}s")
+    print(f"📈 {summary['rows_per_second']:,.0f} rows/sec")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Micro-benchmarks for the inference hot path, with regression baselines.
+
+Times each stage of a prediction on its own — feature extraction (sbp/sugar
+string parsing, DOB parsing), preprocessing, scaling, the model forward at
+several batch sizes, the rule helpers and full endpoint calls through
+Flask's test client — and reports p50/p95/p99 latency and throughput. Run
+from the repository root (where models/ lives)::
+
+    # record a baseline on this machine
+    python api/benchmarks/hot_path_benchmark.py --save-baseline
+
+    # compare against it; exits 1 when a stage's p50 regresses beyond --tolerance
+    python api/benchmarks/hot_path_benchmark.py --compare --tolerance 0.25
+
+Endpoint stages run with the prediction cache disabled, except
+``endpoint_predict_risk_cached`` which measures a cache hit.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+DEFAULT_BASELINE_PATH = os.path.join(API_DIR, 'benchmarks', 'baselines', 'hot_path_baseline.json')
+FORWARD_BATCH_SIZES = [1, 8, 64, 512]
+
+# Shaped like the dashboard's requests: "systolic/diastolic" sbp, sugar with units, DOB string
+DASHBOARD_PATIENT = {
+    'name': 'Benchmark Patient',
+    'dob': '1968-04-12',
+    'gender': 'Female',
+    'sbp': '146/92',
+    'sugar': '132 mg/dL',
+    'bmi': 31.2,
+    'hba1c': 6.8,
+    'smoking_history': 'former',
+    'disease': 'hypertension'
+}
+
+API_PATIENT = {
+    'name': 'Benchmark Patient',
+    'age': 57,
+    'gender': 'Female',
+    'bmi': 31.2,
+    'hba1c': 6.8,
+    'blood_glucose': 132,
+    'sbp': 146,
+    'smoking_history': 'former',
+    'disease': 'hypertension'
+}
+
+def measure(fn, min_time_s, min_calls, rows_per_call=1):
+    """Call ``fn`` repeatedly and summarize per-call latency"""
+    for _ in range(min(20, min_calls)):
+        fn()
+    
+    timer = time.perf_counter_ns
+    samples = []
+    deadline = time.perf_counter() + min_time_s
+    while len(samples) < min_calls or time.perf_counter() < deadline:
+        started = timer()
+        fn()
+        samples.append(timer() - started)
+    
+    latencies_us = np.array(samples, dtype=np.float64) / 1000.0
+    total_s = latencies_us.sum() / 1e6
+    p50, p95, p99 = np.percentile(latencies_us, [50, 95, 99])
+    return {
+        'calls': len(samples),
+        'p50_us': float(p50),
+        'p95_us': float(p95),
+        'p99_us': float(p99),
+        'mean_us': float(latencies_us.mean()),
+        'calls_per_s': len(samples) / total_s,
+        'rows_per_s': len(samples) * rows_per_call / total_s
+    }
+
+def build_stages():
+    """(name, zero-argument callable, rows per call) for every measured stage"""
+    import logging
+    logging.disable(logging.CRITICAL)
+    
+    from app import app
+    from model_loader import load_model, model_loader
+    from payloads import age_from_dob, parse_patient
+    from prediction_cache import PredictionCache
+    
+    if not load_model():
+        raise SystemExit("Failed to load model. Please run training_pipeline.py first!")
+    
+    bundle = model_loader.bundle
+    record = parse_patient(DASHBOARD_PATIENT)
+    records = [record] * FORWARD_BATCH_SIZES[-1]
+    features_list, feature_row = model_loader._extract_features([record], bundle)
+    features = features_list[0]
+    base_score = float(model_loader._score_features(feature_row, bundle)[0])
+    risk_level = model_loader._build_predictions([base_score], [features], bundle)[0]['risk_level']
+    
+    stages = [
+        ('parse_patient', lambda: parse_patient(DASHBOARD_PATIENT), 1),
+        ('extract_features', lambda: model_loader._extract_features([record], bundle), 1),
+        (f'extract_features_batch_{len(records)}', lambda: model_loader._extract_features(records, bundle), len(records)),
+        ('calculate_age', lambda: age_from_dob(DASHBOARD_PATIENT['dob']), 1),
+        ('preprocess_patient_data', lambda: model_loader.preprocess_patient_data(DASHBOARD_PATIENT, bundle), 1),
+        ('scaler_transform', lambda: bundle.scaler.transform(feature_row), 1)
+    ]
+    
+    rng = np.random.default_rng(0)
+    for batch_size in FORWARD_BATCH_SIZES:
+        batch = feature_row[rng.integers(0, 1, batch_size)] * rng.uniform(0.8, 1.2, (batch_size, feature_row.shape[1]))
+        if bundle.engine is not None:
+            forward = lambda batch=batch: bundle.engine.predict(batch)
+        else:
+            import torch
+            scaled = torch.FloatTensor(bundle.scaler.transform(batch))
+            
+            def forward(scaled=scaled):
+                with torch.no_grad():
+                    return bundle.model(scaled)
+        stages.append((f'forward_batch_{batch_size}', forward, batch_size))
+    
+    stages += [
+        ('apply_risk_boosting', lambda: model_loader._apply_risk_boosting(base_score, features), 1),
+        ('identify_risk_factors', lambda: model_loader._identify_risk_factors(features), 1),
+        ('generate_recommendations', lambda: model_loader._generate_recommendations(risk_level, features), 1)
+    ]
+    
+    client = app.test_client()
+    enabled_cache = model_loader.prediction_cache
+    disabled_cache = PredictionCache(max_entries=0)
+    
+    def endpoint(path, payload=None, cache=disabled_cache):
+        def call():
+            model_loader.prediction_cache = cache
+            if payload is None:
+                response = client.get(path)
+            else:
+                response = client.post(path, json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+        return call
+    
+    stages += [
+        ('endpoint_predict_risk', endpoint('/predict-risk', API_PATIENT), 1),
+        ('endpoint_predict_risk_cached', endpoint('/predict-risk', API_PATIENT, enabled_cache), 1),
+        ('endpoint_patient_analysis', endpoint('/patient-analysis', API_PATIENT), 1),
+        ('endpoint_health', endpoint('/health'), 1)
+    ]
+    return stages
+
+def environment():
+    info = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'backend': os.environ.get('HEALTHGUARD_MODEL_BACKEND', 'torch')
+    }
+    if 'torch' in sys.modules:
+        info['torch'] = sys.modules['torch'].__version__
+    return info
+
+def find_regressions(results, baseline, tolerance, metric):
+    """Stages whose ``metric`` is more than ``tolerance`` slower than the baseline"""
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get('stages', {}).get(name)
+        if reference is None:
+            continue
+        ratio = stats[metric] / reference[metric]
+        if ratio > 1 + tolerance:
+            regressions.append((name, reference[metric], stats[metric], ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds spent timing each stage')
+    parser.add_argument('--min-calls', type=int, default=200, help='minimum timed calls per stage')
+    parser.add_argument('--stages', nargs='+', help='only run stages whose name contains one of these')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help='baseline JSON path')
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the baseline')
+    parser.add_argument('--compare', action='store_true', help='fail when a stage regresses against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before failing (0.25 = 25%%)')
+    parser.add_argument('--metric', choices=['p50_us', 'p95_us', 'p99_us', 'mean_us'], default='p50_us',
+                        help='latency statistic compared against the baseline')
+    parser.add_argument('--output', help='optional path for a JSON report of this run')
+    args = parser.parse_args()
+    
+    results = {}
+    print(f"{'stage':<30} {'p50':>10} {'p95':>10} {'p99':>10} {'calls/s':>11} {'rows/s':>11}")
+    for name, fn, rows_per_call in build_stages():
+        if args.stages and not any(pattern in name for pattern in args.stages):
+            continue
+        stats = measure(fn, args.min_time, args.min_calls, rows_per_call)
+        results[name] = stats
+        print(f"{name:<30} {stats['p50_us']:>8.1f}us {stats['p95_us']:>8.1f}us {stats['p99_us']:>8.1f}us "
+              f"{stats['calls_per_s']:>11,.0f} {stats['rows_per_s']:>11,.0f}")
+    
+    report = {'environment': environment(), 'stages': results}
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+    
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline}; record one with --save-baseline first")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != report['environment']:
+            print(f"\n⚠️ Baseline was recorded on a different setup: {baseline.get('environment')}")
+        
+        regressions = find_regressions(results, baseline, args.tolerance, args.metric)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) regressed beyond {args.tolerance:.0%} ({args.metric}):")
+            for name, before, after, ratio in regressions:
+                print(f"   {name:<30} {before:>9.1f}us -> {after:>9.1f}us  ({ratio:.2f}x)")
+            sys.exit(1)
+        print(f"\n✅ No stage regressed beyond {args.tolerance:.0%} ({args.metric})")
+
+if __name__ == '__main__':
+    main()
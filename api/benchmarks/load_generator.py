@@ -0,0 +1,355 @@
+"""Open-loop load generator that replays the dashboard's request mix.
+
+Sends requests at a fixed arrival rate whether or not earlier ones have
+finished, so queueing inside the server shows up as latency instead of
+silently slowing the client down. Latency is measured from each request's
+scheduled send time. Works against any server mode listening on ``--url``
+(``python api/app.py``, gunicorn or uvicorn)::
+
+    # sweep arrival rates until the server saturates
+    python api/benchmarks/load_generator.py --url http://127.0.0.1:5000 --rates 10 20 40 80 160
+    
+    # only scoring traffic, with a quarter of it going to /patient-analysis
+    python api/benchmarks/load_generator.py --mix predict-risk=3 patient-analysis=1
+
+Payloads are synthetic dashboard records ("140/90" sbp, "132 mg/dL" sugar,
+"YYYY-MM-DD" dob) converted the way ``src/services/mlService.js`` converts
+them before posting. ``--raw-fraction`` posts that share of records
+unconverted, exactly as the dashboard stores them.
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import date
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ENDPOINTS = {
+    'predict-risk': ('POST', '/predict-risk'),
+    'patient-analysis': ('POST', '/patient-analysis'),
+    'health': ('GET', '/health')
+}
+DEFAULT_MIX = ['predict-risk=80', 'patient-analysis=15', 'health=5']
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Kavya', 'Sanjay', 'Lakshmi']
+LAST_NAMES = ['Sharma', 'Patel', 'Reddy', 'Iyer', 'Nair', 'Gupta', 'Singh', 'Rao', 'Das', 'Menon']
+DISEASES = ['', 'hypertension', 'diabetes', 'heart disease', 'diabetes, hypertension', 'asthma', 'none']
+SMOKING_HISTORY = ['never', 'never', 'never', 'former', 'current', 'ever', 'not current', 'No Info']
+
+def make_dashboard_record(rng, patient_id):
+    """A patient record as the dashboard stores it on-chain (free-text vitals)"""
+    age = int(np.clip(rng.gauss(50, 16), 18, 90))
+    dob = date(date.today().year - age, rng.randint(1, 12), rng.randint(1, 28))
+    systolic = int(np.clip(rng.gauss(128, 18), 90, 200))
+    diastolic = int(np.clip(systolic * 0.62 + rng.gauss(0, 6), 55, 120))
+    sugar = int(np.clip(rng.lognormvariate(4.7, 0.25), 70, 320))
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    
+    record = {
+        'id': patient_id,
+        'name': f'{first} {last}',
+        'disease': rng.choice(DISEASES),
+        'dob': dob.isoformat(),
+        'mobile': f'9{rng.randint(100000000, 999999999)}',
+        'email': f'{first.lower()}.{last.lower()}{patient_id}@example.com',
+        'gender': rng.choice(['Male', 'Female']),
+        'sbp': f'{systolic}/{diastolic}' if rng.random() > 0.03 else 'Not recorded',
+        'sugar': f'{sugar} mg/dL' if rng.random() > 0.03 else 'Not recorded'
+    }
+    # Optional fields the dashboard doesn't always have; mlService fills defaults
+    if rng.random() < 0.6:
+        record['bmi'] = round(float(np.clip(rng.gauss(27, 5), 15, 50)), 1)
+    if rng.random() < 0.5:
+        record['hba1c'] = round(float(np.clip(rng.gauss(5.9, 1.1), 4.0, 12.0)), 1)
+    if rng.random() < 0.7:
+        record['smoking_history'] = rng.choice(SMOKING_HISTORY)
+    return record
+
+def ml_service_age(dob, today):
+    """mlService.calculateAge"""
+    birth = date.fromisoformat(dob)
+    age = today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
+    return max(age, 18)
+
+def ml_service_number(value, default):
+    """mlService.extractSystolic / extractBloodSugar for the record shapes above"""
+    if '/' in value:
+        value = value.split('/')[0]
+    digits = ''.join(ch for ch in value if ch.isdigit() or ch == '.')
+    return float(digits) if digits else default
+
+def to_ml_service_payload(record, today):
+    """The body mlService.predictHealthRisk posts for a dashboard record"""
+    return {
+        'age': ml_service_age(record['dob'], today),
+        'sbp': int(ml_service_number(record['sbp'], 120)),
+        'sugar': ml_service_number(record['sugar'], 100),
+        'disease': record['disease'],
+        'patient_id': record['id'],
+        'name': record['name'],
+        'gender': record.get('gender') or 'Male',
+        'mobile': record['mobile'],
+        'email': record['email'],
+        'dob': record['dob'],
+        'bmi': record.get('bmi') or 25.0,
+        'hba1c': record.get('hba1c') or 5.5,
+        'smoking_history': record.get('smoking_history') or 'never'
+    }
+
+def build_payload_pool(size, raw_fraction, seed):
+    """Pre-encoded request bodies so payload generation stays off the send path"""
+    rng = random.Random(seed)
+    today = date.today()
+    pool = []
+    for patient_id in range(1, size + 1):
+        record = make_dashboard_record(rng, patient_id)
+        body = record if rng.random() < raw_fraction else to_ml_service_payload(record, today)
+        pool.append(json.dumps(body).encode('utf-8'))
+    return pool
+
+def parse_mix(entries):
+    """['predict-risk=80', 'health=5'] -> ([names], [weights])"""
+    names, weights = [], []
+    for entry in entries:
+        name, _, weight = entry.partition('=')
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix (choose from {', '.join(ENDPOINTS)})")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+class HTTPConnectionPool:
+    """Minimal asyncio HTTP/1.1 client with keep-alive, enough for this API's JSON responses"""
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._idle = []
+    
+    async def request(self, method, path, body=b''):
+        """Send one request; return its status code"""
+        if self._idle:
+            try:
+                return await self._send(self._idle.pop(), method, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass  # the server closed an idle keep-alive connection; retry on a fresh one
+        connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        return await self._send(connection, method, path, body)
+    
+    async def _send(self, connection, method, path, body):
+        reader, writer = connection
+        try:
+            status, keep_alive = await asyncio.wait_for(self._exchange(reader, writer, method, path, body), self.timeout)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._idle.append(connection)
+        else:
+            writer.close()
+        return status
+    
+    async def _exchange(self, reader, writer, method, path, body):
+        head = (f'{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n')
+        writer.write(head.encode('ascii') + body)
+        await writer.drain()
+        
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed before response')
+        version, status = status_line.split(b' ', 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.partition(b':')
+            headers[name.strip().lower()] = value.strip().lower()
+        
+        if b'content-length' in headers:
+            await reader.readexactly(int(headers[b'content-length']))
+        elif headers.get(b'transfer-encoding') == b'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await reader.read()
+            return int(status), False
+        
+        keep_alive = version == b'HTTP/1.1' and headers.get(b'connection') != b'close'
+        return int(status), keep_alive
+    
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+async def run_step(url, rate, duration, names, weights, payloads, arrival, timeout, max_in_flight, seed):
+    """Offer ``rate`` requests/s for ``duration`` seconds; return per-request records"""
+    rng = random.Random(seed)
+    pool = HTTPConnectionPool(url, timeout)
+    loop = asyncio.get_running_loop()
+    records = []
+    tasks = set()
+    
+    async def send(name, scheduled):
+        method, path = ENDPOINTS[name]
+        body = rng.choice(payloads) if method == 'POST' else b''
+        try:
+            status = await pool.request(method, path, body)
+            outcome = str(status)
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            outcome = 'connection error'
+        records.append((name, outcome, loop.time() - scheduled))
+    
+    started = loop.time()
+    scheduled = started
+    dropped = 0
+    while True:
+        scheduled += rng.expovariate(rate) if arrival == 'poisson' else 1.0 / rate
+        if scheduled - started >= duration:
+            break
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            # The client's own limit; counted separately so it isn't mistaken for server errors
+            dropped += 1
+            continue
+        task = asyncio.ensure_future(send(rng.choices(names, weights)[0], scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    
+    if tasks:
+        await asyncio.wait(tasks)
+    pool.close()
+    return records, dropped, loop.time() - started
+
+def is_failure(outcome):
+    """5xx, timeouts and connection errors; 4xx answers still count as served"""
+    return not outcome[0].isdigit() or outcome[0] == '5'
+
+def summarize(rate, records, dropped, elapsed, duration):
+    served = np.array([not is_failure(outcome) for _, outcome, _ in records], dtype=bool)
+    latencies_ms = np.array([latency for _, _, latency in records], dtype=np.float64) * 1000.0
+    served_latencies = latencies_ms[served] if served.any() else np.array([np.nan])
+    p50, p95, p99 = np.percentile(served_latencies, [50, 95, 99])
+    
+    outcomes = {}
+    for name, outcome, _ in records:
+        outcomes.setdefault(name, {}).setdefault(outcome, 0)
+        outcomes[name][outcome] += 1
+    
+    return {
+        'offered_rps': rate,
+        'sent': len(records),
+        'completed_rps': len(records) / elapsed,
+        'served_rps': int(served.sum()) / duration,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(served_latencies.max()),
+        'failures': len(records) - int(served.sum()),
+        'client_dropped': dropped,
+        'outcomes': outcomes
+    }
+
+def saturation_reason(step, slo_p99_ms, max_failure_rate):
+    """Why this step counts as saturated, or None"""
+    attempted = step['sent'] + step['client_dropped']
+    if step['served_rps'] < 0.95 * step['offered_rps']:
+        return f"served {step['served_rps']:.1f} of {step['offered_rps']:g} req/s"
+    if step['p99_ms'] > slo_p99_ms:
+        return f"p99 {step['p99_ms']:.0f}ms over the {slo_p99_ms:g}ms SLO"
+    if attempted and (step['failures'] + step['client_dropped']) / attempted > max_failure_rate:
+        return f"{step['failures'] + step['client_dropped']} failed or dropped of {attempted}"
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='server base URL')
+    parser.add_argument('--rates', type=float, nargs='+', default=[5, 10, 20, 40, 80, 160],
+                        help='arrival rates (req/s) to sweep, in order')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per rate step')
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds at the first rate before measuring')
+    parser.add_argument('--mix', nargs='+', default=DEFAULT_MIX,
+                        help='endpoint=weight pairs (endpoints: predict-risk, patient-analysis, health)')
+    parser.add_argument('--arrival', choices=['poisson', 'uniform'], default='poisson',
+                        help='inter-arrival distribution')
+    parser.add_argument('--raw-fraction', type=float, default=0.0,
+                        help='share of bodies posted as raw dashboard records instead of mlService payloads')
+    parser.add_argument('--payloads', type=int, default=2000, help='distinct synthetic patients')
+    parser.add_argument('--timeout', type=float, default=10.0, help='per-request timeout in seconds')
+    parser.add_argument('--max-in-flight', type=int, default=1000,
+                        help='client-side cap on outstanding requests; arrivals beyond it are dropped')
+    parser.add_argument('--slo-p99-ms', type=float, default=250.0, help='p99 latency that marks saturation')
+    parser.add_argument('--max-failure-rate', type=float, default=0.01,
+                        help='share of 5xx, timeouts and drops that marks saturation')
+    parser.add_argument('--keep-going', action='store_true', help='run every rate even after saturation')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for payloads and arrivals')
+    parser.add_argument('--output', help='optional path for a JSON report')
+    args = parser.parse_args()
+    
+    names, weights = parse_mix(args.mix)
+    payloads = build_payload_pool(args.payloads, args.raw_fraction, args.seed)
+    print(f"🎯 {args.url}  mix: {', '.join(args.mix)}  arrivals: {args.arrival}  {args.duration:g}s per step")
+    
+    if args.warmup > 0:
+        asyncio.run(run_step(args.url, args.rates[0], args.warmup, names, weights, payloads,
+                             args.arrival, args.timeout, args.max_in_flight, args.seed))
+    
+    steps = []
+    saturated_at = None
+    print(f"\n{'offered':>8} {'served/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'fail':>6} {'drop':>6}")
+    for i, rate in enumerate(args.rates):
+        records, dropped, elapsed = asyncio.run(run_step(
+            args.url, rate, args.duration, names, weights, payloads,
+            args.arrival, args.timeout, args.max_in_flight, args.seed + i + 1
+        ))
+        step = summarize(rate, records, dropped, elapsed, args.duration)
+        reason = saturation_reason(step, args.slo_p99_ms, args.max_failure_rate)
+        step['saturated'] = reason
+        steps.append(step)
+        
+        print(f"{rate:>8g} {step['served_rps']:>8.1f} {step['p50_ms']:>7.1f}ms {step['p95_ms']:>7.1f}ms "
+              f"{step['p99_ms']:>7.1f}ms {step['max_ms']:>7.1f}ms {step['failures']:>6} {dropped:>6}"
+              f"{'  <- ' + reason if reason else ''}")
+        
+        if reason and saturated_at is None:
+            saturated_at = rate
+            if not args.keep_going:
+                break
+    
+    print("\nResponses by endpoint:")
+    totals = {}
+    for step in steps:
+        for name, outcomes in step['outcomes'].items():
+            for outcome, count in outcomes.items():
+                totals.setdefault(name, {}).setdefault(outcome, 0)
+                totals[name][outcome] += count
+    for name, outcomes in totals.items():
+        print(f"   {name:<18} " + '  '.join(f"{outcome}: {count}" for outcome, count in sorted(outcomes.items())))
+    
+    sustainable = [step['offered_rps'] for step in steps if not step['saturated']]
+    if saturated_at is None:
+        print(f"\n✅ Not saturated up to {args.rates[-1]:g} req/s; extend --rates to find the limit")
+    elif sustainable:
+        print(f"\n📈 Saturation between {max(sustainable):g} and {saturated_at:g} req/s")
+    else:
+        print(f"\n⚠️ Already saturated at {saturated_at:g} req/s; start --rates lower")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'url': args.url, 'mix': args.mix, 'arrival': args.arrival, 'raw_fraction': args.raw_fraction,
+                       'slo_p99_ms': args.slo_p99_ms, 'saturated_at_rps': saturated_at, 'steps': steps}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Out-of-core training benchmark: peak RSS against dataset size.
+
+For each ``--rows`` size, writes a synthetic Parquet extract chunk by chunk,
+then in fresh processes prepares it with ``disk_dataset.prepare_dataset``
+and trains one fold of it with ``MemmapEpochs`` for ``--epochs`` epochs.
+Reports each phase's time and peak RSS next to the size of the feature
+file; with out-of-core training the RSS columns stay flat as the rows grow.
+Run from anywhere::
+
+    python api/benchmarks/out_of_core_benchmark.py --rows 250000 1000000 4000000
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+SOURCE_CHUNK_ROWS = 100_000
+
+def write_source(path, rows, seed=42):
+    """Synthetic extract with the training columns and a logistic diabetes label"""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    rng = np.random.default_rng(seed)
+    writer = None
+    for start in range(0, rows, SOURCE_CHUNK_ROWS):
+        n = min(SOURCE_CHUNK_ROWS, rows - start)
+        age = rng.integers(18, 81, n)
+        bmi = rng.uniform(15, 40, n)
+        hba1c = rng.uniform(4, 15, n)
+        glucose = rng.uniform(80, 300, n)
+        hypertension = rng.integers(0, 2, n)
+        heart_disease = rng.integers(0, 2, n)
+        logit = 0.04 * (age - 50) + 0.1 * (bmi - 27) + 0.6 * (hba1c - 9) + 0.01 * (glucose - 190) + hypertension
+        table = pa.table({
+            'gender': rng.integers(0, 2, n),
+            'age': age,
+            'hypertension': hypertension,
+            'heart_disease': heart_disease,
+            'smoking_history': rng.choice(['never', 'former', 'current', 'not_current'], n),
+            'bmi': bmi,
+            'HbA1c_level': hba1c,
+            'blood_glucose_level': glucose,
+            'diabetes': (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(np.int64)
+        })
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+def run_phase(args):
+    """Child process: run one phase and print its timing and peak RSS as JSON"""
+    logging.disable(logging.CRITICAL)
+    from disk_dataset import MemmapDataset, peak_rss_mb, prepare_dataset
+    
+    started = time.perf_counter()
+    if args.phase == 'prepare':
+        prepare_dataset(args.source, args.dataset_dir, chunk_rows=args.chunk_rows)
+        extra = {}
+    else:
+        import torch
+        import torch.nn as nn
+        import torch.optim as optim
+        from training_pipeline import DEFAULT_HYPERPARAMETERS, AdvancedHealthcareNet, MemmapEpochs
+        
+        torch.set_num_threads(args.threads)
+        torch.manual_seed(42)
+        dataset = MemmapDataset(args.dataset_dir)
+        runner = MemmapEpochs(dataset, 0, batch_size=DEFAULT_HYPERPARAMETERS['batch_size'],
+                              generator=torch.Generator().manual_seed(42))
+        model = AdvancedHealthcareNet(dataset.n_features, DEFAULT_HYPERPARAMETERS['hidden_layers'],
+                                      DEFAULT_HYPERPARAMETERS['dropout_rate'])
+        optimizer = optim.AdamW(model.parameters(), lr=DEFAULT_HYPERPARAMETERS['learning_rate'],
+                                weight_decay=DEFAULT_HYPERPARAMETERS['weight_decay'])
+        criterion = nn.BCELoss()
+        for _ in range(args.epochs):
+            model.train()
+            runner.train(model, optimizer, criterion)
+            model.eval()
+            _, val_auc, _, _ = runner.evaluate(model, criterion)
+        extra = {'val_auc': val_auc}
+    print(json.dumps(dict(extra, seconds=time.perf_counter() - started, peak_rss_mb=peak_rss_mb())))
+
+def measure(phase, source, dataset_dir, args):
+    command = [sys.executable, os.path.abspath(__file__), '--phase', phase, '--source', source,
+               '--dataset-dir', dataset_dir, '--chunk-rows', str(args.chunk_rows), '--epochs', str(args.epochs),
+               '--threads', str(args.threads)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[250_000, 1_000_000, 2_000_000], help='dataset sizes')
+    parser.add_argument('--chunk-rows', type=int, default=100_000, help='rows per preprocessing chunk')
+    parser.add_argument('--epochs', type=int, default=1, help='epochs trained per size')
+    parser.add_argument('--threads', type=int, default=1, help='torch intra-op threads')
+    parser.add_argument('--workdir', help='where to write the extracts (default: a temporary directory)')
+    parser.add_argument('--output', help='optional path for a JSON report')
+    parser.add_argument('--phase', choices=['prepare', 'train'], help=argparse.SUPPRESS)
+    parser.add_argument('--source', help=argparse.SUPPRESS)
+    parser.add_argument('--dataset-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.phase:
+        run_phase(args)
+        return
+    
+    report = {}
+    print(f"{'rows':>10} {'features':>10} {'prepare':>9} {'prepare RSS':>12} {'epoch':>9} {'train RSS':>10} {'AUC':>7}")
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for rows in args.rows:
+            source = os.path.join(workdir, f'extract_{rows}.parquet')
+            dataset_dir = os.path.join(workdir, f'dataset_{rows}')
+            write_source(source, rows)
+            prepared = measure('prepare', source, dataset_dir, args)
+            trained = measure('train', source, dataset_dir, args)
+            features_mb = os.path.getsize(os.path.join(dataset_dir, 'features.f32')) / 1e6
+            
+            report[rows] = {'features_mb': features_mb, 'prepare': prepared, 'train': trained}
+            print(f"{rows:>10} {features_mb:>8.0f}MB {prepared['seconds']:>8.1f}s {prepared['peak_rss_mb']:>10.0f}MB "
+                  f"{trained['seconds'] / args.epochs:>8.1f}s {trained['peak_rss_mb']:>8.0f}MB {trained['val_auc']:>7.4f}")
+            os.remove(source)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
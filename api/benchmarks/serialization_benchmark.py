@@ -0,0 +1,93 @@
+"""Serialization benchmark: time to build and encode one response.
+
+Scores a handful of sample patients once, then repeatedly turns the results
+into /predict-risk and /patient-analysis responses with Flask's stock JSON
+provider and with the orjson provider from responses.py. Model time is
+excluded so only response building and encoding are measured. Run from the
+repository root (where models/ lives)::
+
+    python api/benchmarks/serialization_benchmark.py --iterations 20000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_PATIENTS = [
+    {'name': 'Low Risk', 'age': 28, 'gender': 'Female', 'bmi': 22.1, 'hba1c': 5.1, 'blood_glucose': 88,
+     'sbp': 112, 'smoking_history': 'never', 'disease': ''},
+    {'name': 'Medium Risk', 'age': 52, 'gender': 'Male', 'bmi': 29.4, 'hba1c': 6.1, 'blood_glucose': 118,
+     'sbp': 134, 'smoking_history': 'former', 'disease': 'hypertension'},
+    {'name': 'High Risk', 'age': 71, 'gender': 'Male', 'bmi': 36.8, 'hba1c': 8.9, 'blood_glucose': 210,
+     'sbp': 165, 'smoking_history': 'current', 'disease': 'heart disease, hypertension'}
+]
+
+def time_per_call(fn, iterations, repeats):
+    """Median microseconds per call over ``repeats`` timed loops"""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000, help='responses per timed loop')
+    parser.add_argument('--repeats', type=int, default=5, help='timed loops per measurement')
+    parser.add_argument('--output', help='optional path for a JSON report')
+    args = parser.parse_args()
+    
+    import logging
+    logging.disable(logging.CRITICAL)
+    
+    from flask.json.provider import DefaultJSONProvider
+    from app import app
+    from model_loader import load_model, predict_health_risk
+    from payloads import parse_patient
+    from responses import OrjsonProvider, format_prediction_response, format_patient_analysis, orjson
+    
+    load_model()
+    
+    # (label, zero-argument body builder) for each endpoint and sample patient
+    builders = []
+    for patient in SAMPLE_PATIENTS:
+        ml_data = parse_patient(patient)
+        prediction = predict_health_risk(ml_data)
+        enhanced_data = ml_data
+        builders.append(('/predict-risk', lambda p=patient, m=ml_data, r=prediction: format_prediction_response(p, m, r)))
+        builders.append(('/patient-analysis', lambda p=patient, e=enhanced_data, r=prediction: format_patient_analysis(p, e, r)))
+    
+    providers = [('stock json', DefaultJSONProvider(app))]
+    if orjson is not None:
+        providers.append(('orjson', OrjsonProvider(app)))
+    else:
+        print("orjson is not installed; only the stock encoder is measured")
+    
+    report = {}
+    print(f"{'endpoint':<18} {'encoder':<11} {'build':>9} {'encode':>9} {'total':>9} {'bytes':>7}")
+    with app.app_context():
+        for endpoint in ('/predict-risk', '/patient-analysis'):
+            endpoint_builders = [build for label, build in builders if label == endpoint]
+            bodies = [build() for build in endpoint_builders]
+            build_us = time_per_call(lambda: [build() for build in endpoint_builders], args.iterations, args.repeats) / len(bodies)
+            
+            for encoder, provider in providers:
+                encode_us = time_per_call(lambda: [provider.response(body) for body in bodies], args.iterations, args.repeats) / len(bodies)
+                size = statistics.mean(len(provider.response(body).get_data()) for body in bodies)
+                report[f'{endpoint} {encoder}'] = {'build_us': build_us, 'encode_us': encode_us,
+                                                    'total_us': build_us + encode_us, 'bytes': size}
+                print(f"{endpoint:<18} {encoder:<11} {build_us:>7.1f}us {encode_us:>7.1f}us "
+                      f"{build_us + encode_us:>7.1f}us {size:>7.0f}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
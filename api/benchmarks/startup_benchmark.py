@@ -0,0 +1,109 @@
+"""Cold-start benchmark: time to first successful /predict-risk.
+
+Each run starts a fresh interpreter that imports the API, loads the model
+and sends one /predict-risk request through Flask's test client, so every
+import and artifact read is paid from scratch. Run from the repository root
+(where models/ lives)::
+
+    python api/benchmarks/startup_benchmark.py --repeats 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Serving modes compared by default: (label, environment overrides)
+MODES = [
+    ('pickle + torch', {'HEALTHGUARD_FAST_START': '0', 'HEALTHGUARD_MODEL_BACKEND': 'torch'}),
+    ('artifact + torch', {'HEALTHGUARD_FAST_START': '1', 'HEALTHGUARD_MODEL_BACKEND': 'torch'}),
+    ('artifact + numpy', {'HEALTHGUARD_FAST_START': '1', 'HEALTHGUARD_MODEL_BACKEND': 'numpy'}),
+]
+
+SAMPLE_PATIENT = {
+    'name': 'Startup Probe',
+    'age': 52,
+    'gender': 'Male',
+    'bmi': 29.4,
+    'hba1c': 6.1,
+    'smoking_history': 'former',
+    'disease': 'hypertension'
+}
+
+def run_child():
+    """Measure one cold start inside this (fresh) process"""
+    started = time.perf_counter()
+    sys.path.insert(0, API_DIR)
+    
+    import logging
+    logging.disable(logging.CRITICAL)
+    
+    from app import app
+    from model_loader import load_model
+    imported = time.perf_counter()
+    
+    load_model()
+    loaded = time.perf_counter()
+    
+    response = app.test_client().post('/predict-risk', json=SAMPLE_PATIENT)
+    if response.status_code != 200:
+        raise SystemExit(f"/predict-risk returned {response.status_code}")
+    answered = time.perf_counter()
+    
+    print(json.dumps({
+        'import_s': imported - started,
+        'load_s': loaded - imported,
+        'first_request_s': answered - loaded,
+        'torch_imported': 'torch' in sys.modules,
+        'sklearn_imported': 'sklearn' in sys.modules
+    }))
+
+def run_mode(env_overrides, repeats):
+    """Start ``repeats`` fresh interpreters in one mode and collect their timings"""
+    env = dict(os.environ, PYTHONWARNINGS='ignore', **env_overrides)
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child'],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        run['total_s'] = time.perf_counter() - started
+        runs.append(run)
+    return runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5, help='cold starts per mode')
+    parser.add_argument('--output', help='optional path for a JSON report')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child()
+        return
+    
+    report = {}
+    print(f"{'mode':<18} {'total':>9} {'import':>9} {'load':>9} {'1st req':>9}  torch  sklearn")
+    for label, env_overrides in MODES:
+        runs = run_mode(env_overrides, args.repeats)
+        summary = {key: statistics.median(run[key] for run in runs)
+                   for key in ('total_s', 'import_s', 'load_s', 'first_request_s')}
+        summary['torch_imported'] = runs[-1]['torch_imported']
+        summary['sklearn_imported'] = runs[-1]['sklearn_imported']
+        report[label] = summary
+        print(f"{label:<18} {summary['total_s'] * 1000:>7.0f}ms {summary['import_s'] * 1000:>7.0f}ms "
+              f"{summary['load_s'] * 1000:>7.0f}ms {summary['first_request_s'] * 1000:>7.0f}ms  "
+              f"{str(summary['torch_imported']):<6} {summary['sklearn_imported']}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Worker scaling benchmark: memory per worker and aggregate throughput.
+
+For each worker count, starts ``gunicorn -c api/gunicorn.conf.py`` on a free
+port, drives /predict-risk from several client processes for a fixed time,
+and reads every worker's RSS and PSS from /proc (Linux only). PSS splits
+shared pages between the processes that map them, so with copy-on-write
+sharing of the preloaded model the per-worker PSS stays well below RSS.
+Run from the repository root (where models/ lives)::
+
+    python api/benchmarks/worker_scaling_benchmark.py --workers 1 2 4 8 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(API_DIR, 'gunicorn.conf.py')
+
+GENDERS = ['Male', 'Female']
+SMOKING = ['never', 'former', 'current', 'not current']
+DISEASES = ['none', 'diabetes', 'hypertension', 'heart_disease']
+
+def random_patient(rng):
+    """Varied patients so requests exercise the model instead of the prediction cache"""
+    return {
+        'age': rng.randint(18, 90),
+        'gender': rng.choice(GENDERS),
+        'bmi': round(rng.uniform(17.0, 42.0), 1),
+        'hba1c': round(rng.uniform(4.5, 10.0), 1),
+        'smoking_history': rng.choice(SMOKING),
+        'disease': rng.choice(DISEASES)
+    }
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_healthy(port, timeout_s=120):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"server on port {port} did not become healthy")
+
+def client_loop(args):
+    """One client process: keep-alive requests until the deadline"""
+    port, deadline, seed = args
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    completed = errors = 0
+    while time.time() < deadline:
+        body = json.dumps(random_patient(rng))
+        try:
+            conn.request('POST', '/predict-risk', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                completed += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    return completed, errors
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+def memory_kb(pid):
+    """RSS and PSS of one process in kB"""
+    memory = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                memory[key.lower()] = int(value.split()[0])
+    return memory
+
+def run_workers(n_workers, clients, duration_s, extra_env):
+    port = free_port()
+    env = dict(os.environ, PYTHONWARNINGS='ignore', HEALTHGUARD_WORKERS=str(n_workers),
+               HEALTHGUARD_BIND=f'127.0.0.1:{port}', **extra_env)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', CONFIG_PATH],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_healthy(port)
+        
+        deadline = time.time() + duration_s
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(client_loop, [(port, deadline, seed) for seed in range(clients)])
+        completed = sum(done for done, _ in results)
+        errors = sum(failed for _, failed in results)
+        
+        # Measure after the load so every worker has touched the model
+        workers = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        master = memory_kb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    
+    return {
+        'workers': n_workers,
+        'requests_per_s': completed / duration_s,
+        'errors': errors,
+        'master_rss_mb': master['rss'] / 1024,
+        'worker_rss_mb': sum(w['rss'] for w in workers) / len(workers) / 1024,
+        'worker_pss_mb': sum(w['pss'] for w in workers) / len(workers) / 1024,
+        'total_pss_mb': (master['pss'] + sum(w['pss'] for w in workers)) / 1024
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='worker counts to compare')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent client processes')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load per worker count')
+    parser.add_argument('--backend', choices=['torch', 'numpy'], help='override HEALTHGUARD_MODEL_BACKEND')
+    parser.add_argument('--output', help='optional path for a JSON report')
+    args = parser.parse_args()
+    
+    extra_env = {'HEALTHGUARD_MODEL_BACKEND': args.backend} if args.backend else {}
+    
+    report = []
+    print(f"{'workers':>7} {'req/s':>9} {'errors':>7} {'master RSS':>11} {'worker RSS':>11} {'worker PSS':>11} {'total PSS':>10}")
+    for n_workers in args.workers:
+        row = run_workers(n_workers, args.clients, args.duration, extra_env)
+        report.append(row)
+        print(f"{row['workers']:>7} {row['requests_per_s']:>9.1f} {row['errors']:>7} "
+              f"{row['master_rss_mb']:>9.1f}MB {row['worker_rss_mb']:>9.1f}MB "
+              f"{row['worker_pss_mb']:>9.1f}MB {row['total_pss_mb']:>8.1f}MB")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Bulk scoring of many patient records through the vectorized model path.
+
+Shared by /predict-risk/batch and the NDJSON streaming endpoints. Streams are
+split into lines incrementally and scored in fixed-size chunks, so memory
+stays flat however large the input is.
+"""
+import time
+from datetime import date
+
+from metrics import observe_stage, stage_timer
+from model_loader import predict_health_risk_batch
+from payloads import REQUIRED_FIELDS, PatientDataError, parse_json_body, parse_patient
+from responses import encode_json, format_prediction_response, prediction_error_body
+
+# Bytes read from a request stream at a time
+STREAM_READ_BYTES = 64 * 1024
+
+# Upper bound on records accepted by /predict-risk/batch in one request
+MAX_BATCH_RECORDS = 10000
+
+def score_patient_records(patients):
+    """Validate and score /predict-risk bodies in one forward pass.
+    
+    Returns one ``{'status', 'body'}`` dict per input, aligned with it; each
+    carries what /predict-risk would have returned for that record.
+    """
+    results = [None] * len(patients)
+    scored_indices = []
+    scored_ml_data = []
+    today = date.today()
+    
+    for i, patient_data in enumerate(patients):
+        if not isinstance(patient_data, dict) or not patient_data:
+            results[i] = {'status': 400, 'body': {'error': 'No patient data provided'}}
+            continue
+        
+        try:
+            ml_data = parse_patient(patient_data, required=REQUIRED_FIELDS, today=today)
+        except PatientDataError as e:
+            results[i] = {'status': 400, 'body': e.to_body()}
+            continue
+        except Exception as e:
+            results[i] = {'status': 500, 'body': prediction_error_body(e)}
+            continue
+        
+        scored_indices.append(i)
+        scored_ml_data.append(ml_data)
+    
+    prediction_results = predict_health_risk_batch(scored_ml_data) if scored_ml_data else []
+    
+    for i, ml_data, prediction_result in zip(scored_indices, scored_ml_data, prediction_results):
+        results[i] = {
+            'status': 200,
+            'body': format_prediction_response(patients[i], ml_data, prediction_result)
+        }
+    
+    return results
+
+class NDJSONLineSplitter:
+    """Split a byte stream into numbered lines as it arrives.
+    
+    Lines longer than ``max_line_bytes`` are dropped while they stream in and
+    come back as ``None`` so one oversized record can't exhaust memory.
+    """
+    def __init__(self, max_line_bytes):
+        self.max_line_bytes = max_line_bytes
+        self.line_number = 0
+        self._buffer = bytearray()
+        self._oversized = False
+    
+    def feed(self, data):
+        """Add received bytes; return the (line_number, line) pairs they complete"""
+        lines = []
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end == -1:
+                break
+            self._append(data[start:end])
+            lines.append(self._take())
+            start = end + 1
+        self._append(data[start:])
+        return lines
+    
+    def flush(self):
+        """Return the final line when the stream doesn't end with a newline"""
+        if self._buffer or self._oversized:
+            return [self._take()]
+        return []
+    
+    def _append(self, part):
+        if self._oversized:
+            return
+        if len(self._buffer) + len(part) > self.max_line_bytes:
+            self._oversized = True
+            self._buffer.clear()
+            return
+        self._buffer += part
+    
+    def _take(self):
+        self.line_number += 1
+        line = None if self._oversized else bytes(self._buffer)
+        self._buffer.clear()
+        self._oversized = False
+        return self.line_number, line
+
+def score_ndjson_chunk(numbered_lines, max_line_bytes):
+    """Score a chunk of (line_number, line) pairs; return the NDJSON result lines as bytes.
+    
+    Blank lines are skipped. Oversized or malformed lines get a 400 result of
+    their own instead of failing the chunk.
+    """
+    results = []
+    line_numbers = []
+    patients = []
+    parse_started = time.perf_counter()
+    
+    for line_number, line in numbered_lines:
+        if line is None:
+            results.append((line_number, {'status': 400, 'body': {'error': f'Line exceeds {max_line_bytes} bytes'}}))
+            continue
+        if not line.strip():
+            continue
+        try:
+            patient_data = parse_json_body(line)
+        except ValueError as e:
+            results.append((line_number, {'status': 400, 'body': {'error': f'Malformed JSON: {str(e)}'}}))
+            continue
+        line_numbers.append(line_number)
+        patients.append(patient_data)
+    
+    observe_stage('parse', time.perf_counter() - parse_started)
+    
+    if patients:
+        results.extend(zip(line_numbers, score_patient_records(patients)))
+        results.sort(key=lambda item: item[0])
+    
+    with stage_timer('serialize'):
+        return b''.join(
+            encode_json({'line': line_number, 'status': result['status'], 'body': result['body']}) + b'\n'
+            for line_number, result in results
+        )
+
+def stream_ndjson_scores(stream, chunk_size, max_line_bytes):
+    """Read NDJSON patients from a file-like stream and yield scored NDJSON chunks"""
+    splitter = NDJSONLineSplitter(max_line_bytes)
+    pending = []
+    
+    while True:
+        data = stream.read(STREAM_READ_BYTES)
+        if not data:
+            break
+        pending.extend(splitter.feed(data))
+        while len(pending) >= chunk_size:
+            output = score_ndjson_chunk(pending[:chunk_size], max_line_bytes)
+            del pending[:chunk_size]
+            if output:
+                yield output
+    
+    pending.extend(splitter.flush())
+    if pending:
+        output = score_ndjson_chunk(pending, max_line_bytes)
+        if output:
+            yield output
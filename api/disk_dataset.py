@@ -0,0 +1,231 @@
+"""Out-of-core training data: a patient extract preprocessed into memory-mapped files.
+
+``prepare_dataset`` reads a CSV or Parquet source (the training columns:
+``BASE_FEATURES`` plus the ``diabetes`` label) ``chunk_rows`` at a time.
+Each chunk goes through the same ``FeatureTransform`` the API serves with
+and is appended to three flat files: float32 features, uint8 labels and a
+uint8 cross-validation fold id per row. Fold ids are assigned per class in
+shuffled rounds, so folds are stratified without holding the labels. The
+``StandardScaler`` is fitted with ``partial_fit`` along the way, then the
+feature file is scaled in place, one window at a time.
+
+``MemmapDataset`` reads the result back through short-lived memory-mapped
+windows, so only the rows being read are resident: training memory depends
+on the block size, not on the number of rows. Run from the repository root::
+
+    python api/disk_dataset.py patients.parquet data/patients --chunk-rows 200000
+    python api/training_pipeline.py --dataset data/patients
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_transform import BASE_FEATURES, FeatureTransform
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LABEL_COLUMN = 'diabetes'
+
+FEATURES_FILE = 'features.f32'
+LABELS_FILE = 'labels.u8'
+FOLDS_FILE = 'folds.u8'
+SCALER_FILE = 'scaler.pkl'
+INFO_FILE = 'dataset.json'
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def iter_source_chunks(path, chunk_rows, columns):
+    """Yield DataFrames of ``columns``, ``chunk_rows`` rows at a time, from a CSV or Parquet file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+        # Pre-buffered reads keep memory growing with the file, so read row groups as needed
+        for batch in pq.ParquetFile(path, pre_buffer=False).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    elif extension == '.csv':
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+    else:
+        raise ValueError(f"Unsupported file type '{extension}' (expected .csv or .parquet)")
+
+class _FoldAssigner:
+    """Stratified fold ids for rows arriving in chunks.
+    
+    Each class draws its ids from shuffled rounds of ``0..n_folds-1``, so
+    every fold gets within one row of the same count per class.
+    """
+    def __init__(self, n_folds, seed):
+        self.n_folds = n_folds
+        self.rng = np.random.default_rng(seed)
+        self.pending = {0: np.empty(0, dtype=np.uint8), 1: np.empty(0, dtype=np.uint8)}
+    
+    def assign(self, labels):
+        folds = np.empty(len(labels), dtype=np.uint8)
+        for label, pending in self.pending.items():
+            rows = np.flatnonzero(labels == label)
+            if len(pending) < len(rows):
+                rounds = -(-(len(rows) - len(pending)) // self.n_folds)
+                fresh = self.rng.permuted(np.tile(np.arange(self.n_folds, dtype=np.uint8), (rounds, 1)), axis=1)
+                pending = np.concatenate([pending, fresh.ravel()])
+            folds[rows] = pending[:len(rows)]
+            self.pending[label] = pending[len(rows):]
+        return folds
+
+def prepare_dataset(source, output_dir, chunk_rows=100_000, transform=None, n_folds=5, seed=42):
+    """Preprocess ``source`` into ``output_dir``; returns the opened ``MemmapDataset``.
+    
+    Rows with a missing feature or label are skipped (and counted). Memory
+    use is bounded by ``chunk_rows``, whatever the size of the source.
+    """
+    transform = transform or FeatureTransform()
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+    logger.info(f"💽 Preprocessing {source} into {output_dir} ({chunk_rows} rows per chunk)...")
+    
+    scaler = StandardScaler()
+    folds = _FoldAssigner(n_folds, seed)
+    rows = skipped = positives = 0
+    with open(os.path.join(output_dir, FEATURES_FILE), 'wb') as features_file, \
+            open(os.path.join(output_dir, LABELS_FILE), 'wb') as labels_file, \
+            open(os.path.join(output_dir, FOLDS_FILE), 'wb') as folds_file:
+        for chunk in iter_source_chunks(source, chunk_rows, BASE_FEATURES + [LABEL_COLUMN]):
+            complete = chunk.dropna()
+            skipped += len(chunk) - len(complete)
+            if complete.empty:
+                continue
+            
+            labels = complete[LABEL_COLUMN].to_numpy()
+            if not np.isin(labels, (0, 1)).all():
+                raise ValueError(f"'{LABEL_COLUMN}' must be 0 or 1 (row {rows + skipped} onwards)")
+            labels = labels.astype(np.uint8)
+            
+            features = transform.transform({name: complete[name].to_numpy() for name in BASE_FEATURES})
+            X = transform.matrix(features)
+            scaler.partial_fit(X)
+            
+            features_file.write(X.astype(np.float32).tobytes())
+            labels_file.write(labels.tobytes())
+            folds_file.write(folds.assign(labels).tobytes())
+            rows += len(labels)
+            positives += int(labels.sum())
+    
+    if rows == 0:
+        raise ValueError(f"{source} has no complete rows")
+    
+    with open(os.path.join(output_dir, SCALER_FILE), 'wb') as f:
+        pickle.dump(scaler, f)
+    info = {
+        'source': os.path.abspath(source),
+        'rows': rows,
+        'skipped_rows': skipped,
+        'positives': positives,
+        'n_features': len(transform.feature_names),
+        'feature_transform': transform.to_dict(),
+        'n_folds': n_folds,
+        'fold_seed': seed,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    with open(os.path.join(output_dir, INFO_FILE), 'w') as f:
+        json.dump(info, f, indent=2)
+    
+    dataset = MemmapDataset(output_dir)
+    # Scale in place, one window at a time
+    mean = scaler.mean_.astype(np.float32)
+    scale = scaler.scale_.astype(np.float32)
+    for start, stop in dataset.blocks(chunk_rows):
+        window = dataset._window(FEATURES_FILE, np.float32, start, stop, mode='r+')
+        window -= mean
+        window /= scale
+        window.flush()
+        del window
+    
+    logger.info(f"✅ {rows} rows ({skipped} skipped, {positives / rows * 100:.1f}% positive) in "
+                f"{time.perf_counter() - started:.1f}s; peak RSS {peak_rss_mb():.0f} MB")
+    return dataset
+
+class MemmapDataset:
+    """A prepared dataset, read through memory-mapped windows.
+    
+    Holds no row data itself, so it pickles cheaply into worker processes.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INFO_FILE), 'r') as f:
+            self.info = json.load(f)
+        self.rows = self.info['rows']
+        self.n_features = self.info['n_features']
+        self.n_folds = self.info['n_folds']
+        self.transform = FeatureTransform.from_dict(self.info['feature_transform'])
+    
+    @property
+    def scaler(self):
+        with open(os.path.join(self.directory, SCALER_FILE), 'rb') as f:
+            return pickle.load(f)
+    
+    def _window(self, name, dtype, start, stop, mode='r'):
+        width = self.n_features if name == FEATURES_FILE else 1
+        shape = (stop - start, width) if name == FEATURES_FILE else (stop - start,)
+        return np.memmap(os.path.join(self.directory, name), dtype=dtype, mode=mode,
+                         offset=start * width * np.dtype(dtype).itemsize, shape=shape)
+    
+    def blocks(self, block_rows):
+        """(start, stop) row ranges covering the dataset"""
+        return [(start, min(start + block_rows, self.rows)) for start in range(0, self.rows, block_rows)]
+    
+    def read(self, start, stop):
+        """(features, labels, fold ids) of rows ``start:stop``, copied out of the mapping"""
+        return tuple(np.array(self._window(name, dtype, start, stop)) for name, dtype in
+                     ((FEATURES_FILE, np.float32), (LABELS_FILE, np.uint8), (FOLDS_FILE, np.uint8)))
+    
+    def fold_sizes(self, block_rows=1_000_000):
+        """Rows per fold"""
+        counts = np.zeros(self.n_folds, dtype=np.int64)
+        for start, stop in self.blocks(block_rows):
+            counts += np.bincount(self._window(FOLDS_FILE, np.uint8, start, stop), minlength=self.n_folds)
+        return counts
+    
+    def sample(self, max_rows, seed=42, block_rows=100_000):
+        """(X, y, fold ids) of a uniform random sample of at most ``max_rows`` rows, in file order"""
+        rng = np.random.default_rng(seed)
+        keep = max_rows / self.rows
+        X_parts, y_parts, fold_parts = [], [], []
+        for start, stop in self.blocks(block_rows):
+            X, y, folds = self.read(start, stop)
+            chosen = rng.random(len(y)) < keep
+            X_parts.append(X[chosen])
+            y_parts.append(y[chosen])
+            fold_parts.append(folds[chosen])
+        return (np.concatenate(X_parts)[:max_rows], np.concatenate(y_parts)[:max_rows].astype(np.int64),
+                np.concatenate(fold_parts)[:max_rows])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help=f'CSV or Parquet file with {", ".join(BASE_FEATURES)} and {LABEL_COLUMN}')
+    parser.add_argument('output_dir', help='directory for the memory-mapped dataset')
+    parser.add_argument('--chunk-rows', type=int, default=100_000, help='rows read and written at a time')
+    parser.add_argument('--folds', type=int, default=5, help='cross-validation folds to assign')
+    parser.add_argument('--seed', type=int, default=42, help='seed of the fold assignment')
+    args = parser.parse_args()
+    
+    try:
+        prepare_dataset(args.source, args.output_dir, chunk_rows=args.chunk_rows, n_folds=args.folds, seed=args.seed)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Feature engineering shared by training and serving.
+
+``FeatureTransform`` turns base columns (one 1-D array per input) into the
+model's features, derived ones included, and stacks them into the matrix the
+scaler and network see. Training runs it over the whole dataset, batch
+scoring over a chunk and a single request over columns of length one, so
+every path encodes and derives features identically. The transform is saved
+into the model info (``feature_transform``) next to the weights it was
+trained with.
+
+``smoking_history`` is carried as a code into ``SMOKING_CATEGORIES``, which
+is what the rule table and ``features_used`` see. A model may have been
+trained with another vocabulary order (models from before this module used a
+``LabelEncoder``, i.e. alphabetical order); ``matrix`` maps the codes to that
+order for the network.
+"""
+import numpy as np
+
+# Inputs every model is trained on, in training column order
+BASE_FEATURES = ['gender', 'age', 'hypertension', 'heart_disease',
+                 'smoking_history', 'bmi', 'HbA1c_level', 'blood_glucose_level']
+
+# Engineered features, appended after the base ones
+DERIVED_FEATURES = ['age_bmi_interaction', 'glucose_hba1c_ratio', 'health_risk_score']
+
+# Smoking history vocabulary; unknown values encode as 'never'
+SMOKING_CATEGORIES = ('never', 'former', 'current', 'not_current')
+
+_INTEGER_FEATURES = ('gender', 'age', 'hypertension', 'heart_disease', 'smoking_history', 'systolic_bp')
+
+def patient_columns(records):
+    """Base feature columns (plus ``systolic_bp``) from ``payloads.parse_patient`` records.
+    
+    ``hypertension`` and ``heart_disease`` come from the ``disease`` text (and
+    systolic pressure above 140), as they always have; the payload's own
+    ``hypertension``/``heart_disease`` flags are not model inputs.
+    """
+    integers = []
+    for record in records:
+        disease = record['disease'].lower()
+        integers.append((record['gender'].lower() == 'male', record['age'], record['sbp'],
+                         'hypertension' in disease, 'heart' in disease))
+    integers = np.array(integers, dtype=np.int64).reshape(len(records), 5)
+    floats = np.array([(record['bmi'], record['hba1c'], record['blood_glucose']) for record in records],
+                      dtype=np.float64).reshape(len(records), 3)
+    
+    return {
+        'gender': integers[:, 0],
+        'age': integers[:, 1],
+        'hypertension': integers[:, 3] | (integers[:, 2] > 140),
+        'heart_disease': integers[:, 4],
+        'smoking_history': [record['smoking_history'] for record in records],
+        'bmi': floats[:, 0],
+        'HbA1c_level': floats[:, 1],
+        'blood_glucose_level': floats[:, 2],
+        'systolic_bp': integers[:, 2]
+    }
+
+def encoder_classes(encoders):
+    """Vocabulary lists from fitted ``LabelEncoder``s or plain lists"""
+    return {name: [str(c) for c in getattr(encoder, 'classes_', encoder)] for name, encoder in encoders.items()}
+
+class FeatureTransform:
+    """Columnar feature pipeline for one model.
+    
+    ``feature_names`` is the model's input order; ``smoking_categories`` the
+    vocabulary order its smoking codes were trained with.
+    """
+    def __init__(self, feature_names=BASE_FEATURES + DERIVED_FEATURES, smoking_categories=SMOKING_CATEGORIES):
+        unknown = [name for name in feature_names if name not in BASE_FEATURES and name not in DERIVED_FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown features: {unknown}")
+        self.feature_names = list(feature_names)
+        self.smoking_categories = tuple(smoking_categories)
+        self._smoking_codes = {category: code for code, category in enumerate(SMOKING_CATEGORIES)}
+        # SMOKING_CATEGORIES code -> code the model was trained with
+        self._model_smoking_codes = np.array([
+            self.smoking_categories.index(category) if category in self.smoking_categories else 0
+            for category in SMOKING_CATEGORIES
+        ], dtype=np.int64)
+    
+    def encode_smoking(self, values):
+        """Smoking history strings as ``SMOKING_CATEGORIES`` codes"""
+        codes = self._smoking_codes
+        return np.fromiter((codes.get(str(value).lower(), 0) for value in values), dtype=np.int64, count=len(values))
+    
+    def transform(self, columns):
+        """Every model feature (and any extra column passed in) as a dict of 1-D arrays"""
+        features = dict(columns)
+        features['smoking_history'] = self.encode_smoking(columns['smoking_history'])
+        for name in BASE_FEATURES:
+            features[name] = np.asarray(features[name], dtype=np.int64 if name in _INTEGER_FEATURES else np.float64)
+        
+        names = self.feature_names
+        if 'age_bmi_interaction' in names:
+            features['age_bmi_interaction'] = features['age'] * features['bmi']
+        if 'glucose_hba1c_ratio' in names:
+            features['glucose_hba1c_ratio'] = features['blood_glucose_level'] / np.maximum(features['HbA1c_level'], 1)
+        if 'health_risk_score' in names:
+            features['health_risk_score'] = (features['hypertension'] + features['heart_disease']) * features['age'] / 100
+        return features
+    
+    def matrix(self, features):
+        """(N, n_features) float64 model input, in ``feature_names`` order"""
+        matrix = np.empty((len(features['age']), len(self.feature_names)), dtype=np.float64)
+        for index, name in enumerate(self.feature_names):
+            column = features[name]
+            if name == 'smoking_history':
+                column = self._model_smoking_codes[column]
+            matrix[:, index] = column
+        return matrix
+    
+    @staticmethod
+    def rows(features):
+        """Per-record feature dicts with plain Python values"""
+        names = list(features)
+        columns = [features[name].tolist() for name in names]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+    
+    def encoders(self):
+        """Categorical vocabularies in the layout ``encoders.pkl`` and the serving artifact store"""
+        return {'gender': ['0', '1'], 'smoking_history': list(self.smoking_categories)}
+    
+    def to_dict(self):
+        return {'feature_names': self.feature_names, 'smoking_categories': list(self.smoking_categories)}
+    
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(spec['feature_names'], spec['smoking_categories'])
+    
+    @classmethod
+    def from_model_info(cls, model_info, encoder_classes=None):
+        """The transform a model was trained with.
+        
+        Models saved before the transform was serialized fall back to their
+        encoder vocabularies, then to the defaults.
+        """
+        if 'feature_transform' in model_info:
+            return cls.from_dict(model_info['feature_transform'])
+        feature_names = model_info.get('feature_names', BASE_FEATURES)
+        smoking_categories = (encoder_classes or {}).get('smoking_history', SMOKING_CATEGORIES)
+        return cls(feature_names, smoking_categories)
@@ -0,0 +1,56 @@
+"""Gunicorn configuration for the Healthcare DApp API.
+
+The app is preloaded in the master so the model bundle is loaded once and
+shared copy-on-write by every worker. Tune with the ``HEALTHGUARD_*``
+variables in settings.py. Run from the repository root::
+
+    gunicorn -c api/gunicorn.conf.py
+"""
+import gc
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, API_DIR)
+
+import settings
+
+wsgi_app = 'wsgi:application'
+pythonpath = API_DIR
+bind = settings.BIND
+workers = max(1, settings.WORKERS)
+worker_class = 'gthread'
+threads = max(1, settings.WORKER_THREADS)
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+def torch_threads_per_worker():
+    """Split the cores evenly so workers don't oversubscribe them"""
+    if settings.TORCH_THREADS > 0:
+        return settings.TORCH_THREADS
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def when_ready(server):
+    # Move everything loaded so far (model, scaler, encoders) out of the
+    # collector's generations so GC passes in workers don't write to those
+    # pages and un-share them
+    gc.freeze()
+    server.log.info(f"🧊 Froze {gc.get_freeze_count()} preloaded objects before forking {workers} workers")
+
+def post_fork(server, worker):
+    # Each worker gets its own async logging thread, when enabled
+    from structured_logging import configure_logging
+    configure_logging()
+    
+    n_threads = torch_threads_per_worker()
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(n_threads)
+    
+    if settings.MODEL_WATCH_INTERVAL_SECONDS > 0:
+        # Threads don't survive fork, so each worker runs its own watcher
+        from model_loader import start_model_watcher
+        start_model_watcher(settings.MODEL_WATCH_INTERVAL_SECONDS)
+    
+    server.log.info(f"👷 Worker {worker.pid} ready ({n_threads} torch threads, {threads} request threads)")
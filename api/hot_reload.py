@@ -0,0 +1,66 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ModelDirectoryWatcher:
+    """Poll the model directory and hot-reload when its files change.
+    
+    A change is only acted on once the directory has looked the same for a
+    full poll interval, so a training run that writes several files triggers
+    a single reload after it has finished writing.
+    """
+    def __init__(self, reload_fn, directory='models', interval_seconds=5.0):
+        self.reload_fn = reload_fn
+        self.directory = directory
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"👀 Watching {self.directory}/ for model changes every {self.interval_seconds}s")
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _snapshot(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+    
+    def _run(self):
+        loaded = self._snapshot()
+        pending = None
+        
+        while not self._stop.wait(self.interval_seconds):
+            current = self._snapshot()
+            if current == loaded:
+                pending = None
+                continue
+            if current != pending:
+                # Still changing; wait until it settles
+                pending = current
+                continue
+            
+            try:
+                self.reload_fn()
+            except Exception as e:
+                # Keep serving the current bundle; retry when the files change again
+                logger.error(f"❌ Hot reload failed, keeping current model: {str(e)}")
+            loaded = current
+            pending = None
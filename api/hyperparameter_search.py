@@ -0,0 +1,378 @@
+"""Hyperparameter search with asynchronous successive halving (ASHA).
+
+Samples network width and depth, dropout, learning rate, weight decay and
+batch size, and trains each trial on the first ``--folds`` cross-validation
+folds with the training pipeline's own ``train_fold``. At every rung
+(``--min-epochs`` × ``--eta``^k epochs) a trial records its best validation
+AUC so far and is stopped unless it is in the top 1/eta of the trials that
+reached the same rung on the same fold. Trials run in a process pool, and
+every trial and rung is recorded in a local SQLite database, so an
+interrupted search resumes where it stopped with the same sampled trials.
+
+With ``--latency-budget-ms``, trials whose architecture is slower than the
+budget are never trained. Latency is that of the serving backend chosen
+with ``--latency-backend`` (torch forward or the fused NumPy engine),
+measured once per architecture in the parent process before any trial
+starts, so it doesn't depend on ``--workers``. With
+``--target-auc``, the fastest trial reaching that AUC is picked instead of
+the most accurate one. Run from the repository root::
+
+    python api/hyperparameter_search.py --trials 40 --workers 4
+    python api/hyperparameter_search.py --trials 40 --latency-budget-ms 0.2 --target-auc 0.97
+    python api/training_pipeline.py --hyperparameters models/best_hyperparameters.json
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = 'models/hyperparameter_search.sqlite'
+DEFAULT_BEST_PATH = 'models/best_hyperparameters.json'
+
+# Sampled dimensions: width of the first hidden layer, number of hidden layers
+# (each half as wide as the previous one), then the optimizer and regularization
+SEARCH_SPACE = {
+    'width': [16, 32, 64, 128, 256, 512],
+    'depth': [1, 2, 3, 4],
+    'dropout_rate': [0.0, 0.1, 0.2, 0.3, 0.4],
+    'learning_rate': (1e-4, 1e-2),
+    'weight_decay': (1e-5, 1e-1),
+    'batch_size': [64, 128, 256]
+}
+
+# Trial states recorded in the database; the last three are final
+FINISHED_STATES = ('complete', 'pruned', 'over_budget', 'failed')
+
+def sample_hyperparameters(seed, trial_id):
+    """Hyperparameters for one trial; the same (seed, trial_id) always samples the same values"""
+    rng = random.Random(f'{seed}-{trial_id}')
+    width = rng.choice(SEARCH_SPACE['width'])
+    depth = rng.choice(SEARCH_SPACE['depth'])
+    log_uniform = lambda low, high: math.exp(rng.uniform(math.log(low), math.log(high)))
+    return {
+        'hidden_layers': [max(8, width >> layer) for layer in range(depth)],
+        'dropout_rate': rng.choice(SEARCH_SPACE['dropout_rate']),
+        'learning_rate': round(log_uniform(*SEARCH_SPACE['learning_rate']), 6),
+        'weight_decay': round(log_uniform(*SEARCH_SPACE['weight_decay']), 6),
+        'batch_size': rng.choice(SEARCH_SPACE['batch_size'])
+    }
+
+def rung_epochs(min_epochs, eta, max_epochs):
+    """Epoch counts (1-based) at which trials are compared"""
+    rungs = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        rungs.append(epochs)
+        epochs *= eta
+    return rungs
+
+class TrialDatabase:
+    """SQLite record of a search: its settings, every trial and every rung result.
+    
+    Each process opens its own connection; writes are short transactions, so
+    workers can share the file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS trials (
+                trial_id INTEGER PRIMARY KEY, hyperparameters TEXT, status TEXT,
+                auc REAL, fold_auc TEXT, latency_ms REAL, epochs INTEGER, seconds REAL, error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS rungs (
+                trial_id INTEGER, fold INTEGER, epoch INTEGER, value REAL,
+                PRIMARY KEY (trial_id, fold, epoch)
+            );
+        ''')
+    
+    def check_settings(self, settings):
+        """Store the search settings, or refuse to resume a search started with different ones"""
+        rows = dict(self.connection.execute('SELECT key, value FROM settings'))
+        if not rows:
+            self.connection.executemany('INSERT INTO settings VALUES (?, ?)',
+                                        [(key, json.dumps(value)) for key, value in settings.items()])
+            return
+        stored = {key: json.loads(value) for key, value in rows.items()}
+        if stored != settings:
+            raise ValueError(f"{self.path} holds a search with different settings ({stored}); "
+                             f"use another --db or the same settings")
+    
+    def statuses(self):
+        return dict(self.connection.execute('SELECT trial_id, status FROM trials'))
+    
+    def start_trial(self, trial_id, hyperparameters):
+        """Mark a trial running, discarding rung results of an interrupted earlier attempt"""
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.execute('DELETE FROM rungs WHERE trial_id = ?', (trial_id,))
+            self.connection.execute('INSERT OR REPLACE INTO trials (trial_id, hyperparameters, status) VALUES (?, ?, ?)',
+                                    (trial_id, json.dumps(hyperparameters), 'running'))
+    
+    def finish_trial(self, trial_id, status, auc=None, fold_auc=None, latency_ms=None, epochs=None, seconds=None,
+                     error=None):
+        self.connection.execute(
+            'UPDATE trials SET status = ?, auc = ?, fold_auc = ?, latency_ms = ?, epochs = ?, seconds = ?, error = ? '
+            'WHERE trial_id = ?',
+            (status, auc, json.dumps(fold_auc) if fold_auc is not None else None, latency_ms, epochs, seconds,
+             error, trial_id)
+        )
+    
+    def report_rung(self, trial_id, fold, epoch, value, eta):
+        """Record a rung result; True if the trial is in the top 1/eta there so far.
+        
+        Until ``eta`` trials reached the rung there is nothing to compare
+        against, and the trial continues.
+        """
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.execute('INSERT OR REPLACE INTO rungs VALUES (?, ?, ?, ?)', (trial_id, fold, epoch, value))
+            values = sorted((row[0] for row in self.connection.execute(
+                'SELECT value FROM rungs WHERE fold = ? AND epoch = ?', (fold, epoch))), reverse=True)
+        if len(values) < eta:
+            return True
+        return value >= values[len(values) // eta - 1]
+    
+    def trials(self):
+        rows = self.connection.execute(
+            'SELECT trial_id, hyperparameters, status, auc, fold_auc, latency_ms, epochs, seconds, error '
+            'FROM trials ORDER BY trial_id')
+        return [{
+            'trial_id': trial_id,
+            'hyperparameters': json.loads(hyperparameters),
+            'status': status,
+            'auc': auc,
+            'fold_auc': json.loads(fold_auc) if fold_auc else None,
+            'latency_ms': latency_ms,
+            'epochs': epochs,
+            'seconds': seconds,
+            'error': error
+        } for trial_id, hyperparameters, status, auc, fold_auc, latency_ms, epochs, seconds, error in rows]
+
+def best_trials(trials, target_auc=None):
+    """Completed trials, best first: by AUC, or with ``target_auc`` by latency among those reaching it"""
+    complete = [trial for trial in trials if trial['status'] == 'complete']
+    if target_auc is None:
+        return sorted(complete, key=lambda trial: -trial['auc'])
+    good_enough = [trial for trial in complete if trial['auc'] >= target_auc]
+    return sorted(good_enough, key=lambda trial: (trial['latency_ms'], -trial['auc']))
+
+# Per-worker state set up by _init_worker
+_worker = {}
+
+def _init_worker(X, y, splits, db_path, torch_threads, config, latencies):
+    import torch
+    torch.set_num_threads(torch_threads)
+    # Fold-level progress lines would drown the search's own
+    logging.getLogger('training_pipeline').setLevel(logging.WARNING)
+    _worker.update(X=X, y=y, splits=splits, db=TrialDatabase(db_path), config=config, latencies=latencies)
+
+def measure_trial_latency(hyperparameters, n_features, batch_size, backend='torch'):
+    """Median serving latency (ms) of the trial's freshly initialised architecture.
+    
+    ``backend`` is the serving backend the budget refers to: ``torch`` times
+    the AdvancedHealthcareNet forward, ``numpy`` the FusedNumpyNet the numpy
+    backend serves, with BatchNorm folded into its matmuls.
+    """
+    from network import AdvancedHealthcareNet
+    from numpy_engine import FusedNumpyNet
+    from model_compression import measure_latency
+    
+    model = AdvancedHealthcareNet(n_features, hyperparameters['hidden_layers'], hyperparameters['dropout_rate'])
+    model.eval()
+    if backend == 'numpy':
+        state_dict = {name: tensor.detach().numpy() for name, tensor in model.state_dict().items()}
+        engine = FusedNumpyNet.from_state_dict(state_dict, hyperparameters['hidden_layers'])
+        # measure_latency hands over torch batches; viewing one as NumPy doesn't copy
+        model = lambda batch: engine.predict(batch.numpy())
+    return measure_latency(model, n_features, batch_sizes=[batch_size], repeats=100, min_seconds=0.05)[str(batch_size)]
+
+def measure_search_latencies(trial_ids, config, n_features, torch_threads=1):
+    """Latency (ms) of each trial's architecture, measured once per architecture in this process.
+    
+    Runs before the trial pool starts, so no training competes for the cores
+    and the budget decisions are the same whatever ``--workers`` is.
+    """
+    import torch
+    previous_threads = torch.get_num_threads()
+    torch.set_num_threads(torch_threads)
+    by_architecture = {}
+    latencies = {}
+    try:
+        for trial_id in trial_ids:
+            hyperparameters = sample_hyperparameters(config['seed'], trial_id)
+            # Dropout is a no-op at inference, so the layer widths decide the latency
+            architecture = tuple(hyperparameters['hidden_layers'])
+            if architecture not in by_architecture:
+                by_architecture[architecture] = measure_trial_latency(
+                    hyperparameters, n_features, config['latency_batch_size'], config['latency_backend'])
+            latencies[trial_id] = by_architecture[architecture]
+    finally:
+        torch.set_num_threads(previous_threads)
+    
+    logger.info(f"⏱️ Measured {len(by_architecture)} architectures on the {config['latency_backend']} backend "
+                f"(batch size {config['latency_batch_size']})")
+    return latencies
+
+def run_trial(trial_id):
+    """Train one trial on the configured folds, stopping it at a rung where it lags"""
+    from training_pipeline import train_fold
+    
+    X, y, splits, db, config = _worker['X'], _worker['y'], _worker['splits'], _worker['db'], _worker['config']
+    hyperparameters = sample_hyperparameters(config['seed'], trial_id)
+    hyperparameters['max_epochs'] = config['max_epochs']
+    db.start_trial(trial_id, hyperparameters)
+    started = time.perf_counter()
+    
+    try:
+        latency_ms = _worker['latencies'][trial_id]
+        if config['latency_budget_ms'] is not None and latency_ms > config['latency_budget_ms']:
+            db.finish_trial(trial_id, 'over_budget', latency_ms=latency_ms, epochs=0, seconds=0.0)
+            return trial_id, 'over_budget', None, latency_ms
+        
+        rungs = set(config['rungs'])
+        fold_auc = []
+        epochs = 0
+        for fold, (train_idx, val_idx) in enumerate(splits):
+            def at_epoch_end(epoch, val_auc, best_val_auc, fold=fold):
+                if epoch + 1 not in rungs:
+                    return False
+                return not db.report_rung(trial_id, fold, epoch + 1, best_val_auc, config['eta'])
+            
+            result = train_fold(fold, X[train_idx], y[train_idx], X[val_idx], y[val_idx], seed=config['seed'],
+                                n_folds=len(splits), loop=config['loop'], hyperparameters=hyperparameters,
+                                epoch_callback=at_epoch_end)
+            epochs += result['epochs']
+            fold_auc.append(float(result['best_val_auc']))
+            if result['pruned']:
+                db.finish_trial(trial_id, 'pruned', auc=float(sum(fold_auc) / len(fold_auc)), fold_auc=fold_auc,
+                                latency_ms=latency_ms, epochs=epochs, seconds=time.perf_counter() - started)
+                return trial_id, 'pruned', fold_auc[-1], latency_ms
+        
+        auc = sum(fold_auc) / len(fold_auc)
+        db.finish_trial(trial_id, 'complete', auc=auc, fold_auc=fold_auc, latency_ms=latency_ms, epochs=epochs,
+                        seconds=time.perf_counter() - started)
+        return trial_id, 'complete', auc, latency_ms
+    except Exception as e:
+        db.finish_trial(trial_id, 'failed', error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - started)
+        return trial_id, 'failed', None, None
+
+def run_search(n_trials, workers=1, torch_threads=1, folds=1, min_epochs=5, eta=3, max_epochs=200, seed=42,
+               loop='fast', latency_budget_ms=None, latency_batch_size=1, latency_backend='torch',
+               db_path=DEFAULT_DB_PATH):
+    """Run (or resume) a search until ``n_trials`` trials finished; return every trial"""
+    from sklearn.model_selection import StratifiedKFold
+    from training_pipeline import create_enhanced_dataset, advanced_preprocessing
+    
+    config = {
+        'seed': seed, 'folds': folds, 'min_epochs': min_epochs, 'eta': eta, 'max_epochs': max_epochs,
+        'loop': loop, 'latency_budget_ms': latency_budget_ms, 'latency_batch_size': latency_batch_size,
+        'latency_backend': latency_backend, 'rungs': rung_epochs(min_epochs, eta, max_epochs)
+    }
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    db = TrialDatabase(db_path)
+    db.check_settings(config)
+    
+    statuses = db.statuses()
+    pending = [trial_id for trial_id in range(n_trials) if statuses.get(trial_id) not in FINISHED_STATES]
+    if len(pending) < n_trials:
+        logger.info(f"↩️ Resuming search: {n_trials - len(pending)} of {n_trials} trials already finished")
+    if not pending:
+        return db.trials()
+    
+    # Same synthetic data and fold splits as the training pipeline
+    X, y, _, _, _ = advanced_preprocessing(create_enhanced_dataset())
+    splits = list(StratifiedKFold(n_splits=5, shuffle=True, random_state=42).split(X, y))[:folds]
+    
+    latencies = measure_search_latencies(pending, config, X.shape[1], torch_threads)
+    
+    logger.info(f"🔎 Searching {len(pending)} trials in {workers} processes, rungs at epochs {config['rungs']} (eta={eta})")
+    started = time.perf_counter()
+    # spawn, not fork: a forked child can deadlock on the parent's OpenMP state
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(X, y, splits, db_path, torch_threads, config, latencies)) as pool:
+        for trial_id, status, value, latency_ms in pool.map(run_trial, pending):
+            latency = f"{latency_ms:.3f}ms" if latency_ms is not None else "n/a"
+            score = f"AUC={value:.4f}" if value is not None else ""
+            logger.info(f"🧪 Trial {trial_id}: {status} {score} latency={latency}")
+    
+    logger.info(f"✅ Search finished in {time.perf_counter() - started:.1f}s")
+    return db.trials()
+
+def main():
+    import settings
+    
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trials', type=int, default=30, help='total trials in the search (resumed searches count finished ones)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='trial processes')
+    parser.add_argument('--torch-threads', type=int, default=1, help='torch threads per trial process')
+    parser.add_argument('--folds', type=int, default=1, help='cross-validation folds each trial trains (1-5)')
+    parser.add_argument('--min-epochs', type=int, default=5, help='epochs before the first rung')
+    parser.add_argument('--eta', type=int, default=3, help='keep the top 1/eta of trials at each rung')
+    parser.add_argument('--max-epochs', type=int, default=200, help='epoch limit per fold')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--loop', choices=['fast', 'dataloader'], default='fast', help='training loop (see training_pipeline.py)')
+    parser.add_argument('--latency-budget-ms', type=float, default=None,
+                        help='skip architectures whose CPU forward pass is slower than this')
+    parser.add_argument('--latency-batch-size', type=int, default=1, help='batch size the latency budget applies to')
+    parser.add_argument('--latency-backend', choices=['torch', 'numpy'], default=settings.MODEL_BACKEND,
+                        help='serving backend the latency budget applies to (default: HEALTHGUARD_MODEL_BACKEND)')
+    parser.add_argument('--target-auc', type=float, default=None,
+                        help='pick the fastest trial reaching this CV AUC instead of the most accurate one')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'trial database (default: {DEFAULT_DB_PATH})')
+    parser.add_argument('--output', default=DEFAULT_BEST_PATH,
+                        help=f'where to write the chosen hyperparameters (default: {DEFAULT_BEST_PATH})')
+    args = parser.parse_args()
+    
+    if not 1 <= args.folds <= 5:
+        parser.error('--folds must be between 1 and 5')
+    if args.eta < 2:
+        parser.error('--eta must be at least 2')
+    
+    try:
+        trials = run_search(args.trials, workers=args.workers, torch_threads=args.torch_threads, folds=args.folds,
+                            min_epochs=args.min_epochs, eta=args.eta, max_epochs=args.max_epochs, seed=args.seed,
+                            loop=args.loop, latency_budget_ms=args.latency_budget_ms,
+                            latency_batch_size=args.latency_batch_size, latency_backend=args.latency_backend,
+                            db_path=args.db)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    counts = {status: sum(1 for trial in trials if trial['status'] == status) for status in FINISHED_STATES}
+    print(f"\n📋 {len(trials)} trials: " + ', '.join(f"{count} {status}" for status, count in counts.items()))
+    
+    ranked = best_trials(trials, args.target_auc)
+    print(f"\n{'trial':>5} {'AUC':>7} {'latency':>9} {'epochs':>6}  hyperparameters")
+    for trial in ranked[:10]:
+        params = trial['hyperparameters']
+        print(f"{trial['trial_id']:>5} {trial['auc']:>7.4f} {trial['latency_ms']:>7.3f}ms {trial['epochs']:>6}  "
+              f"layers={params['hidden_layers']} dropout={params['dropout_rate']} lr={params['learning_rate']:g} "
+              f"wd={params['weight_decay']:g} batch={params['batch_size']}")
+    
+    if not ranked:
+        print("\n⚠️ No completed trial meets the criteria; nothing written")
+        return
+    
+    best = ranked[0]
+    with open(args.output, 'w') as f:
+        json.dump(best['hyperparameters'], f, indent=2)
+    print(f"\n🏆 Trial {best['trial_id']} (AUC {best['auc']:.4f}, {best['latency_ms']:.3f}ms) written to {args.output}")
+    print(f"Next step: python api/training_pipeline.py --hyperparameters {args.output}")
+
+if __name__ == '__main__':
+    main()
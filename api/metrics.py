@@ -0,0 +1,188 @@
+"""Always-on request instrumentation exported in the Prometheus text format.
+
+Stage timings go into fixed-bucket histograms labelled by endpoint and stage,
+so recording one costs a bisect and a locked increment. Model stages running
+on the micro-batcher thread are labelled with the endpoint their batch came
+from (``mixed`` when a batch served several). Every process keeps its own
+numbers, so under gunicorn each worker reports for itself.
+"""
+import bisect
+import contextvars
+import threading
+import time
+
+import settings
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Endpoint the current request is being served for; model stages are labelled with it
+# ('background' for warm-ups and anything else outside a request)
+current_endpoint = contextvars.ContextVar('current_endpoint', default='background')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with one series per label combination"""
+    kind = 'counter'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+    
+    def value(self, *labelvalues):
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+    
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+                for labels, value in values]
+
+class Histogram:
+    """Fixed-bucket histogram with one series per label combination"""
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then the sum of observations
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+    
+    def count(self, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return sum(series[:-1]) if series else 0
+    
+    def render(self):
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        
+        lines = []
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                label_text = _format_labels(self.labelnames, labels, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{label_text} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {repr(series[-1])}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+    
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Global registry and the metrics the API records
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    'healthguard_stage_duration_seconds',
+    'Time spent in each stage of serving a request',
+    ['endpoint', 'stage']
+)
+request_seconds = registry.histogram(
+    'healthguard_request_duration_seconds',
+    'Time from receiving a request to returning its response',
+    ['endpoint']
+)
+requests_total = registry.counter(
+    'healthguard_requests_total',
+    'Requests served, by endpoint and HTTP status',
+    ['endpoint', 'status']
+)
+fallback_predictions_total = registry.counter(
+    'healthguard_fallback_predictions_total',
+    'Predictions answered with the hard-coded MEDIUM fallback because the model failed',
+    ['endpoint', 'reason']
+)
+log_records_dropped_total = registry.counter(
+    'healthguard_log_records_dropped_total',
+    'INFO log records dropped because the async logging queue was full'
+)
+
+def observe_stage(stage, seconds):
+    """Record ``seconds`` spent in ``stage`` for the current endpoint"""
+    if settings.METRICS_ENABLED:
+        stage_seconds.observe(seconds, current_endpoint.get(), stage)
+
+class stage_timer:
+    """``with stage_timer('forward'):`` records the block's duration as a stage"""
+    __slots__ = ('stage', 'started')
+    
+    def __init__(self, stage):
+        self.stage = stage
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        observe_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+def record_request(endpoint, status, seconds):
+    """Count a finished request and record its total duration"""
+    if settings.METRICS_ENABLED:
+        request_seconds.observe(seconds, endpoint)
+        requests_total.inc(endpoint, str(status))
+
+def record_fallback(reason, count=1):
+    """Count predictions that fell back to the hard-coded MEDIUM response"""
+    fallback_predictions_total.inc(current_endpoint.get(), reason, amount=count)
+
+def render_metrics():
+    """Prometheus text for this process"""
+    return registry.render()
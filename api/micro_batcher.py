@@ -0,0 +1,139 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import current_endpoint
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Coalesce concurrent single-record predictions into batched calls.
+    
+    Callers block in ``submit`` while a background thread gathers requests for
+    up to ``max_wait_ms`` (or until ``max_batch_size`` are queued), runs them
+    through ``batch_fn`` in one call and hands each caller its own result.
+    ``batch_fn`` takes a list of records and returns a list aligned with it
+    whose entries are results or exceptions. A caller waits at most
+    ``timeout_s`` for its result and then gets a ``TimeoutError``.
+    """
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=2.0, timeout_s=10.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0) / 1000.0
+        self.timeout = timeout_s
+        
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+    
+    def submit(self, record):
+        """Queue one record and block until its result is ready"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((record, future, time.perf_counter(), current_endpoint.get()))
+        return future.result(timeout=self.timeout)
+    
+    def _ensure_started(self):
+        # Threads don't survive fork, so a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is not None:
+                    logger.error("❌ Micro-batcher thread died; restarting it")
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get())
+                deadline = time.perf_counter() + self.max_wait
+                
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    try:
+                        if remaining > 0:
+                            batch.append(self._queue.get(timeout=remaining))
+                        else:
+                            batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                self._dispatch(batch)
+            except Exception as e:
+                # Keep the thread alive; whoever is still waiting on this batch gets the error
+                logger.error(f"❌ Micro-batcher error: {str(e)}")
+                for _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
+    def _dispatch(self, batch):
+        dispatched_at = time.perf_counter()
+        records = [record for record, _, _, _ in batch]
+        
+        # Label the batch's model stages with the endpoint its requests came from
+        endpoints = {endpoint for _, _, _, endpoint in batch}
+        token = current_endpoint.set(endpoints.pop() if len(endpoints) == 1 else 'mixed')
+        try:
+            results = self.batch_fn(records)
+        except Exception as e:
+            logger.error(f"❌ Micro-batch failed: {str(e)}")
+            results = [e] * len(batch)
+        finally:
+            current_endpoint.reset(token)
+        
+        results = list(results)
+        if len(results) != len(batch):
+            logger.error(f"❌ Micro-batch returned {len(results)} results for {len(batch)} records")
+            missing = RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} records")
+            results = results[:len(batch)] + [missing] * (len(batch) - len(results))
+        
+        for (_, future, _, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        
+        delays = [dispatched_at - enqueued_at for _, _, enqueued_at, _ in batch]
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._queue_delay_total += sum(delays)
+            self._queue_delay_max = max(self._queue_delay_max, max(delays))
+    
+    def stats(self):
+        """Counters for batch fill ratio and queue delay"""
+        with self._stats_lock:
+            batches = self._batches
+            requests = self._requests
+            delay_total = self._queue_delay_total
+            delay_max = self._queue_delay_max
+        
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'requests': requests,
+            'mean_batch_size': requests / batches if batches else 0.0,
+            'batch_fill_ratio': requests / (batches * self.max_batch_size) if batches else 0.0,
+            'mean_queue_delay_ms': delay_total / requests * 1000 if requests else 0.0,
+            'max_queue_delay_ms': delay_max * 1000
+        }
@@ -0,0 +1,327 @@
+"""Post-training compression of the enhanced model.
+
+Builds smaller/faster variants of ``models/enhanced_model.pth``:
+
+- ``int8_dynamic``: torch dynamic int8 quantization of every Linear layer
+- ``pruned_50``: global L1 magnitude pruning of half the Linear weights
+- ``slim_50``: structural slimming that keeps the half of each hidden layer
+  with the largest BatchNorm scale, folding the mean activation of dropped
+  units into the next layer's bias, then briefly fine-tuned
+
+The base model holds the weights of the cross-validation fold with the best
+validation AUC, so that fold's validation split is the only data it never
+trained on. Every variant, the base included, is scored on that split alone;
+slimming statistics and fine-tuning use only the fold's training rows. Each
+variant is also timed on CPU at batch sizes 1, 32 and 1024. The results are
+recorded under ``variants`` in ``models/enhanced_model_info.json`` so
+``ModelLoader`` can serve one of them (``HEALTHGUARD_MODEL_VARIANT``).
+"""
+import json
+import os
+import pickle
+import sys
+import time
+import logging
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.utils.prune as prune
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import roc_auc_score
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from network import AdvancedHealthcareNet
+from feature_transform import FeatureTransform, encoder_classes
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = 'models/enhanced_model.pth'
+MODEL_INFO_PATH = 'models/enhanced_model_info.json'
+ENCODERS_PATH = 'models/encoders.pkl'
+LATENCY_BATCH_SIZES = [1, 32, 1024]
+
+def build_model(model_info, variant='base'):
+    """Build an eval-mode network shaped for ``variant``, ready for load_state_dict"""
+    spec = model_info.get('variants', {}).get(variant, {}) if variant != 'base' else {}
+    hidden_sizes = spec.get('hidden_layers', model_info['hyperparameters']['hidden_layers'])
+    
+    model = AdvancedHealthcareNet(
+        input_size=model_info['input_features'],
+        hidden_sizes=hidden_sizes,
+        dropout_rate=model_info['hyperparameters']['dropout_rate']
+    )
+    model.eval()
+    
+    if spec.get('quantization') == 'dynamic_int8':
+        model = quantize_dynamic_int8(model)
+    return model
+
+def quantize_dynamic_int8(model):
+    """Dynamic int8 quantization of the Linear layers"""
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def magnitude_prune(model, amount=0.5):
+    """Zero the smallest-magnitude Linear weights across the whole network"""
+    pruned = AdvancedHealthcareNet(
+        input_size=model.network[0].in_features,
+        hidden_sizes=_hidden_sizes(model),
+        dropout_rate=model.network[3].p
+    )
+    pruned.load_state_dict(model.state_dict())
+    pruned.eval()
+    
+    parameters = [(module, 'weight') for module in pruned.modules() if isinstance(module, nn.Linear)]
+    prune.global_unstructured(parameters, pruning_method=prune.L1Unstructured, amount=amount)
+    for module, name in parameters:
+        prune.remove(module, name)
+    return pruned
+
+def structural_slim(model, X_train, keep_ratio=0.5):
+    """Drop the hidden units with the smallest BatchNorm scale in every layer.
+    
+    The mean eval-mode activation of each dropped unit over ``X_train`` is
+    folded into the next Linear layer's bias so the network's output stays
+    centred without retraining.
+    """
+    hidden_sizes = _hidden_sizes(model)
+    blocks = [(model.network[4 * i], model.network[4 * i + 1]) for i in range(len(hidden_sizes))]
+    output_layer = model.network[4 * len(hidden_sizes)]
+    
+    # Mean post-activation value of every hidden unit on the training data
+    mean_activations = []
+    with torch.no_grad():
+        x = torch.FloatTensor(X_train)
+        for i in range(len(hidden_sizes)):
+            x = model.network[4 * i + 2](model.network[4 * i + 1](model.network[4 * i](x)))
+            mean_activations.append(x.mean(dim=0))
+    
+    kept = []
+    for linear, bn in blocks:
+        importance = (bn.weight / torch.sqrt(bn.running_var + bn.eps)).abs()
+        n_keep = max(1, int(round(linear.out_features * keep_ratio)))
+        kept.append(torch.sort(torch.topk(importance, n_keep).indices).values)
+    
+    slim = AdvancedHealthcareNet(
+        input_size=model.network[0].in_features,
+        hidden_sizes=[len(indices) for indices in kept],
+        dropout_rate=model.network[3].p
+    )
+    slim.eval()
+    
+    with torch.no_grad():
+        previous_kept = None
+        for i, ((linear, bn), indices) in enumerate(zip(blocks, kept)):
+            weight = linear.weight[indices]
+            bias = linear.bias[indices].clone()
+            if previous_kept is not None:
+                bias += _dropped_contribution(linear.weight[indices], previous_kept, mean_activations[i - 1])
+                weight = weight[:, previous_kept]
+            slim.network[4 * i].weight.copy_(weight)
+            slim.network[4 * i].bias.copy_(bias)
+            
+            slim_bn = slim.network[4 * i + 1]
+            slim_bn.weight.copy_(bn.weight[indices])
+            slim_bn.bias.copy_(bn.bias[indices])
+            slim_bn.running_mean.copy_(bn.running_mean[indices])
+            slim_bn.running_var.copy_(bn.running_var[indices])
+            previous_kept = indices
+        
+        slim_output = slim.network[4 * len(hidden_sizes)]
+        slim_output.weight.copy_(output_layer.weight[:, previous_kept])
+        slim_output.bias.copy_(output_layer.bias + _dropped_contribution(output_layer.weight, previous_kept, mean_activations[-1]))
+    
+    return slim
+
+def fine_tune(model, X, y, epochs=20, lr=0.001, weight_decay=0.01, batch_size=128, seed=42):
+    """Short retraining pass with the training pipeline's optimizer settings"""
+    torch.manual_seed(seed)
+    X_tensor = torch.FloatTensor(X)
+    y_tensor = torch.FloatTensor(y).reshape(-1, 1)
+    
+    optimizer = torch.optim.AdamW(model.parameters(), lr=lr, weight_decay=weight_decay)
+    criterion = nn.BCELoss()
+    
+    model.train()
+    for _ in range(epochs):
+        permutation = torch.randperm(len(X_tensor))
+        for start in range(0, len(permutation), batch_size):
+            batch = permutation[start:start + batch_size]
+            if len(batch) < 2:
+                continue  # BatchNorm needs more than one row in train mode
+            optimizer.zero_grad()
+            loss = criterion(model(X_tensor[batch]), y_tensor[batch])
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+            optimizer.step()
+    model.eval()
+    return model
+
+def _dropped_contribution(weight, kept_indices, mean_activation):
+    """Expected input to ``weight``'s layer coming from the dropped units"""
+    dropped = torch.ones(weight.shape[1], dtype=torch.bool)
+    dropped[kept_indices] = False
+    return weight[:, dropped] @ mean_activation[dropped]
+
+def _hidden_sizes(model):
+    return [module.out_features for module in model.network if isinstance(module, nn.Linear)][:-1]
+
+def count_parameters(model):
+    """Total and non-zero parameter counts (quantized weights included)"""
+    total = 0
+    nonzero = 0
+    for value in model.state_dict().values():
+        # Quantized Linear layers store (weight, bias) as one packed tuple
+        for tensor in value if isinstance(value, tuple) else (value,):
+            if not isinstance(tensor, torch.Tensor) or not (tensor.is_floating_point() or tensor.is_quantized):
+                continue
+            if tensor.is_quantized:
+                tensor = tensor.dequantize()
+            total += tensor.numel()
+            nonzero += int(torch.count_nonzero(tensor))
+    return total, nonzero
+
+def fold_ids(X, y, n_splits=5, random_state=42):
+    """Fold of every row under the stratified K-fold split used in training"""
+    folds = np.empty(len(y), dtype=np.int64)
+    kfold = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    for fold, (_, val_idx) in enumerate(kfold.split(X, y)):
+        folds[val_idx] = fold
+    return folds
+
+def validation_auc(model, X, y):
+    """AUC of ``model`` on (X, y)"""
+    with torch.no_grad():
+        predictions = model(torch.FloatTensor(X)).numpy().reshape(-1)
+    return float(roc_auc_score(y, predictions))
+
+def measure_latency(model, n_features, batch_sizes=LATENCY_BATCH_SIZES, repeats=200, min_seconds=0.2):
+    """Median CPU forward latency in milliseconds per batch size"""
+    latencies = {}
+    rng = np.random.RandomState(0)
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            batch = torch.FloatTensor(rng.randn(batch_size, n_features))
+            for _ in range(10):
+                model(batch)
+            
+            timings = []
+            started = time.perf_counter()
+            while len(timings) < repeats or time.perf_counter() - started < min_seconds:
+                t0 = time.perf_counter()
+                model(batch)
+                timings.append(time.perf_counter() - t0)
+                if len(timings) >= 10 * repeats:
+                    break
+            latencies[str(batch_size)] = float(np.median(timings) * 1000)
+    return latencies
+
+def create_model_variants(model, X, y, model_info, folds=None, threads=1, fine_tune_epochs=20):
+    """Build, evaluate and save every variant; returns the ``variants`` report.
+    
+    ``folds`` gives the cross-validation fold of each row of (X, y); by
+    default it is recomputed with the split ``train_advanced_model`` uses.
+    """
+    previous_threads = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    model.eval()
+    
+    try:
+        n_features = X.shape[1]
+        # The base model was trained on every fold but the best one
+        holdout_fold = int(np.argmax(model_info['fold_scores']))
+        folds = fold_ids(X, y) if folds is None else np.asarray(folds)
+        train, holdout = folds != holdout_fold, folds == holdout_fold
+        X_train, y_train, X_val, y_val = X[train], y[train], X[holdout], y[holdout]
+        logger.info(f"📏 Scoring variants on fold {holdout_fold + 1}'s validation split ({len(y_val)} rows)")
+        
+        variants = {
+            'int8_dynamic': (quantize_dynamic_int8(model), {'quantization': 'dynamic_int8'}),
+            'pruned_50': (magnitude_prune(model, amount=0.5), {'pruning': 'global_l1_unstructured', 'sparsity': 0.5}),
+            'slim_50': (
+                fine_tune(structural_slim(model, X_train, keep_ratio=0.5), X_train, y_train, epochs=fine_tune_epochs),
+                {'pruning': 'bn_scale_structured', 'keep_ratio': 0.5, 'fine_tune_epochs': fine_tune_epochs}
+            ),
+        }
+        
+        base_auc = validation_auc(model, X_val, y_val)
+        base_total, base_nonzero = count_parameters(model)
+        report = {
+            'base': {
+                'file': MODEL_PATH,
+                'hidden_layers': _hidden_sizes(model),
+                'parameters': base_total,
+                'nonzero_parameters': base_nonzero,
+                'validation_auc': base_auc,
+                'auc_delta': 0.0,
+                'latency_ms': measure_latency(model, n_features)
+            }
+        }
+        logger.info(f"📏 base: AUC={base_auc:.4f} latency={report['base']['latency_ms']}")
+        
+        for name, (variant, spec) in variants.items():
+            path = f'models/enhanced_model_{name}.pth'
+            torch.save(variant.state_dict(), path)
+            
+            auc = validation_auc(variant, X_val, y_val)
+            total, nonzero = count_parameters(variant)
+            hidden_layers = _hidden_sizes(model) if spec.get('quantization') else _hidden_sizes(variant)
+            latency = measure_latency(variant, n_features)
+            report[name] = dict(spec, **{
+                'file': path,
+                'hidden_layers': hidden_layers,
+                'parameters': total,
+                'nonzero_parameters': nonzero,
+                'file_size_bytes': os.path.getsize(path),
+                'validation_auc': auc,
+                'auc_delta': auc - base_auc,
+                'latency_ms': latency,
+                'slower_than_base_at': [int(size) for size, ms in latency.items() if ms > report['base']['latency_ms'][size]]
+            })
+            logger.info(f"📏 {name}: ΔAUC={report[name]['auc_delta']:+.4f} latency={latency}")
+            if report[name]['slower_than_base_at']:
+                logger.warning(f"⚠️ {name} is slower than the base model at batch sizes {report[name]['slower_than_base_at']}")
+        
+        report['_benchmark'] = {
+            'torch_threads': threads,
+            'batch_sizes': LATENCY_BATCH_SIZES,
+            'validation_fold': holdout_fold,
+            'validation_rows': int(len(y_val)),
+            'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+    finally:
+        torch.set_num_threads(previous_threads)
+    
+    model_info['variants'] = report
+    with open(MODEL_INFO_PATH, 'w') as f:
+        json.dump(model_info, f, indent=2)
+    
+    logger.info(f"✅ Model variants recorded in {MODEL_INFO_PATH}")
+    return report
+
+def main():
+    """Build variants for the saved enhanced model"""
+    from training_pipeline import create_enhanced_dataset, advanced_preprocessing
+    
+    with open(MODEL_INFO_PATH, 'r') as f:
+        model_info = json.load(f)
+    
+    model = build_model(model_info)
+    model.load_state_dict(torch.load(MODEL_PATH, map_location='cpu'))
+    
+    # Same synthetic data, feature encoding and fold splits the model was trained on
+    with open(ENCODERS_PATH, 'rb') as f:
+        transform = FeatureTransform.from_model_info(model_info, encoder_classes(pickle.load(f)))
+    X, y, _, _, _ = advanced_preprocessing(create_enhanced_dataset(), transform)
+    
+    report = create_model_variants(model, X, y, model_info)
+    
+    print(f"\n{'variant':<14} {'ΔAUC':>8} {'params':>8} " + ' '.join(f"{'bs=' + str(b):>10}" for b in LATENCY_BATCH_SIZES))
+    for name, entry in report.items():
+        if name.startswith('_'):
+            continue
+        print(f"{name:<14} {entry['auc_delta']:>+8.4f} {entry['nonzero_parameters']:>8} " +
+              ' '.join(f"{entry['latency_ms'][str(b)]:>8.3f}ms" for b in LATENCY_BATCH_SIZES))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
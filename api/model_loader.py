@@ -1,450 +1,697 @@
-import torch
 import pickle
 import json
+import hashlib
+import io
 import os
 import logging
+import threading
+import time
 import numpy as np
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+# torch and sklearn are imported on demand so the fast-start path
+# (serving artifact + numpy backend) never pays for them
+import settings
+from micro_batcher import MicroBatcher
+from numpy_engine import FusedNumpyNet
+from risk_rules import DEFAULT_RULES_PATH, load_risk_rules
+from prediction_cache import PredictionCache
+from serving_artifact import SERVING_ARTIFACT_PATH, load_serving_artifact
+from hot_reload import ModelDirectoryWatcher
+from metrics import stage_timer, observe_stage, record_fallback
+from request_profiler import is_profiling, profiling_span
+from structured_logging import log_event
+from payloads import parse_patient
+from feature_transform import BASE_FEATURES, FeatureTransform, encoder_classes, patient_columns
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class AdvancedHealthcareNet(torch.nn.Module):
-    """Enhanced Neural Network with advanced architecture"""
-    def __init__(self, input_size, hidden_sizes=[128, 64, 32], dropout_rate=0.3):
-        super(AdvancedHealthcareNet, self).__init__()
-        
-        layers = []
-        prev_size = input_size
-        
-        for i, hidden_size in enumerate(hidden_sizes):
-            # Linear layer
-            layers.append(torch.nn.Linear(prev_size, hidden_size))
-            # Batch normalization for better training stability
-            layers.append(torch.nn.BatchNorm1d(hidden_size))
-            # Advanced activation function
-            layers.append(torch.nn.LeakyReLU(0.1))
-            # Dropout for regularization
-            layers.append(torch.nn.Dropout(dropout_rate))
-            prev_size = hidden_size
-        
-        # Output layer
-        layers.append(torch.nn.Linear(prev_size, 1))
-        layers.append(torch.nn.Sigmoid())
-        
-        self.network = torch.nn.Sequential(*layers)
+def __getattr__(name):
+    # Keep `model_loader.AdvancedHealthcareNet` importable without a top-level torch import
+    if name == 'AdvancedHealthcareNet':
+        from network import AdvancedHealthcareNet
+        return AdvancedHealthcareNet
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _fingerprint(file_digests):
+    """Short hash identifying a set of model files from their per-file SHA-256 digests"""
+    digest = hashlib.sha256()
+    for path in sorted(file_digests):
+        digest.update(path.encode())
+        digest.update(file_digests[path])
+    return digest.hexdigest()[:12]
+
+def _fingerprint_files(paths):
+    """Short content hash identifying a set of model files as they are on disk now"""
+    file_digests = {}
+    for path in paths:
+        file_digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                file_digest.update(block)
+        file_digests[path] = file_digest.digest()
+    return _fingerprint(file_digests)
+
+class ArtifactReader:
+    """Reads a bundle's model files and keeps a digest of exactly the bytes read.
+    
+    The bundle version is computed from these digests, so a file replaced
+    while a reload is in progress can't give the new bundle a stale version.
+    """
+    def __init__(self):
+        self.file_digests = {}
+    
+    def read(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.file_digests[path] = hashlib.sha256(data).digest()
+        return data
     
-    def forward(self, x):
-        return self.network(x)
+    def open(self, path):
+        return io.BytesIO(self.read(path))
+    
+    def version(self):
+        return _fingerprint(self.file_digests)
 
-class ModelLoader:
+class ModelBundle:
+    """Everything needed to serve one model version.
+    
+    Filled in once while loading and then frozen. Requests take a single
+    reference to the current bundle, so a hot reload never mixes the weights
+    of one version with the scaler or feature names of another.
+    """
+    FIELDS = ('model', 'scaler', 'encoders', 'model_info', 'feature_names', 'feature_transform', 'hidden_sizes', 'engine',
+              'version')
+    
     def __init__(self):
-        self.model = None
-        self.scaler = None
-        self.encoders = None
-        self.model_info = None
-        self.feature_names = None
+        for field in self.FIELDS:
+            object.__setattr__(self, field, None)
+        object.__setattr__(self, '_frozen', False)
+    
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise AttributeError("ModelBundle is immutable once loaded")
+        object.__setattr__(self, name, value)
+    
+    def freeze(self):
+        object.__setattr__(self, '_frozen', True)
+        return self
+
+class ArtifactScaler:
+    """StandardScaler transform rebuilt from the serving artifact's mean and scale"""
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+    
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+# Patient used to warm up a freshly loaded bundle before it takes traffic
+WARMUP_PATIENT = {'age': 45, 'gender': 'Male', 'sbp': '120/80', 'sugar': '100', 'bmi': 25.0, 'hba1c': 5.5}
+
+# Inference backends ModelLoader can serve with
+BACKENDS = ('torch', 'numpy')
+
+# Largest absolute score difference tolerated between the numpy and torch paths
+NUMPY_BACKEND_TOLERANCE = 1e-4
+
+class ModelLoader:
+    def __init__(self, backend='torch', fast_start=False, variant='base', rules_path=DEFAULT_RULES_PATH,
+                 cache_size=0, cache_ttl_seconds=300.0):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        self.backend = backend
+        self.fast_start = fast_start
+        self.variant = variant
+        self.risk_rules = load_risk_rules(rules_path)
+        self.prediction_cache = PredictionCache(max_entries=cache_size, ttl_seconds=cache_ttl_seconds)
+        self.bundle = None
+        self._reload_lock = threading.Lock()
+    
+    # Read-only views of the currently published bundle
+    model = property(lambda self: self.bundle.model if self.bundle else None)
+    scaler = property(lambda self: self.bundle.scaler if self.bundle else None)
+    encoders = property(lambda self: self.bundle.encoders if self.bundle else None)
+    model_info = property(lambda self: self.bundle.model_info if self.bundle else None)
+    feature_names = property(lambda self: self.bundle.feature_names if self.bundle else None)
+    hidden_sizes = property(lambda self: self.bundle.hidden_sizes if self.bundle else None)
+    engine = property(lambda self: self.bundle.engine if self.bundle else None)
+    model_version_id = property(lambda self: self.bundle.version if self.bundle else None)
         
     def load_enhanced_model(self):
         """Load the enhanced model and all artifacts"""
         try:
             logger.info("🔄 Loading enhanced model artifacts...")
             
-            # Check if enhanced model exists
-            enhanced_model_path = 'models/enhanced_model.pth'
-            enhanced_info_path = 'models/enhanced_model_info.json'
+            bundle = self._load_bundle()
+            self._warm_up(bundle)
+            self._swap_bundle(bundle)
+            
+            return True
             
-            if os.path.exists(enhanced_model_path) and os.path.exists(enhanced_info_path):
-                return self._load_enhanced_artifacts()
-            else:
-                # Fallback to regular model
-                return self._load_regular_artifacts()
-                
         except Exception as e:
             logger.error(f"❌ Failed to load model: {str(e)}")
             raise
 
-    def _load_enhanced_artifacts(self):
+    def reload_model(self, force=False):
+        """Hot-reload the model from disk without interrupting requests.
+        
+        The new bundle is loaded and warmed up while requests keep using the
+        current one, then swapped in with a single reference assignment.
+        In-flight requests finish on the bundle they started with.
+        """
+        with self._reload_lock:
+            previous_version = self.model_version_id
+            started = time.perf_counter()
+            
+            _, source_files = self._resolve_sources()
+            if not force and _fingerprint_files(source_files) == previous_version:
+                return {'reloaded': False, 'model_version_id': previous_version}
+            
+            logger.info("🔄 Hot-reloading model artifacts...")
+            bundle = self._load_bundle()
+            self._warm_up(bundle)
+            self._swap_bundle(bundle)
+            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"♻️ Model hot-reloaded: {previous_version} -> {bundle.version} in {elapsed_ms:.0f}ms")
+            return {
+                'reloaded': True,
+                'previous_model_version_id': previous_version,
+                'model_version_id': bundle.version,
+                'reload_ms': elapsed_ms
+            }
+
+    def _resolve_sources(self):
+        """Pick the loading path and the files it reads"""
+        # Check if enhanced model exists
+        enhanced_model_path = 'models/enhanced_model.pth'
+        enhanced_info_path = 'models/enhanced_model_info.json'
+        
+        # The serving artifact only carries the base model
+        if self.fast_start and self.variant == 'base' and os.path.exists(SERVING_ARTIFACT_PATH):
+            return self._load_serving_artifact, [SERVING_ARTIFACT_PATH]
+        elif os.path.exists(enhanced_model_path) and os.path.exists(enhanced_info_path):
+            model_path = enhanced_model_path
+            if self.variant != 'base':
+                with open(enhanced_info_path, 'r') as f:
+                    model_path = self._variant_spec(json.load(f)).get('file', enhanced_model_path)
+            return self._load_enhanced_artifacts, [model_path, enhanced_info_path, 'models/scaler.pkl', 'models/encoders.pkl']
+        else:
+            # Fallback to regular model
+            return self._load_regular_artifacts, ['models/best_model.pth', 'models/model_info.json', 'models/scaler.pkl',
+                                                  'models/encoders.pkl']
+
+    def _load_bundle(self):
+        """Load a fresh, frozen ModelBundle from disk"""
+        load, _ = self._resolve_sources()
+        
+        bundle = ModelBundle()
+        reader = ArtifactReader()
+        load(bundle, reader)
+        # Fingerprint of the bytes actually loaded; responses and cached predictions carry it
+        bundle.version = reader.version()
+        return bundle.freeze()
+
+    def _warm_up(self, bundle):
+        """Run one prediction through a bundle before it serves traffic"""
+        raw_features_list, feature_matrix = self._extract_features([parse_patient(WARMUP_PATIENT)], bundle)
+        scores = self._score_features(feature_matrix, bundle)
+        self._build_predictions(scores, raw_features_list, bundle)
+
+    def _swap_bundle(self, bundle):
+        """Atomically publish a loaded bundle"""
+        self.bundle = bundle
+        # Entries are keyed on the version, so old ones could never hit again
+        self.prediction_cache.clear()
+        logger.info(f"🔖 Model version: {bundle.version}")
+
+    def _load_enhanced_artifacts(self, bundle, reader):
         """Load enhanced model artifacts"""
+        import torch
+        from network import AdvancedHealthcareNet
+        
         logger.info("📚 Loading enhanced model artifacts...")
         
         # Load model info first
-        with open('models/enhanced_model_info.json', 'r') as f:
-            self.model_info = json.load(f)
+        bundle.model_info = json.loads(reader.read('models/enhanced_model_info.json'))
         
         # Load preprocessors
-        with open('models/scaler.pkl', 'rb') as f:
-            self.scaler = pickle.load(f)
-            
-        with open('models/encoders.pkl', 'rb') as f:
-            self.encoders = pickle.load(f)
+        bundle.scaler = pickle.loads(reader.read('models/scaler.pkl'))
+        bundle.encoders = pickle.loads(reader.read('models/encoders.pkl'))
+        
+        # Compressed variants (see model_compression.py) override shape and weights file
+        variant_spec = self._variant_spec(bundle.model_info)
         
         # Initialize model with correct architecture
-        input_size = self.model_info['input_features']
-        hidden_sizes = self.model_info['hyperparameters']['hidden_layers']
-        dropout_rate = self.model_info['hyperparameters']['dropout_rate']
+        input_size = bundle.model_info['input_features']
+        hidden_sizes = variant_spec.get('hidden_layers', bundle.model_info['hyperparameters']['hidden_layers'])
+        dropout_rate = bundle.model_info['hyperparameters']['dropout_rate']
         
-        self.model = AdvancedHealthcareNet(
+        bundle.model = AdvancedHealthcareNet(
             input_size=input_size,
             hidden_sizes=hidden_sizes,
             dropout_rate=dropout_rate
         )
+        bundle.model.eval()
+        
+        if variant_spec.get('quantization') == 'dynamic_int8':
+            if self.backend == 'numpy':
+                raise ValueError("The int8_dynamic variant can only be served with the torch backend")
+            bundle.model = torch.ao.quantization.quantize_dynamic(bundle.model, {torch.nn.Linear}, dtype=torch.qint8)
         
         # Load model weights
-        self.model.load_state_dict(torch.load('models/enhanced_model.pth', map_location='cpu'))
-        self.model.eval()
+        bundle.model.load_state_dict(torch.load(reader.open(variant_spec.get('file', 'models/enhanced_model.pth')), map_location='cpu'))
+        bundle.model.eval()
         
-        self.feature_names = self.model_info['feature_names']
+        bundle.hidden_sizes = hidden_sizes
+        bundle.feature_transform = FeatureTransform.from_model_info(bundle.model_info, encoder_classes(bundle.encoders))
+        bundle.feature_names = bundle.feature_transform.feature_names
+        self._prepare_backend(bundle)
         
         logger.info(f"✅ Enhanced model loaded successfully!")
-        logger.info(f"📊 Model efficiency: {self.model_info['efficiency_percentage']:.2f}%")
-        logger.info(f"🏗️ Architecture: {self.model_info['architecture']}")
-        
-        return True
+        if self.variant != 'base':
+            logger.info(f"🗜️ Serving variant: {self.variant} (ΔAUC {variant_spec.get('auc_delta', 0):+.4f})")
+        logger.info(f"📊 Model efficiency: {bundle.model_info['efficiency_percentage']:.2f}%")
+        logger.info(f"🏗️ Architecture: {bundle.model_info['architecture']}")
+
+    def _variant_spec(self, model_info):
+        """Model info entry for the selected compressed variant ({} for the base model)"""
+        if self.variant == 'base':
+            return {}
+        variants = model_info.get('variants', {})
+        if self.variant not in variants:
+            raise ValueError(f"Unknown model variant '{self.variant}'. Run model_compression.py to build variants.")
+        return variants[self.variant]
 
-    def _load_regular_artifacts(self):
+    def _load_regular_artifacts(self, bundle, reader):
         """Fallback to load regular model artifacts"""
+        import torch
+        from network import AdvancedHealthcareNet
+        
         logger.info("📚 Loading regular model artifacts...")
         
         # Load model info
-        with open('models/model_info.json', 'r') as f:
-            self.model_info = json.load(f)
+        bundle.model_info = json.loads(reader.read('models/model_info.json'))
         
         # Load preprocessors
-        with open('models/scaler.pkl', 'rb') as f:
-            self.scaler = pickle.load(f)
-            
-        with open('models/encoders.pkl', 'rb') as f:
-            self.encoders = pickle.load(f)
+        bundle.scaler = pickle.loads(reader.read('models/scaler.pkl'))
+        bundle.encoders = pickle.loads(reader.read('models/encoders.pkl'))
         
         # Initialize regular model
-        self.model = AdvancedHealthcareNet(input_size=8)  # Default architecture
-        self.model.load_state_dict(torch.load('models/best_model.pth', map_location='cpu'))
-        self.model.eval()
+        bundle.model = AdvancedHealthcareNet(input_size=8)  # Default architecture
+        bundle.model.load_state_dict(torch.load(reader.open('models/best_model.pth'), map_location='cpu'))
+        bundle.model.eval()
         
-        self.feature_names = ['gender', 'age', 'hypertension', 'heart_disease', 
-                             'smoking_history', 'bmi', 'HbA1c_level', 'blood_glucose_level']
+        bundle.hidden_sizes = [128, 64, 32]
+        # Default architecture: base features only
+        bundle.feature_transform = FeatureTransform.from_model_info({'feature_names': BASE_FEATURES}, encoder_classes(bundle.encoders))
+        bundle.feature_names = bundle.feature_transform.feature_names
+        self._prepare_backend(bundle)
         
         logger.info("✅ Regular model loaded successfully!")
-        return True
 
-    def preprocess_patient_data(self, patient_data):
+    def _load_serving_artifact(self, bundle, reader):
+        """Load the compact .npz serving artifact, importing torch only for the torch backend"""
+        logger.info("📦 Loading compact serving artifact...")
+        
+        artifact = load_serving_artifact(reader.open(SERVING_ARTIFACT_PATH))
+        
+        bundle.model_info = artifact['model_info']
+        bundle.scaler = ArtifactScaler(artifact['scaler_mean'], artifact['scaler_scale'])
+        bundle.encoders = artifact['encoder_classes']
+        bundle.hidden_sizes = artifact['hidden_sizes']
+        bundle.feature_transform = FeatureTransform.from_model_info(bundle.model_info, artifact['encoder_classes'])
+        bundle.feature_names = bundle.feature_transform.feature_names
+        
+        if self.backend == 'numpy':
+            bundle.model = None
+            bundle.engine = FusedNumpyNet.from_state_dict(
+                artifact['state_dict'],
+                bundle.hidden_sizes,
+                scaler_mean=bundle.scaler.mean_,
+                scaler_scale=bundle.scaler.scale_
+            )
+            if artifact['verify_inputs'] is not None:
+                max_diff = float(np.max(np.abs(bundle.engine.predict(artifact['verify_inputs']) - artifact['verify_outputs'])))
+                if max_diff > NUMPY_BACKEND_TOLERANCE:
+                    raise RuntimeError(f"NumPy engine disagrees with exported torch outputs (max |Δ| = {max_diff:.2e})")
+                logger.info(f"⚡ NumPy inference engine ready (max |Δ| vs torch: {max_diff:.2e})")
+        else:
+            import torch
+            from network import AdvancedHealthcareNet
+            
+            bundle.model = AdvancedHealthcareNet(
+                input_size=bundle.model_info['input_features'],
+                hidden_sizes=bundle.hidden_sizes,
+                dropout_rate=bundle.model_info['hyperparameters']['dropout_rate']
+            )
+            bundle.model.load_state_dict({name: torch.from_numpy(values.copy()) for name, values in artifact['state_dict'].items()})
+            bundle.model.eval()
+            self._prepare_backend(bundle)
+        
+        logger.info(f"✅ Serving artifact loaded ({self.backend} backend)")
+
+    def _prepare_backend(self, bundle):
+        """Build the selected inference backend for the loaded model"""
+        if self.backend != 'numpy':
+            bundle.engine = None
+            return
+        
+        state_dict = {name: tensor.detach().cpu().numpy() for name, tensor in bundle.model.state_dict().items()}
+        bundle.engine = FusedNumpyNet.from_state_dict(
+            state_dict,
+            bundle.hidden_sizes,
+            scaler_mean=bundle.scaler.mean_,
+            scaler_scale=bundle.scaler.scale_
+        )
+        
+        max_diff = self._verify_numpy_engine(bundle)
+        logger.info(f"⚡ NumPy inference engine ready (max |Δ| vs torch: {max_diff:.2e})")
+
+    def _verify_numpy_engine(self, bundle, n_samples=256):
+        """Check the fused numpy engine numerically against the torch model"""
+        import torch
+        
+        rng = np.random.RandomState(0)
+        samples = bundle.scaler.mean_ + bundle.scaler.scale_ * rng.randn(n_samples, len(bundle.feature_names))
+        
+        with torch.no_grad():
+            expected = bundle.model(torch.FloatTensor(bundle.scaler.transform(samples))).numpy().reshape(-1)
+        max_diff = float(np.max(np.abs(bundle.engine.predict(samples) - expected)))
+        
+        if max_diff > NUMPY_BACKEND_TOLERANCE:
+            raise RuntimeError(f"NumPy engine disagrees with torch model (max |Δ| = {max_diff:.2e})")
+        return max_diff
+
+    def _score_features(self, feature_matrix, bundle=None):
+        """Run the model on an (N, n_features) raw feature matrix and return (N,) scores"""
+        bundle = bundle or self.bundle
+        if bundle.engine is not None:
+            # The scaler is folded into the engine's first layer
+            with stage_timer('forward'), profiling_span('FusedNumpyNet.predict'):
+                return bundle.engine.predict(feature_matrix)
+        
+        import torch
+        with stage_timer('scale'):
+            scaled_features = bundle.scaler.transform(feature_matrix)
+        with stage_timer('forward'), profiling_span('AdvancedHealthcareNet.forward'):
+            with torch.no_grad():
+                predictions = bundle.model(torch.FloatTensor(scaled_features))
+            return predictions.numpy().reshape(-1)
+
+    def preprocess_patient_data(self, patient_data, bundle=None):
         """Preprocess patient data for prediction"""
+        import torch
+        
+        bundle = bundle or self.bundle
         try:
-            # Extract features from patient data
-            features = {}
-            
-            # Extract systolic BP from SBP field
-            sbp_raw = patient_data.get('sbp', '120/80')
-            if isinstance(sbp_raw, str) and '/' in sbp_raw:
-                systolic_bp = int(sbp_raw.split('/')[0])
-            else:
-                systolic_bp = int(sbp_raw) if sbp_raw else 120
-            
-            # Extract blood sugar
-            sugar_raw = patient_data.get('sugar', '100')
-            if isinstance(sugar_raw, str):
-                blood_glucose = float(sugar_raw.replace('mg/dL', '').strip())
-            else:
-                blood_glucose = float(sugar_raw) if sugar_raw else 100
-            
-            # Calculate age from DOB or use direct age
-            age = self._calculate_age(patient_data.get('dob'), patient_data.get('age', 30))
-            
-            # Basic features
-            features['gender'] = 1 if patient_data.get('gender', 'Male').lower() == 'male' else 0
-            features['age'] = age
-            features['systolic_bp'] = systolic_bp  # Store for risk analysis
-            features['hypertension'] = 1 if systolic_bp > 140 or 'hypertension' in str(patient_data.get('disease', '')).lower() else 0
-            features['heart_disease'] = 1 if 'heart' in str(patient_data.get('disease', '')).lower() else 0
-            features['smoking_history'] = self._encode_smoking_history(patient_data.get('smoking_history', 'never'))
-            features['bmi'] = float(patient_data.get('bmi', 25.0))
-            features['HbA1c_level'] = float(patient_data.get('hba1c', 5.5))
-            features['blood_glucose_level'] = blood_glucose
-            
-            # Enhanced features (if available)
-            if 'age_bmi_interaction' in self.feature_names:
-                features['age_bmi_interaction'] = features['age'] * features['bmi']
-            if 'glucose_hba1c_ratio' in self.feature_names:
-                features['glucose_hba1c_ratio'] = features['blood_glucose_level'] / max(features['HbA1c_level'], 1)
-            if 'health_risk_score' in self.feature_names:
-                features['health_risk_score'] = (features['hypertension'] + features['heart_disease']) * features['age'] / 100
-            
-            # Convert to array in correct order
-            feature_array = np.array([features[name] for name in self.feature_names]).reshape(1, -1)
+            raw_features_list, feature_matrix = self._extract_features([parse_patient(patient_data)], bundle)
             
             # Scale features
-            scaled_features = self.scaler.transform(feature_array)
+            scaled_features = bundle.scaler.transform(feature_matrix)
             
-            return torch.FloatTensor(scaled_features), features
+            return torch.FloatTensor(scaled_features), raw_features_list[0]
             
         except Exception as e:
             logger.error(f"❌ Preprocessing failed: {str(e)}")
             raise
 
-    def _calculate_age(self, dob, default_age):
-        """Calculate age from date of birth"""
-        if dob:
-            try:
-                birth_date = datetime.strptime(dob, '%Y-%m-%d')
-                today = datetime.today()
-                age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-                return age
-            except:
-                pass
-        return int(default_age) if default_age else 30
-
-    def _encode_smoking_history(self, smoking_status):
-        """Encode smoking history"""
-        smoking_map = {
-            'never': 0,
-            'former': 1, 
-            'current': 2,
-            'not_current': 3
-        }
-        return smoking_map.get(str(smoking_status).lower(), 0)
+    def _extract_features(self, records, bundle=None):
+        """Feature dicts and the (N, n_features) model input for parsed patient records.
+        
+        One pass of the bundle's ``FeatureTransform`` over all records, the
+        same code training ran over the training set.
+        """
+        transform = (bundle or self.bundle).feature_transform
+        features = transform.transform(patient_columns(records))
+        return transform.rows(features), transform.matrix(features)
 
     def predict_risk(self, patient_data):
         """Make risk prediction with enhanced sensitivity"""
+        # One bundle for the whole request, even if a hot reload swaps it meanwhile
+        bundle = self.bundle
         try:
             # Preprocess data
-            features_tensor, raw_features = self.preprocess_patient_data(patient_data)
+            try:
+                with stage_timer('extract_features'):
+                    raw_features_list, feature_matrix = self._extract_features([parse_patient(patient_data)], bundle)
+                    raw_features = raw_features_list[0]
+            except Exception as e:
+                logger.error(f"❌ Preprocessing failed: {str(e)}")
+                raise
+            
+            cache_key = self._cache_key(raw_features, bundle)
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                return self._fresh_copy(cached)
             
             # Make prediction
-            with torch.no_grad():
-                prediction = self.model(features_tensor)
-                risk_score = float(prediction.item())
+            risk_score = float(self._score_features(feature_matrix, bundle)[0])
+            
+            result = self._build_predictions([risk_score], [raw_features], bundle)[0]
+            self.prediction_cache.put(cache_key, self._fresh_copy(result))
             
-            # FIXED: More sensitive risk level determination
-            if risk_score >= 0.3:  # Changed from 0.5 to 0.3
-                risk_level = 'HIGH'
-            elif risk_score >= 0.15:  # Changed from 0.3 to 0.15
-                risk_level = 'MEDIUM'
-            else:
-                risk_level = 'LOW'
+            log_event(logger, "🎯 Prediction made", level=logging.DEBUG,
+                      risk_level=result['risk_level'], risk_score=round(result['risk_score'], 3))
+            return result
             
-            # Additional risk boosting based on critical values
-            risk_score = self._apply_risk_boosting(risk_score, raw_features)
+        except Exception as e:
+            logger.error(f"❌ Prediction failed: {str(e)}")
+            raise
+
+    def predict_risk_batch(self, patients):
+        """Score N patient records with one feature transform, scaler call and forward pass.
+        
+        Returns a list aligned with ``patients``. Each entry is either the
+        result dict ``predict_risk`` would return for that record, or the
+        exception its preprocessing raised.
+        """
+        bundle = self.bundle
+        results = [None] * len(patients)
+        parsed_indices = []
+        records = []
+        
+        extract_started = time.perf_counter()
+        for i, patient_data in enumerate(patients):
+            try:
+                records.append(parse_patient(patient_data))
+            except Exception as e:
+                logger.error(f"❌ Preprocessing failed: {str(e)}")
+                results[i] = e
+                continue
+            parsed_indices.append(i)
             
-            # Re-evaluate risk level after boosting
-            if risk_score >= 0.4:
-                risk_level = 'HIGH'
-            elif risk_score >= 0.2:
-                risk_level = 'MEDIUM'
+        if not records:
+            return results
+        
+        try:
+            raw_features_list, feature_matrix = self._extract_features(records, bundle)
+        except Exception as e:
+            logger.error(f"❌ Preprocessing failed: {str(e)}")
+            for i in parsed_indices:
+                results[i] = e
+            return results
+        finally:
+            observe_stage('extract_features', time.perf_counter() - extract_started)
+        
+        valid_indices = []
+        valid_rows = []
+        cache_keys = []
+        for row, (i, raw_features) in enumerate(zip(parsed_indices, raw_features_list)):
+            cache_key = self._cache_key(raw_features, bundle)
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                results[i] = self._fresh_copy(cached)
+                continue
             
-            # Generate recommendations and risk factors
-            recommendations = self._generate_recommendations(risk_level, raw_features)
-            risk_factors = self._identify_risk_factors(raw_features)
+            valid_indices.append(i)
+            valid_rows.append(row)
+            cache_keys.append(cache_key)
+        
+        if valid_rows:
+            valid_features = [raw_features_list[row] for row in valid_rows]
+            try:
+                risk_scores = self._score_features(feature_matrix[valid_rows], bundle)
+            except Exception as e:
+                logger.error(f"❌ Batch prediction failed: {str(e)}")
+                for i in valid_indices:
+                    results[i] = e
+                return results
             
+            for i, cache_key, result in zip(valid_indices, cache_keys, self._build_predictions(risk_scores, valid_features, bundle)):
+                results[i] = result
+                self.prediction_cache.put(cache_key, self._fresh_copy(result))
+        
+        scored = sum(1 for result in results if not isinstance(result, Exception))
+        log_event(logger, "🎯 Batch prediction made", level=logging.DEBUG,
+                  records=len(patients), scored=scored, computed=len(valid_indices))
+        return results
+
+    def _cache_key(self, raw_features, bundle):
+        """Cache key: model version plus the canonical post-preprocessing feature vector"""
+        return (bundle.version, tuple(sorted(raw_features.items())))
+
+    @staticmethod
+    def _fresh_copy(result):
+        """Copy of a prediction result with its own containers and a current timestamp"""
+        copied = dict(result)
+        copied['recommendations'] = list(result['recommendations'])
+        copied['risk_factors'] = list(result['risk_factors'])
+        copied['features_used'] = dict(result['features_used'])
+        copied['timestamp'] = datetime.now().isoformat()
+        return copied
+
+    def _build_predictions(self, risk_scores, raw_features_list, bundle=None):
+        """Turn raw model scores into full prediction results with one rule-table pass"""
+        bundle = bundle or self.bundle
+        with stage_timer('rules'):
+            boosted_scores, risk_levels, recommendations, risk_factors = self.risk_rules.evaluate(risk_scores, raw_features_list)
+        model_version = bundle.model_info.get('model_type', 'Enhanced Healthcare NN v2.0')
+        
+        results = []
+        for risk_score, risk_level, row_recommendations, row_risk_factors, raw_features in zip(
+                np.asarray(boosted_scores).tolist(), risk_levels, recommendations, risk_factors, raw_features_list):
             # Calculate percentage score
             risk_score_percentage = min(max(risk_score * 100, 0), 100)
             
-            result = {
+            results.append({
                 'risk_score': risk_score,
                 'risk_level': risk_level,
                 'riskScorePercentage': risk_score_percentage,
                 'confidence': min(95, max(70, risk_score * 100 + 15)),
-                'recommendations': recommendations,
-                'risk_factors': risk_factors,
-                'model_version': self.model_info.get('model_type', 'Enhanced Healthcare NN v2.0'),
+                'recommendations': row_recommendations,
+                'risk_factors': row_risk_factors,
+                'model_version': model_version,
+                'model_version_id': bundle.version,
                 'features_used': raw_features,
                 'timestamp': datetime.now().isoformat()
-            }
-            
-            logger.info(f"🎯 Prediction made: {risk_level} risk ({risk_score:.3f}, {risk_score_percentage:.1f}%)")
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Prediction failed: {str(e)}")
-            raise
+            })
+        return results
 
     def _apply_risk_boosting(self, base_score, features):
         """Apply risk boosting for critical health indicators"""
-        boosted_score = base_score
-        
-        # Critical blood pressure boosting
-        sbp = features.get('systolic_bp', 120)
-        if sbp > 180:
-            boosted_score += 0.3  # Severe hypertension
-        elif sbp > 160:
-            boosted_score += 0.2  # Stage 2 hypertension
-        elif sbp > 140:
-            boosted_score += 0.1  # Stage 1 hypertension
-        
-        # Critical blood glucose boosting
-        glucose = features.get('blood_glucose_level', 100)
-        if glucose > 200:
-            boosted_score += 0.3  # Severe hyperglycemia
-        elif glucose > 140:
-            boosted_score += 0.2  # High glucose
-        elif glucose > 126:
-            boosted_score += 0.1  # Diabetic range
-        
-        # Age factor boosting
-        age = features.get('age', 30)
-        if age > 65:
-            boosted_score += 0.1
-        elif age > 50:
-            boosted_score += 0.05
-        
-        # Combination risk boosting
-        if sbp > 140 and glucose > 140:
-            boosted_score += 0.15  # Multiple critical factors
-        
-        return min(boosted_score, 1.0)  # Cap at 1.0
+        return self.risk_rules.apply_boosting_single(base_score, features)
 
     def _generate_recommendations(self, risk_level, features):
         """Generate health recommendations based on risk level and specific conditions"""
-        recommendations = []
-        
-        # Base recommendations by risk level
-        if risk_level == 'HIGH':
-            recommendations.extend([
-                "🚨 Seek immediate medical attention",
-                "📊 Monitor vital signs daily",
-                "💊 Review medications with doctor",
-                "🏥 Consider emergency consultation"
-            ])
-        elif risk_level == 'MEDIUM':
-            recommendations.extend([
-                "⚠️ Schedule doctor appointment within 1 week",
-                "📈 Monitor health metrics twice weekly",
-                "🥗 Follow strict dietary guidelines",
-                "💪 Begin supervised exercise program"
-            ])
-        else:
-            recommendations.extend([
-                "✅ Continue current healthy practices",
-                "📅 Schedule routine annual checkup",
-                "🥗 Maintain balanced nutrition",
-                "🏃 Regular moderate exercise"
-            ])
-        
-        # Specific condition-based recommendations
-        sbp = features.get('systolic_bp', 120)
-        glucose = features.get('blood_glucose_level', 100)
-        bmi = features.get('bmi', 25)
-        age = features.get('age', 30)
-        
-        if sbp > 140:
-            recommendations.append("🩸 Blood pressure management critical")
-        if glucose > 140:
-            recommendations.append("🍯 Strict blood sugar control needed")
-        if bmi > 30:
-            recommendations.append("⚖️ Weight management program recommended")
-        if age > 60 and (sbp > 130 or glucose > 120):
-            recommendations.append("👴 Age-related risk monitoring essential")
-        
-        return recommendations[:6]  # Limit to 6 recommendations
+        return self.risk_rules.recommendations_single(risk_level, features)
 
     def _identify_risk_factors(self, features):
         """Identify specific risk factors with enhanced sensitivity"""
-        risk_factors = []
-        
-        # Age factors (lowered thresholds)
-        age = features.get('age', 0)
-        if age > 60:
-            risk_factors.append("Advanced age (high risk)")
-        elif age > 45:
-            risk_factors.append("Middle age consideration")
-        
-        # BMI factors (lowered thresholds)
-        bmi = features.get('bmi', 25)
-        if bmi > 30:
-            risk_factors.append("Obesity (BMI > 30)")
-        elif bmi > 27:
-            risk_factors.append("Overweight (BMI > 27)")
-        elif bmi > 25:
-            risk_factors.append("Above normal weight")
-        
-        # Blood glucose factors (lowered thresholds)
-        glucose = features.get('blood_glucose_level', 100)
-        if glucose > 200:
-            risk_factors.append("Severe hyperglycemia")
-        elif glucose > 140:
-            risk_factors.append("High blood glucose")
-        elif glucose > 126:
-            risk_factors.append("Diabetic range glucose")
-        elif glucose > 100:
-            risk_factors.append("Elevated fasting glucose")
-        
-        # HbA1c factors (lowered thresholds)
-        hba1c = features.get('HbA1c_level', 5.5)
-        if hba1c > 7.0:
-            risk_factors.append("Poor diabetes control")
-        elif hba1c > 6.5:
-            risk_factors.append("Diabetic HbA1c level")
-        elif hba1c > 5.7:
-            risk_factors.append("Pre-diabetic HbA1c")
-        
-        # Blood pressure factors (lowered thresholds)
-        sbp = features.get('systolic_bp', 120)
-        if sbp > 180:
-            risk_factors.append("Severe hypertension crisis")
-        elif sbp > 160:
-            risk_factors.append("Stage 2 hypertension")
-        elif sbp > 140:
-            risk_factors.append("Stage 1 hypertension")
-        elif sbp > 130:
-            risk_factors.append("Elevated blood pressure")
-        elif sbp > 120:
-            risk_factors.append("Above normal blood pressure")
-        
-        # Medical history factors
-        if features.get('hypertension', 0) == 1:
-            risk_factors.append("Diagnosed hypertension")
-        if features.get('heart_disease', 0) == 1:
-            risk_factors.append("Heart disease history")
-        
-        # Smoking factors
-        smoking = features.get('smoking_history', 0)
-        if smoking == 2:
-            risk_factors.append("Current smoker")
-        elif smoking == 1:
-            risk_factors.append("Former smoker")
-        
-        # Combination risks
-        if sbp > 140 and glucose > 140:
-            risk_factors.append("Multiple critical conditions")
-        if age > 50 and bmi > 28:
-            risk_factors.append("Age-obesity combination risk")
-        
-        return risk_factors
+        return self.risk_rules.risk_factors_single(features)
 
     def _extract_systolic_bp(self, features):
         """Extract systolic BP from patient data"""
         return features.get('systolic_bp', 120)
 
 # Global model loader instance
-model_loader = ModelLoader()
+model_loader = ModelLoader(
+    backend=settings.MODEL_BACKEND,
+    fast_start=settings.FAST_START,
+    variant=settings.MODEL_VARIANT,
+    rules_path=settings.RISK_RULES_PATH or DEFAULT_RULES_PATH,
+    cache_size=settings.PREDICTION_CACHE_SIZE,
+    cache_ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS
+)
+
+# Optional coalescer in front of single-record predictions
+micro_batcher = None
+
+# Optional poller that hot-reloads the model when models/ changes
+model_watcher = None
 
 def load_model():
     """Load the model globally"""
     return model_loader.load_enhanced_model()
 
+def reload_model(force=False):
+    """Hot-reload the model from disk and atomically swap it in"""
+    return model_loader.reload_model(force=force)
+
+def start_model_watcher(interval_seconds=5.0):
+    """Hot-reload automatically whenever the files in models/ change"""
+    global model_watcher
+    model_watcher = ModelDirectoryWatcher(model_loader.reload_model, directory='models', interval_seconds=interval_seconds)
+    return model_watcher.start()
+
+def get_model_version_id():
+    """Fingerprint of the model currently serving requests"""
+    return model_loader.model_version_id
+
 def get_model_info():
     """Get model information"""
     if model_loader.model_info:
         return model_loader.model_info
     return {"status": "Model not loaded"}
 
+def enable_micro_batching(max_batch_size=32, max_wait_ms=2.0, timeout_s=10.0):
+    """Route single-record predictions through a dynamic micro-batcher"""
+    global micro_batcher
+    micro_batcher = MicroBatcher(model_loader.predict_risk_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                 timeout_s=timeout_s)
+    logger.info(f"📦 Micro-batching enabled: up to {max_batch_size} requests or {max_wait_ms}ms per batch")
+    return micro_batcher
+
+def get_micro_batching_stats():
+    """Get micro-batching counters"""
+    if micro_batcher:
+        return micro_batcher.stats()
+    return {"status": "Micro-batching disabled"}
+
+def get_prediction_cache_stats():
+    """Get prediction cache hit, miss and eviction counters"""
+    stats = model_loader.prediction_cache.stats()
+    stats['model_version_id'] = model_loader.model_version_id
+    return stats
+
 def predict_health_risk(patient_data):
     """Make health risk prediction"""
     try:
+        # Profiled requests skip the batcher so their forward pass runs (and is profiled) in the request thread
+        if micro_batcher and not is_profiling():
+            try:
+                return micro_batcher.submit(patient_data)
+            except FutureTimeoutError:
+                # A stalled batch: score this request in its own thread instead
+                logger.error(f"❌ Micro-batch timed out after {micro_batcher.timeout}s; scoring directly")
+                record_fallback('MicroBatchTimeout')
         return model_loader.predict_risk(patient_data)
     except Exception as e:
         logger.error(f"❌ Risk prediction failed: {str(e)}")
+        record_fallback(type(e).__name__)
         # Return a fallback response
-        return {
-            'risk_score': 0.5,
-            'risk_level': 'MEDIUM',
-            'riskScorePercentage': 50,
-            'confidence': 75,
-            'recommendations': ['Consult healthcare provider', 'Monitor health regularly'],
-            'risk_factors': ['Model prediction unavailable'],
-            'model_version': 'Fallback Mode',
-            'features_used': {},
-            'timestamp': datetime.now().isoformat()
-        }
\ No newline at end of file
+        return _fallback_prediction()
+
+def predict_health_risk_batch(patients):
+    """Make health risk predictions for a list of patients in one forward pass"""
+    try:
+        results = model_loader.predict_risk_batch(patients)
+    except Exception as e:
+        logger.error(f"❌ Batch risk prediction failed: {str(e)}")
+        results = [e] * len(patients)
+    
+    for result in results:
+        if isinstance(result, Exception):
+            record_fallback(type(result).__name__)
+    
+    # Records that failed get the same fallback the single-record path returns
+    return [_fallback_prediction() if isinstance(result, Exception) else result for result in results]
+
+def _fallback_prediction():
+    """Fallback response used when the model cannot score a record"""
+    return {
+        'risk_score': 0.5,
+        'risk_level': 'MEDIUM',
+        'riskScorePercentage': 50,
+        'confidence': 75,
+        'recommendations': ['Consult healthcare provider', 'Monitor health regularly'],
+        'risk_factors': ['Model prediction unavailable'],
+        'model_version': 'Fallback Mode',
+        'model_version_id': model_loader.model_version_id,
+        'features_used': {},
+        'timestamp': datetime.now().isoformat()
+    }
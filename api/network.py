@@ -0,0 +1,29 @@
+import torch
+
+class AdvancedHealthcareNet(torch.nn.Module):
+    """Enhanced Neural Network with advanced architecture"""
+    def __init__(self, input_size, hidden_sizes=[128, 64, 32], dropout_rate=0.3):
+        super(AdvancedHealthcareNet, self).__init__()
+        
+        layers = []
+        prev_size = input_size
+        
+        for i, hidden_size in enumerate(hidden_sizes):
+            # Linear layer
+            layers.append(torch.nn.Linear(prev_size, hidden_size))
+            # Batch normalization for better training stability
+            layers.append(torch.nn.BatchNorm1d(hidden_size))
+            # Advanced activation function
+            layers.append(torch.nn.LeakyReLU(0.1))
+            # Dropout for regularization
+            layers.append(torch.nn.Dropout(dropout_rate))
+            prev_size = hidden_size
+        
+        # Output layer
+        layers.append(torch.nn.Linear(prev_size, 1))
+        layers.append(torch.nn.Sigmoid())
+        
+        self.network = torch.nn.Sequential(*layers)
+    
+    def forward(self, x):
+        return self.network(x)
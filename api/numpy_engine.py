@@ -0,0 +1,81 @@
+import numpy as np
+
+# Modules per hidden block in AdvancedHealthcareNet.network:
+# Linear, BatchNorm1d, LeakyReLU, Dropout
+LAYERS_PER_BLOCK = 4
+
+class FusedNumpyNet:
+    """Eval-mode AdvancedHealthcareNet as plain NumPy matmuls.
+    
+    In eval mode BatchNorm1d is an affine transform and Dropout is a no-op,
+    and the StandardScaler in front of the network is affine too. All of them
+    are folded into the adjacent Linear layers once, so a forward pass is just
+    ``x @ W + b`` followed by LeakyReLU per hidden layer and a final sigmoid.
+    Inputs are raw (unscaled) feature matrices when a scaler was folded in.
+    """
+    def __init__(self, weights, biases, negative_slope=0.1, dtype=np.float32):
+        if len(weights) != len(biases):
+            raise ValueError("weights and biases must have the same length")
+        self.dtype = np.dtype(dtype)
+        # Stored transposed as (in, out) so a forward step is x @ W
+        self.weights = [np.ascontiguousarray(np.asarray(w).T, dtype=self.dtype) for w in weights]
+        self.biases = [np.asarray(b, dtype=self.dtype) for b in biases]
+        self.negative_slope = negative_slope
+    
+    @classmethod
+    def from_state_dict(cls, state_dict, hidden_sizes, scaler_mean=None, scaler_scale=None,
+                        bn_eps=1e-5, negative_slope=0.1, dtype=np.float32):
+        """Fold scaler and BatchNorm statistics into the Linear layers.
+        
+        ``state_dict`` maps AdvancedHealthcareNet parameter names to NumPy
+        arrays. Folding is done in float64 before casting to ``dtype``.
+        """
+        weights = []
+        biases = []
+        
+        for block in range(len(hidden_sizes)):
+            linear = f'network.{block * LAYERS_PER_BLOCK}'
+            bn = f'network.{block * LAYERS_PER_BLOCK + 1}'
+            
+            weight = np.asarray(state_dict[f'{linear}.weight'], dtype=np.float64)
+            bias = np.asarray(state_dict[f'{linear}.bias'], dtype=np.float64)
+            
+            # BatchNorm: gamma * (z - mean) / sqrt(var + eps) + beta
+            bn_scale = np.asarray(state_dict[f'{bn}.weight'], dtype=np.float64) / np.sqrt(
+                np.asarray(state_dict[f'{bn}.running_var'], dtype=np.float64) + bn_eps
+            )
+            bn_shift = np.asarray(state_dict[f'{bn}.bias'], dtype=np.float64) - \
+                np.asarray(state_dict[f'{bn}.running_mean'], dtype=np.float64) * bn_scale
+            
+            weights.append(weight * bn_scale[:, None])
+            biases.append(bias * bn_scale + bn_shift)
+        
+        output = f'network.{len(hidden_sizes) * LAYERS_PER_BLOCK}'
+        weights.append(np.asarray(state_dict[f'{output}.weight'], dtype=np.float64))
+        biases.append(np.asarray(state_dict[f'{output}.bias'], dtype=np.float64))
+        
+        # Scaler: W @ ((x - mean) / scale) + b == (W / scale) @ x + (b - W @ (mean / scale))
+        if scaler_mean is not None and scaler_scale is not None:
+            scaler_mean = np.asarray(scaler_mean, dtype=np.float64)
+            scaler_scale = np.asarray(scaler_scale, dtype=np.float64)
+            biases[0] = biases[0] - weights[0] @ (scaler_mean / scaler_scale)
+            weights[0] = weights[0] / scaler_scale[None, :]
+        
+        return cls(weights, biases, negative_slope=negative_slope, dtype=dtype)
+    
+    def predict(self, features):
+        """Return an (N,) array of risk probabilities for an (N, n_features) matrix"""
+        x = np.asarray(features, dtype=self.dtype)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        
+        last = len(self.weights) - 1
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            x = x @ weight
+            x += bias
+            if i < last:
+                # LeakyReLU, valid for 0 <= negative_slope < 1
+                x = np.maximum(x, self.negative_slope * x)
+        
+        # Numerically stable sigmoid
+        return (0.5 * (1.0 + np.tanh(0.5 * x))).reshape(-1)
@@ -0,0 +1,207 @@
+"""Request payload handling shared by the Flask and ASGI servers.
+
+Every patient payload goes through one schema (``PATIENT_FIELDS``), compiled
+once at import into a table of (output field, accepted keys, converter,
+default). ``parse_patient`` walks that table in a single pass and returns a
+``PatientRecord`` with canonical, typed fields, or raises
+``PatientDataError`` carrying an error per bad field.
+"""
+import json
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # stock json decoder
+    orjson = None
+
+# Fields every prediction request must carry
+REQUIRED_FIELDS = ['age', 'gender']
+
+# Required fields another key can stand in for: a date of birth gives the age
+REQUIRED_ALTERNATIVES = {'age': ('dob',)}
+
+# Placeholders the dashboard stores for vitals it doesn't have; treated as missing
+MISSING_MARKERS = frozenset({'', 'not recorded', 'not specified', 'n/a', 'na', 'unknown', 'null'})
+
+# A whole value: one number, optionally followed by a unit of letters, "/" or "%" ("132 mg/dL", "7.1%")
+_NUMBER = re.compile(r'\s*([-+]?\d+(?:\.\d+)?)\s*[a-zA-Z/%]*\s*')
+
+class PatientDataError(ValueError):
+    """A payload that failed validation; ``field_errors`` maps field to problem"""
+    def __init__(self, field_errors, missing_field=None):
+        self.field_errors = field_errors
+        self.missing_field = missing_field
+        if missing_field:
+            message = f'Missing required field: {missing_field}'
+        else:
+            message = 'Invalid patient data: ' + '; '.join(f'{field}: {problem}' for field, problem in field_errors.items())
+        super().__init__(message)
+
+    def to_body(self):
+        """Response body for a 400"""
+        error = str(self) if self.missing_field else 'Invalid patient data'
+        return {'error': error, 'field_errors': self.field_errors}
+
+class PatientRecord(dict):
+    """A payload that went through ``parse_patient``: canonical keys, coerced values"""
+    __slots__ = ()
+
+def parse_json_body(raw):
+    """Decode a raw request body; an empty body means no data"""
+    if not raw:
+        return None
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _is_missing(value):
+    return value is None or (isinstance(value, str) and value.strip().lower() in MISSING_MARKERS)
+
+def _number(value):
+    """int/float as-is; numeric strings, with or without units ("132 mg/dL")"""
+    if isinstance(value, bool):
+        raise ValueError(f'expected a number, got {value!r}')
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER.fullmatch(value)
+        if match:
+            return float(match.group(1))
+    raise ValueError(f'expected a number, got {value!r}')
+
+def _ranged(low, high, cast=float):
+    def convert(value):
+        number = _number(value)
+        if not low <= number <= high:
+            raise ValueError(f'{number:g} is outside {low:g}-{high:g}')
+        return cast(number)
+    return convert
+
+_bp_range = _ranged(50, 300, int)
+
+def _systolic(value):
+    """Systolic pressure from a number or a "systolic/diastolic" string"""
+    if isinstance(value, str) and '/' in value:
+        value = value.split('/', 1)[0]
+    return _bp_range(value)
+
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError(f'expected text, got {value!r}')
+    return value.strip()
+
+def _flag(value):
+    if isinstance(value, bool) or value in (0, 1):
+        return int(value)
+    if isinstance(value, str) and value.strip().lower() in ('0', '1', 'true', 'false', 'yes', 'no'):
+        return 1 if value.strip().lower() in ('1', 'true', 'yes') else 0
+    raise ValueError(f'expected 0/1, got {value!r}')
+
+@lru_cache(maxsize=65536)
+def _age_on(dob, today):
+    birth = datetime.strptime(dob, '%Y-%m-%d')
+    return today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
+
+def age_from_dob(dob, today=None):
+    """Whole years since a YYYY-MM-DD date of birth; cached per (dob, day)"""
+    try:
+        age = _age_on(dob, today or date.today())
+    except (AttributeError, ValueError):
+        raise ValueError(f'expected a YYYY-MM-DD date, got {dob!r}')
+    if not 0 <= age <= 130:
+        raise ValueError(f'gives an age of {age}')
+    return age
+
+# (field, accepted keys in priority order, converter, default)
+PATIENT_FIELDS = [
+    ('age', ('age',), _ranged(0, 130, int), 30),
+    ('dob', ('dob',), _text, None),
+    ('gender', ('gender',), _text, 'Male'),
+    ('smoking_history', ('smoking_history',), _text, 'never'),
+    ('bmi', ('bmi',), _ranged(5, 100), 25.0),
+    ('hba1c', ('hba1c', 'HbA1c_level'), _ranged(2, 20), 5.5),
+    ('blood_glucose', ('blood_glucose', 'sugar'), _ranged(10, 1000), 100.0),
+    ('sbp', ('sbp',), _systolic, 120),
+    ('disease', ('disease',), lambda value: str(value).strip(), ''),
+    # Accepted and validated, but features derive these from `disease` and `sbp` (see feature_transform)
+    ('hypertension', ('hypertension',), _flag, 0),
+    ('heart_disease', ('heart_disease',), _flag, 0)
+]
+
+_COMPILED_FIELDS = tuple((name, tuple(keys), convert, default) for name, keys, convert, default in PATIENT_FIELDS)
+
+def parse_patient(patient_data, required=(), today=None):
+    """Validate and coerce one payload into a ``PatientRecord`` in a single pass.
+
+    ``required`` names fields that must be present. Raises
+    ``PatientDataError`` listing every bad field.
+    """
+    if isinstance(patient_data, PatientRecord):
+        return patient_data
+    if not isinstance(patient_data, dict):
+        raise PatientDataError({'_': f'expected a JSON object, got {type(patient_data).__name__}'})
+
+    for field in required:
+        if all(_is_missing(patient_data.get(key)) for key in (field,) + REQUIRED_ALTERNATIVES.get(field, ())):
+            raise PatientDataError({field: 'required'}, missing_field=field)
+
+    record = PatientRecord()
+    errors = None
+    for name, keys, convert, default in _COMPILED_FIELDS:
+        value = None
+        for key in keys:
+            value = patient_data.get(key)
+            if not _is_missing(value):
+                break
+        if _is_missing(value):
+            record[name] = default
+            continue
+        try:
+            record[name] = convert(value)
+        except ValueError as e:
+            if errors is None:
+                errors = {}
+            errors[name] = str(e)
+
+    # A date of birth, when given, is what the age is computed from; a free-text
+    # one the dashboard couldn't normalize only fails when there's no age either
+    if record.get('dob'):
+        try:
+            record['age'] = age_from_dob(record['dob'], today)
+        except ValueError as e:
+            if _is_missing(patient_data.get('age')):
+                if errors is None:
+                    errors = {}
+                errors['dob'] = str(e)
+
+    if errors:
+        raise PatientDataError(errors)
+    return record
+
+def parse_patients(patients, required=(), today=None):
+    """Parse a list of payloads; return aligned lists of records and errors (one is None per item)"""
+    today = today or date.today()
+    records, errors = [], []
+    for patient_data in patients:
+        try:
+            records.append(parse_patient(patient_data, required, today))
+            errors.append(None)
+        except PatientDataError as e:
+            records.append(None)
+            errors.append(e)
+    return records, errors
+
+# Sample patient used by /test-prediction
+TEST_PATIENT = {
+    'age': 45,
+    'gender': 'Male',
+    'smoking_history': 'former',
+    'bmi': 28.5,
+    'hba1c': 6.2,
+    'blood_glucose': 120,
+    'disease': 'hypertension',
+    'hypertension': 1,
+    'heart_disease': 0
+}
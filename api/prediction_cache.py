@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+class PredictionCache:
+    """Bounded LRU cache with a per-entry TTL for prediction results.
+    
+    Keys are built by the caller (``ModelLoader`` uses the model version plus
+    the canonical post-preprocessing feature vector). Thread-safe.
+    """
+    def __init__(self, max_entries=10000, ttl_seconds=300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+    
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+    
+    def get(self, key):
+        """Return the cached value for ``key`` or None"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+    
+    def put(self, key, value):
+        """Store ``value`` under ``key``, evicting the least recently used entry when full"""
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+    
+    def clear(self):
+        """Drop every entry (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Hit, miss and eviction counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
@@ -0,0 +1,238 @@
+import contextlib
+import contextvars
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+# Whether the request running in this context is being profiled
+_profiling = contextvars.ContextVar('profiling', default=False)
+
+def is_profiling():
+    """True while the current request is being profiled"""
+    return _profiling.get()
+
+def profiling_span(name):
+    """A torch profiler span for a profiled request; a no-op context otherwise"""
+    if _profiling.get() and 'torch' in sys.modules:
+        return sys.modules['torch'].autograd.profiler.record_function(name)
+    return contextlib.nullcontext()
+
+class _ProfiledRequest:
+    """Profilers attached to one request, from ``begin_request`` to ``end_request``"""
+    __slots__ = ('profile', 'torch_profile', 'thread_id', 'started')
+
+class RequestProfiler:
+    """Profile selected live requests and aggregate the results.
+    
+    Armed with ``start`` for the next ``requests`` requests, or for a
+    ``sample_rate`` fraction of them until ``max_requests`` were profiled.
+    ``cprofile`` mode records deterministic call statistics (downloadable as
+    pstats); ``sample`` mode samples the request thread's stack every
+    ``interval_ms`` into flamegraph-ready collapsed stacks. Either way torch
+    operator timings from the model forward are aggregated when torch serves.
+    When nothing is armed a request costs one attribute check.
+    """
+    def __init__(self):
+        self.armed = False
+        self._lock = threading.Lock()
+        # One profiled request at a time: cProfile and the torch profiler don't nest
+        self._busy = threading.Lock()
+        self._reset(mode='cprofile', requests=0, sample_rate=None, max_requests=0, interval_ms=1.0)
+    
+    def _reset(self, mode, requests, sample_rate, max_requests, interval_ms):
+        self.mode = mode
+        self.remaining = requests
+        self.sample_rate = sample_rate
+        self.max_requests = max_requests
+        self.interval = interval_ms / 1000.0
+        self.profiled = 0
+        self.skipped = 0
+        self.profiled_seconds = 0.0
+        self.started_at = None
+        self._stats = None
+        self._stacks = Counter()
+        self._torch_ops = {}
+        self._sampling_thread_id = None
+        self._sampler = None
+        self._sampler_stop = threading.Event()
+    
+    def start(self, requests=None, sample_rate=None, max_requests=1000, mode='cprofile', interval_ms=1.0):
+        """Arm a new session, discarding the previous one's results"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"mode must be one of {', '.join(PROFILE_MODES)}")
+        if sample_rate is not None and not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        if sample_rate is None and (requests is None or requests < 1):
+            raise ValueError("Give either requests >= 1 or a sample_rate")
+        if interval_ms <= 0:
+            raise ValueError("interval_ms must be positive")
+        
+        self.stop()
+        with self._lock:
+            self._reset(mode, requests or 0, sample_rate, max_requests if sample_rate is not None else requests,
+                        interval_ms)
+            self.started_at = time.time()
+            if mode == 'sample':
+                self._sampler_stop = threading.Event()
+                self._sampler = threading.Thread(target=self._sample_stacks, name='request-profiler', daemon=True)
+                self._sampler.start()
+            self.armed = True
+        
+        logger.info(f"🔬 Profiling armed: {self.status()['selection']} ({mode})")
+        return self.status()
+    
+    def stop(self):
+        """Disarm; results stay available for download"""
+        with self._lock:
+            self.armed = False
+            self._sampler_stop.set()
+    
+    def _select(self):
+        """Decide whether the next request is profiled"""
+        with self._lock:
+            if not self.armed:
+                return False
+            if self.sample_rate is not None and random.random() >= self.sample_rate:
+                return False
+            if not self._busy.acquire(blocking=False):
+                self.skipped += 1
+                return False
+            return True
+    
+    def begin_request(self):
+        """Start profiling the calling thread's request if it is selected; return a handle or None"""
+        if not self._select():
+            return None
+        
+        handle = _ProfiledRequest()
+        handle.thread_id = threading.get_ident()
+        _profiling.set(True)
+        handle.torch_profile = None
+        handle.profile = None
+        
+        if 'torch' in sys.modules:
+            handle.torch_profile = sys.modules['torch'].autograd.profiler.profile()
+            handle.torch_profile.__enter__()
+        if self.mode == 'cprofile':
+            handle.profile = cProfile.Profile()
+            handle.profile.enable()
+        else:
+            self._sampling_thread_id = handle.thread_id
+        
+        handle.started = time.perf_counter()
+        return handle
+    
+    def end_request(self, handle):
+        """Stop profiling a request started with ``begin_request`` and fold in its results"""
+        elapsed = time.perf_counter() - handle.started
+        if handle.profile is not None:
+            handle.profile.disable()
+        self._sampling_thread_id = None
+        if handle.torch_profile is not None:
+            handle.torch_profile.__exit__(None, None, None)
+        _profiling.set(False)
+        
+        try:
+            with self._lock:
+                if handle.profile is not None:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(handle.profile)
+                    else:
+                        self._stats.add(handle.profile)
+                if handle.torch_profile is not None:
+                    for event in handle.torch_profile.key_averages():
+                        calls, total_us = self._torch_ops.get(event.key, (0, 0.0))
+                        self._torch_ops[event.key] = (calls + event.count, total_us + event.cpu_time_total)
+                
+                self.profiled += 1
+                self.profiled_seconds += elapsed
+                if self.sample_rate is None:
+                    self.remaining -= 1
+                if self.profiled >= self.max_requests:
+                    self.armed = False
+                    self._sampler_stop.set()
+                    logger.info(f"🔬 Profiling finished: {self.profiled} requests")
+        finally:
+            self._busy.release()
+    
+    def _sample_stacks(self):
+        stop = self._sampler_stop
+        while not stop.wait(self.interval):
+            thread_id = self._sampling_thread_id
+            if thread_id is None:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                with self._lock:
+                    self._stacks[';'.join(reversed(stack))] += 1
+    
+    def status(self):
+        with self._lock:
+            if self.sample_rate is not None:
+                selection = f"{self.sample_rate:.2%} of requests, up to {self.max_requests}"
+            else:
+                selection = f"next {self.remaining} requests"
+            return {
+                'armed': self.armed,
+                'mode': self.mode,
+                'selection': selection,
+                'profiled_requests': self.profiled,
+                'skipped_concurrent': self.skipped,
+                'profiled_seconds': self.profiled_seconds,
+                'stack_samples': sum(self._stacks.values()),
+                'torch_ops': len(self._torch_ops),
+                'started_at': self.started_at
+            }
+    
+    def pstats_bytes(self):
+        """Aggregated cProfile statistics in the format ``pstats.Stats(path)`` reads"""
+        with self._lock:
+            return marshal.dumps(self._stats.stats) if self._stats is not None else None
+    
+    def pstats_text(self, limit=40):
+        """The top functions by cumulative time, as text"""
+        with self._lock:
+            if self._stats is None:
+                return None
+            output = io.StringIO()
+            self._stats.stream = output
+            self._stats.sort_stats('cumulative').print_stats(limit)
+            return output.getvalue()
+    
+    def collapsed_stacks(self):
+        """Sampled stacks as ``frame;frame;frame count`` lines for flamegraph.pl or speedscope"""
+        with self._lock:
+            if not self._stacks:
+                return None
+            return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+    
+    def torch_ops_text(self):
+        """Aggregated torch operator and span timings, slowest first"""
+        with self._lock:
+            if not self._torch_ops:
+                return None
+            rows = sorted(self._torch_ops.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [f"{'name':<48} {'calls':>8} {'total ms':>10} {'mean us':>9}"]
+        for name, (calls, total_us) in rows:
+            lines.append(f"{name:<48} {calls:>8} {total_us / 1000:>10.3f} {total_us / max(calls, 1):>9.1f}")
+        return '\n'.join(lines) + '\n'
+
+# Global profiler instance
+request_profiler = RequestProfiler()
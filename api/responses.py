@@ -0,0 +1,210 @@
+"""Response building for the Healthcare DApp API.
+
+Everything that doesn't depend on the individual patient is built once: the
+per-risk-level fragments of /patient-analysis, and the model metadata, which
+is rebuilt only when a different model version starts serving. Responses are
+encoded with orjson when it is installed.
+"""
+import json
+from datetime import datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+from model_loader import get_model_info, get_model_version_id
+
+try:
+    import orjson
+except ImportError:  # stock json encoder
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+RISK_CATEGORIES = {
+    'LOW': 'Minimal health risk - maintain current lifestyle',
+    'MEDIUM': 'Moderate risk - lifestyle changes recommended',
+    'HIGH': 'High risk - immediate medical attention advised'
+}
+
+PRIORITY_ACTIONS = {
+    'LOW': ['Continue healthy habits', 'Annual checkups', 'Regular exercise'],
+    'MEDIUM': ['Lifestyle modifications', 'Quarterly checkups', 'Diet changes'],
+    'HIGH': ['Immediate medical consultation', 'Daily monitoring', 'Medication review']
+}
+
+MONITORING_FREQUENCIES = {
+    'LOW': 'Annual monitoring',
+    'MEDIUM': 'Quarterly monitoring',
+    'HIGH': 'Weekly or daily monitoring'
+}
+
+def get_risk_category(risk_level):
+    """Get detailed risk category"""
+    return RISK_CATEGORIES.get(risk_level, 'Unknown risk level')
+
+def get_priority_actions(risk_level):
+    """Get priority actions based on risk level"""
+    return PRIORITY_ACTIONS.get(risk_level, [])
+
+def get_monitoring_frequency(risk_level):
+    """Get monitoring frequency recommendation"""
+    return MONITORING_FREQUENCIES.get(risk_level, 'Consult healthcare provider')
+
+def _build_risk_level_fragment(risk_level):
+    return {
+        'category': get_risk_category(risk_level),
+        'priority_actions': get_priority_actions(risk_level),
+        'monitoring_frequency': get_monitoring_frequency(risk_level)
+    }
+
+# Shared between responses and never mutated; only ever serialized
+RISK_LEVEL_FRAGMENTS = {level: _build_risk_level_fragment(level) for level in RISK_CATEGORIES}
+UNKNOWN_RISK_LEVEL_FRAGMENT = _build_risk_level_fragment(None)
+
+def risk_level_fragment(risk_level):
+    """Static category, priority actions and monitoring frequency for a risk level"""
+    return RISK_LEVEL_FRAGMENTS.get(risk_level, UNKNOWN_RISK_LEVEL_FRAGMENT)
+
+# (model version id, fragment) for the model currently serving
+_model_fragment = (object(), None)
+
+def model_metadata_fragment():
+    """Model metadata used by responses, rebuilt only when the model version changes"""
+    global _model_fragment
+    version_id = get_model_version_id()
+    cached_version_id, fragment = _model_fragment
+    if cached_version_id != version_id:
+        fragment = {
+            'accuracy': get_model_info().get('efficiency_percentage', 'Unknown')
+        }
+        # Single assignment so concurrent readers see a consistent pair
+        _model_fragment = (version_id, fragment)
+    return fragment
+
+def get_bmi_category(bmi):
+    """Categorize BMI"""
+    if bmi < 18.5:
+        return "Underweight"
+    elif bmi < 25:
+        return "Normal"
+    elif bmi < 30:
+        return "Overweight"
+    else:
+        return "Obese"
+
+def get_glucose_status(glucose):
+    """Categorize blood glucose"""
+    if glucose < 100:
+        return "Normal"
+    elif glucose < 126:
+        return "Prediabetic"
+    else:
+        return "Diabetic"
+
+def get_bp_status(sbp):
+    """Categorize blood pressure"""
+    if sbp < 120:
+        return "Normal"
+    elif sbp < 130:
+        return "Elevated"
+    elif sbp < 140:
+        return "Stage 1 Hypertension"
+    else:
+        return "Stage 2 Hypertension"
+
+def format_prediction_response(patient_data, ml_data, prediction_result):
+    """Build the /predict-risk response body for one patient"""
+    return {
+        'risk_level': prediction_result['risk_level'],
+        'risk_score': prediction_result['risk_score'],
+        'confidence': prediction_result['confidence'],
+        'recommendations': prediction_result['recommendations'],
+        'risk_factors': prediction_result['risk_factors'],
+        'model_version': prediction_result['model_version'],
+        'model_version_id': prediction_result['model_version_id'],
+        'features_used': prediction_result['features_used'],
+        'timestamp': datetime.now().isoformat(),
+        'patient_info': {
+            'name': patient_data.get('name', 'Unknown'),
+            'age': ml_data['age'],
+            'gender': ml_data['gender']
+        }
+    }
+
+def format_patient_analysis(patient_data, enhanced_data, prediction_result):
+    """Build the /patient-analysis response body for one patient"""
+    risk_level = prediction_result['risk_level']
+    level_fragment = risk_level_fragment(risk_level)
+    
+    return {
+        'patient_summary': {
+            'name': patient_data.get('name', 'Unknown'),
+            'age': enhanced_data['age'],
+            'gender': enhanced_data['gender'],
+            'bmi_category': get_bmi_category(enhanced_data['bmi']),
+            'glucose_status': get_glucose_status(enhanced_data['blood_glucose']),
+            'bp_status': get_bp_status(enhanced_data['sbp'])
+        },
+        'risk_assessment': {
+            'level': risk_level,
+            'score': round(prediction_result['risk_score'] * 100, 1),
+            'confidence': round(prediction_result['confidence'] * 100, 1),
+            'category': level_fragment['category']
+        },
+        'health_insights': {
+            'risk_factors': prediction_result['risk_factors'],
+            'recommendations': prediction_result['recommendations'],
+            'priority_actions': level_fragment['priority_actions'],
+            'monitoring_frequency': level_fragment['monitoring_frequency']
+        },
+        'model_info': {
+            'version': prediction_result['model_version'],
+            'version_id': prediction_result['model_version_id'],
+            'features_analyzed': len(prediction_result['features_used']),
+            'accuracy': model_metadata_fragment()['accuracy']
+        },
+        'timestamp': datetime.now().isoformat()
+    }
+
+def prediction_error_body(error):
+    """Error body returned when a prediction request cannot be processed"""
+    return {
+        'error': 'Prediction failed',
+        'message': str(error),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def encode_json(obj):
+    """Encode a response body to bytes the way the Flask app does (sorted keys, compact)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, default=DefaultJSONProvider.default, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson.
+    
+    Keeps the stock provider's key sorting and falls back to its encoder hook
+    for types orjson doesn't know (dates, dataclasses, UUIDs, ...). Non-ASCII
+    text such as the emoji in recommendations is written as UTF-8 instead of
+    ``\\u`` escapes.
+    """
+    def _options(self, kwargs):
+        options = ORJSON_OPTIONS
+        if kwargs.get('sort_keys', self.sort_keys):
+            options |= orjson.OPT_SORT_KEYS
+        return options
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(kwargs)).decode('utf-8')
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._options({})),
+            mimetype=self.mimetype
+        )
+
+def install_json_provider(app):
+    """Encode the app's responses with orjson when it is installed"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    return app.json
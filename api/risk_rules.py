@@ -0,0 +1,256 @@
+"""Table-driven clinical rule layer.
+
+Risk boosting, risk factors and recommendations are described by a threshold
+table (``risk_rules.json`` by default) and evaluated with ``np.digitize`` and
+boolean masks over whole batches of feature dicts. Every comparison is a
+strict ``>`` (``above``/``thresholds``) or ``==`` (``equals``), and boosts
+are added in table order, so a single record gets exactly the result the old
+if/elif ladders produced. Single records take a scalar path over the same
+compiled table (``bisect`` instead of ``np.digitize``) because NumPy's
+per-call overhead dominates at batch size 1.
+
+Conditions (``when``) are one of::
+
+    {"feature": "bmi", "default": 25, "above": 30}
+    {"feature": "hypertension", "default": 0, "equals": 1}
+    {"all": [<condition>, ...]}
+    {"any": [<condition>, ...]}
+"""
+import json
+import os
+from bisect import bisect_left
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'risk_rules.json')
+
+def load_risk_rules(path=DEFAULT_RULES_PATH):
+    """Load and compile a rule table from a JSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return RiskRuleEngine(json.load(f))
+
+class FeatureColumns:
+    """Column view over a list of feature dicts, built lazily per (feature, default)"""
+    def __init__(self, features_list):
+        self.features_list = features_list
+        self.size = len(features_list)
+        self._columns = {}
+    
+    def get(self, feature, default):
+        key = (feature, default)
+        column = self._columns.get(key)
+        if column is None:
+            column = np.fromiter((features.get(feature, default) for features in self.features_list),
+                                 dtype=np.float64, count=self.size)
+            self._columns[key] = column
+        return column
+
+class RiskRuleEngine:
+    """Compiled rule table evaluated over batches of raw feature dicts"""
+    def __init__(self, table):
+        self.table = table
+        
+        levels = table['risk_levels']
+        self.model_levels = [(rule['min_score'], rule['level']) for rule in levels['model']]
+        self.boosted_levels = [(rule['min_score'], rule['level']) for rule in levels['boosted']]
+        self.default_level = levels['default_level']
+        
+        self.boost_rules = [self._compile_rule(rule, 'boosts', 'boost') for rule in table['boosting']['rules']]
+        self.boost_cap = table['boosting']['cap']
+        
+        self.factor_rules = [self._compile_rule(rule, 'labels', 'label') for rule in table['risk_factors']]
+        
+        recommendations = table['recommendations']
+        self.level_recommendations = recommendations['by_level']
+        self.default_recommendation_level = recommendations['default_level']
+        self.condition_recommendations = [(rule['when'], rule['text']) for rule in recommendations['conditions']]
+        self.recommendation_limit = recommendations['limit']
+    
+    @staticmethod
+    def _compile_rule(rule, tier_key, value_key):
+        """Normalize a tier, category or condition rule into a tagged tuple"""
+        if 'thresholds' in rule:
+            thresholds = np.asarray(rule['thresholds'], dtype=np.float64)
+            values = rule[tier_key]
+            if len(values) != len(thresholds):
+                raise ValueError(f"Rule for '{rule['feature']}' needs one {tier_key[:-1]} per threshold")
+            if np.any(np.diff(thresholds) <= 0):
+                raise ValueError(f"Thresholds for '{rule['feature']}' must be strictly increasing")
+            # Index 0 means "no threshold exceeded"
+            return ('tier', rule['feature'], rule['default'], thresholds, [None] + list(values), thresholds.tolist())
+        if 'categories' in rule:
+            categories = [(category['equals'], category[value_key]) for category in rule['categories']]
+            return ('categories', rule['feature'], rule['default'], categories)
+        return ('when', rule['when'], rule[value_key])
+    
+    def _mask(self, condition, columns):
+        """Boolean mask of rows satisfying a condition"""
+        if 'all' in condition:
+            mask = np.ones(columns.size, dtype=bool)
+            for part in condition['all']:
+                mask &= self._mask(part, columns)
+            return mask
+        if 'any' in condition:
+            mask = np.zeros(columns.size, dtype=bool)
+            for part in condition['any']:
+                mask |= self._mask(part, columns)
+            return mask
+        
+        values = columns.get(condition['feature'], condition['default'])
+        if 'above' in condition:
+            return values > condition['above']
+        if 'equals' in condition:
+            return values == condition['equals']
+        raise ValueError(f"Unsupported condition: {condition}")
+    
+    def _rule_hits(self, rule, columns):
+        """Per-row value produced by a rule (None where it does not fire)"""
+        kind = rule[0]
+        if kind == 'tier':
+            _, feature, default, thresholds, values, _ = rule
+            # right=True counts thresholds strictly below the value, i.e. value > threshold
+            tiers = np.digitize(columns.get(feature, default), thresholds, right=True)
+            return tiers, values
+        if kind == 'categories':
+            _, feature, default, categories = rule
+            column = columns.get(feature, default)
+            tiers = np.zeros(columns.size, dtype=np.intp)
+            # Earlier categories win, matching an if/elif chain
+            for index in range(len(categories), 0, -1):
+                tiers[column == categories[index - 1][0]] = index
+            return tiers, [None] + [value for _, value in categories]
+        _, condition, value = rule
+        return self._mask(condition, columns).astype(np.intp), [None, value]
+    
+    def _test(self, condition, features):
+        """Scalar counterpart of ``_mask`` for one feature dict"""
+        if 'all' in condition:
+            return all(self._test(part, features) for part in condition['all'])
+        if 'any' in condition:
+            return any(self._test(part, features) for part in condition['any'])
+        
+        value = features.get(condition['feature'], condition['default'])
+        if 'above' in condition:
+            return value > condition['above']
+        if 'equals' in condition:
+            return value == condition['equals']
+        raise ValueError(f"Unsupported condition: {condition}")
+    
+    def _rule_value(self, rule, features):
+        """Scalar counterpart of ``_rule_hits``: the value a rule produces, or None"""
+        kind = rule[0]
+        if kind == 'tier':
+            _, feature, default, _, values, threshold_list = rule
+            # bisect_left counts thresholds strictly below the value, like digitize(right=True)
+            return values[bisect_left(threshold_list, features.get(feature, default))]
+        if kind == 'categories':
+            _, feature, default, categories = rule
+            value = features.get(feature, default)
+            for expected, result in categories:
+                if value == expected:
+                    return result
+            return None
+        _, condition, value = rule
+        return value if self._test(condition, features) else None
+    
+    def apply_boosting_single(self, base_score, features):
+        """Boost one model score"""
+        boosted = base_score
+        for rule in self.boost_rules:
+            boost = self._rule_value(rule, features)
+            if boost is not None:
+                boosted += boost
+        return min(boosted, self.boost_cap)
+    
+    def risk_level_single(self, model_score, boosted_score):
+        """Risk level for one record from its model and boosted scores"""
+        level = self.default_level
+        for min_score, candidate in self.model_levels:
+            if model_score >= min_score:
+                level = candidate
+                break
+        for min_score, candidate in self.boosted_levels:
+            if boosted_score >= min_score:
+                return candidate
+        return level
+    
+    def risk_factors_single(self, features):
+        """Risk factor labels for one record"""
+        factors = []
+        for rule in self.factor_rules:
+            label = self._rule_value(rule, features)
+            if label is not None:
+                factors.append(label)
+        return factors
+    
+    def recommendations_single(self, risk_level, features):
+        """Recommendations for one record"""
+        default = self.level_recommendations[self.default_recommendation_level]
+        recommendations = list(self.level_recommendations.get(risk_level, default))
+        for condition, text in self.condition_recommendations:
+            if self._test(condition, features):
+                recommendations.append(text)
+        return recommendations[:self.recommendation_limit]
+    
+    def apply_boosting(self, base_scores, columns):
+        """Boost model scores for critical indicators, capped at the table's cap"""
+        boosted = np.asarray(base_scores, dtype=np.float64).copy()
+        for rule in self.boost_rules:
+            tiers, values = self._rule_hits(rule, columns)
+            boosts = np.asarray([0.0] + values[1:], dtype=np.float64)
+            # Adding 0.0 to rows that don't fire leaves them bit-identical
+            boosted = boosted + boosts[tiers]
+        return np.minimum(boosted, self.boost_cap)
+    
+    def model_risk_levels(self, scores):
+        """Risk level from the raw model score"""
+        levels = np.full(len(scores), self.default_level, dtype=object)
+        for min_score, level in reversed(self.model_levels):
+            levels[scores >= min_score] = level
+        return levels
+    
+    def boosted_risk_levels(self, boosted_scores, levels):
+        """Re-evaluate risk levels after boosting; rows below every threshold keep their level"""
+        levels = levels.copy()
+        for min_score, level in reversed(self.boosted_levels):
+            levels[boosted_scores >= min_score] = level
+        return levels
+    
+    def risk_factors(self, columns):
+        """Risk factor labels per row, in table order"""
+        factors = [[] for _ in range(columns.size)]
+        for rule in self.factor_rules:
+            tiers, labels = self._rule_hits(rule, columns)
+            for row in np.flatnonzero(tiers):
+                factors[row].append(labels[tiers[row]])
+        return factors
+    
+    def recommendations(self, risk_levels, columns):
+        """Recommendations per row: level defaults, then condition-specific ones, truncated"""
+        default = self.level_recommendations[self.default_recommendation_level]
+        recommendations = [list(self.level_recommendations.get(level, default)) for level in risk_levels]
+        for condition, text in self.condition_recommendations:
+            for row in np.flatnonzero(self._mask(condition, columns)):
+                recommendations[row].append(text)
+        return [row[:self.recommendation_limit] for row in recommendations]
+    
+    def evaluate(self, model_scores, features_list):
+        """Run the full rule layer for a batch.
+        
+        Returns (boosted_scores, risk_levels, recommendations, risk_factors).
+        """
+        if len(features_list) == 1:
+            features = features_list[0]
+            model_score = float(model_scores[0])
+            boosted_score = self.apply_boosting_single(model_score, features)
+            risk_level = self.risk_level_single(model_score, boosted_score)
+            return ([boosted_score], [risk_level],
+                    [self.recommendations_single(risk_level, features)], [self.risk_factors_single(features)])
+        
+        columns = FeatureColumns(features_list)
+        model_scores = np.asarray(model_scores, dtype=np.float64)
+        
+        levels = self.model_risk_levels(model_scores)
+        boosted_scores = self.apply_boosting(model_scores, columns)
+        levels = self.boosted_risk_levels(boosted_scores, levels)
+        
+        return boosted_scores, levels, self.recommendations(levels, columns), self.risk_factors(columns)
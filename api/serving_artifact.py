@@ -0,0 +1,121 @@
+"""Compact serving artifact for the enhanced model.
+
+A single uncompressed ``.npz`` file holding everything needed to serve the
+model: layer weights and BatchNorm statistics, scaler mean/scale, encoder
+vocabularies, the model info and a small verification set. It is read with
+``allow_pickle=False`` and needs only NumPy, so workers can start without
+importing torch or sklearn.
+
+Export from existing artifacts with::
+
+    python api/serving_artifact.py
+"""
+import json
+import os
+import sys
+import logging
+import numpy as np
+
+from feature_transform import encoder_classes
+
+logger = logging.getLogger(__name__)
+
+SERVING_ARTIFACT_PATH = 'models/enhanced_model_serving.npz'
+
+# Number of random rows whose torch outputs are stored for load-time checks
+VERIFY_SAMPLES = 64
+
+def save_serving_artifact(path, state_dict, scaler_mean, scaler_scale, encoder_classes, model_info,
+                          verify_inputs=None, verify_outputs=None):
+    """Write the serving artifact from plain NumPy arrays"""
+    arrays = {
+        'model_info': np.array(json.dumps(model_info)),
+        'hidden_sizes': np.asarray(model_info['hyperparameters']['hidden_layers'], dtype=np.int64),
+        'scaler/mean': np.asarray(scaler_mean, dtype=np.float64),
+        'scaler/scale': np.asarray(scaler_scale, dtype=np.float64),
+    }
+    for name, values in state_dict.items():
+        arrays[f'weights/{name}'] = np.asarray(values)
+    for name, classes in encoder_classes.items():
+        arrays[f'encoders/{name}'] = np.asarray([str(c) for c in classes])
+    if verify_inputs is not None:
+        arrays['verify/inputs'] = np.asarray(verify_inputs, dtype=np.float64)
+        arrays['verify/outputs'] = np.asarray(verify_outputs, dtype=np.float64)
+    
+    # Write to a temp file first so readers never see a half-written artifact
+    tmp_path = f'{path}.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+def load_serving_artifact(path):
+    """Read the serving artifact into plain Python/NumPy objects"""
+    with np.load(path, allow_pickle=False) as data:
+        artifact = {
+            'model_info': json.loads(str(data['model_info'])),
+            'hidden_sizes': [int(size) for size in data['hidden_sizes']],
+            'scaler_mean': data['scaler/mean'],
+            'scaler_scale': data['scaler/scale'],
+            'state_dict': {},
+            'encoder_classes': {},
+            'verify_inputs': None,
+            'verify_outputs': None,
+        }
+        for key in data.files:
+            if key.startswith('weights/'):
+                artifact['state_dict'][key[len('weights/'):]] = data[key]
+            elif key.startswith('encoders/'):
+                artifact['encoder_classes'][key[len('encoders/'):]] = data[key].tolist()
+        if 'verify/inputs' in data.files:
+            artifact['verify_inputs'] = data['verify/inputs']
+            artifact['verify_outputs'] = data['verify/outputs']
+    return artifact
+
+def export_serving_artifact(model, scaler, encoders, model_info, path=SERVING_ARTIFACT_PATH):
+    """Export a trained torch model and its preprocessors as a serving artifact"""
+    import torch
+    
+    was_training = model.training
+    model.eval()
+    try:
+        state_dict = {name: tensor.detach().cpu().numpy() for name, tensor in model.state_dict().items()}
+        
+        # Reference outputs so torch-free loaders can check their forward pass
+        rng = np.random.RandomState(0)
+        verify_inputs = scaler.mean_ + scaler.scale_ * rng.randn(VERIFY_SAMPLES, len(scaler.mean_))
+        with torch.no_grad():
+            verify_outputs = model(torch.FloatTensor(scaler.transform(verify_inputs))).numpy().reshape(-1)
+    finally:
+        model.train(was_training)
+    
+    return save_serving_artifact(path, state_dict, scaler.mean_, scaler.scale_, encoder_classes(encoders), model_info,
+                                 verify_inputs=verify_inputs, verify_outputs=verify_outputs)
+
+def main():
+    """Export the serving artifact from the existing models/ files"""
+    import pickle
+    import torch
+    
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from network import AdvancedHealthcareNet
+    
+    with open('models/enhanced_model_info.json', 'r') as f:
+        model_info = json.load(f)
+    with open('models/scaler.pkl', 'rb') as f:
+        scaler = pickle.load(f)
+    with open('models/encoders.pkl', 'rb') as f:
+        encoders = pickle.load(f)
+    
+    model = AdvancedHealthcareNet(
+        input_size=model_info['input_features'],
+        hidden_sizes=model_info['hyperparameters']['hidden_layers'],
+        dropout_rate=model_info['hyperparameters']['dropout_rate']
+    )
+    model.load_state_dict(torch.load('models/enhanced_model.pth', map_location='cpu'))
+    
+    path = export_serving_artifact(model, scaler, encoders, model_info)
+    print(f"✅ Serving artifact written to {path} ({os.path.getsize(path) / 1024:.1f} KiB)")
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
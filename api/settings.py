@@ -0,0 +1,90 @@
+"""Runtime settings for the Healthcare DApp API.
+
+Every knob can be overridden with a ``HEALTHGUARD_*`` environment variable so
+deployments can tune serving without code changes.
+"""
+import os
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+# Inference backend: 'torch' or 'numpy' (scaler and BatchNorm folded into NumPy matmuls)
+MODEL_BACKEND = os.environ.get('HEALTHGUARD_MODEL_BACKEND', 'torch')
+
+# Compressed model variant to serve: 'base' or a key of `variants` in enhanced_model_info.json
+MODEL_VARIANT = os.environ.get('HEALTHGUARD_MODEL_VARIANT', 'base')
+
+# Load models/enhanced_model_serving.npz (when present) instead of the .pth/.pkl files
+FAST_START = _env_bool('HEALTHGUARD_FAST_START', False)
+
+# Clinical rule table (risk boosting, risk factors, recommendations); empty means api/risk_rules.json
+RISK_RULES_PATH = os.environ.get('HEALTHGUARD_RISK_RULES_PATH', '')
+
+# Prediction cache keyed on canonical feature vectors (0 entries disables it)
+PREDICTION_CACHE_SIZE = _env_int('HEALTHGUARD_PREDICTION_CACHE_SIZE', 10000)
+PREDICTION_CACHE_TTL_SECONDS = _env_float('HEALTHGUARD_PREDICTION_CACHE_TTL_SECONDS', 300.0)
+
+# Poll models/ and hot-reload on change every N seconds (0 disables; POST /admin/reload-model always works)
+MODEL_WATCH_INTERVAL_SECONDS = _env_float('HEALTHGUARD_MODEL_WATCH_INTERVAL_SECONDS', 0.0)
+
+# Token required in the X-Admin-Token header by /admin routes; when empty they only accept localhost
+ADMIN_TOKEN = os.environ.get('HEALTHGUARD_ADMIN_TOKEN', '')
+
+
+def admin_access_error(token, remote_addr):
+    """Why an /admin request is refused, or None when it may proceed (shared by the Flask and ASGI apps)"""
+    if ADMIN_TOKEN:
+        return None if token == ADMIN_TOKEN else 'Invalid admin token'
+    if remote_addr not in ('127.0.0.1', '::1'):
+        return 'Admin routes are only available from localhost'
+    return None
+
+
+# NDJSON streaming scoring: records per forward pass and the longest accepted line
+STREAM_CHUNK_SIZE = _env_int('HEALTHGUARD_STREAM_CHUNK_SIZE', 512)
+STREAM_MAX_LINE_BYTES = _env_int('HEALTHGUARD_STREAM_MAX_LINE_BYTES', 64 * 1024)
+
+# Request logging: 'sync' writes in the request thread, 'async' hands records to a background thread
+LOG_MODE = os.environ.get('HEALTHGUARD_LOG_MODE', 'sync')
+# 'text' (key=value fields after the message) or 'json' (one object per line)
+LOG_FORMAT = os.environ.get('HEALTHGUARD_LOG_FORMAT', 'text')
+# Fraction of per-request success lines kept; warnings and errors are always logged
+LOG_SAMPLE_RATE = _env_float('HEALTHGUARD_LOG_SAMPLE_RATE', 1.0)
+# Records buffered in async mode before INFO lines are dropped
+LOG_QUEUE_SIZE = _env_int('HEALTHGUARD_LOG_QUEUE_SIZE', 10000)
+
+# Per-stage latency histograms and counters exported on /metrics
+METRICS_ENABLED = _env_bool('HEALTHGUARD_METRICS', True)
+
+# Dynamic micro-batching of concurrent /predict-risk calls (opt-in: a lone request can wait up to the max wait)
+MICRO_BATCHING_ENABLED = _env_bool('HEALTHGUARD_MICRO_BATCHING', False)
+MICRO_BATCH_MAX_SIZE = _env_int('HEALTHGUARD_MICRO_BATCH_MAX_SIZE', 32)
+MICRO_BATCH_MAX_WAIT_MS = _env_float('HEALTHGUARD_MICRO_BATCH_MAX_WAIT_MS', 2.0)
+# Longest a request waits for its micro-batch result before falling back
+MICRO_BATCH_TIMEOUT_SECONDS = _env_float('HEALTHGUARD_MICRO_BATCH_TIMEOUT_SECONDS', 10.0)
+
+# Production server (api/gunicorn.conf.py): listen address, worker processes and threads per worker
+BIND = os.environ.get('HEALTHGUARD_BIND', '127.0.0.1:5000')
+WORKERS = _env_int('HEALTHGUARD_WORKERS', os.cpu_count() or 1)
+WORKER_THREADS = _env_int('HEALTHGUARD_WORKER_THREADS', 4)
+
+# ASGI server (api/asgi_app.py): threads running model inference off the event loop
+INFERENCE_THREADS = _env_int('HEALTHGUARD_INFERENCE_THREADS', 8)
+
+# torch intra-op threads per worker (0 splits the cores evenly across workers)
+TORCH_THREADS = _env_int('HEALTHGUARD_TORCH_THREADS', 0)
@@ -0,0 +1,110 @@
+"""Structured, optionally asynchronous logging for the request path.
+
+``log_event`` attaches fields to the record instead of formatting a string,
+so rendering happens in whichever thread writes the record out. With
+``HEALTHGUARD_LOG_MODE=async`` the root logger's handlers move behind a
+bounded queue drained by a background thread: request threads only enqueue.
+When the queue is full, INFO records are dropped (and counted on /metrics)
+while warnings and errors wait for room. Per-request success lines are
+sampled with ``HEALTHGUARD_LOG_SAMPLE_RATE``; warnings and errors are always
+kept.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime
+
+import settings
+from metrics import log_records_dropped_total
+
+# Background listener writing queued records (async mode); one per process
+_listener = None
+_configured_pid = None
+_target_handlers = None
+
+class StructuredFormatter(logging.Formatter):
+    """Render a record's ``fields`` as ``key=value`` pairs after the message, or as one JSON object"""
+    def __init__(self, style='text'):
+        super().__init__(logging.BASIC_FORMAT)
+        self.style = style
+
+    def formatMessage(self, record):
+        fields = getattr(record, 'fields', None)
+        if self.style == 'json':
+            payload = {
+                'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                'level': record.levelname,
+                'logger': record.name,
+                'event': record.message
+            }
+            if fields:
+                payload.update(fields)
+            return json.dumps(payload, default=str, ensure_ascii=False)
+
+        line = super().formatMessage(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue records unformatted; drop INFO and below when the queue is full"""
+    def prepare(self, record):
+        # Formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                log_records_dropped_total.inc()
+
+def configure_logging():
+    """Apply HEALTHGUARD_LOG_FORMAT and HEALTHGUARD_LOG_MODE to the root logger.
+
+    Safe to call more than once; a forked worker calling it gets its own
+    listener thread, since threads don't survive fork.
+    """
+    global _listener, _configured_pid, _target_handlers
+    if _configured_pid == os.getpid():
+        return
+
+    root = logging.getLogger()
+    if _target_handlers is None:
+        if not root.handlers:
+            logging.basicConfig(level=logging.INFO)
+        _target_handlers = list(root.handlers)
+
+    formatter = StructuredFormatter(settings.LOG_FORMAT)
+    for handler in _target_handlers:
+        handler.setFormatter(formatter)
+
+    if settings.LOG_MODE == 'async':
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        log_queue = queue.Queue(maxsize=max(1, settings.LOG_QUEUE_SIZE))
+        root.addHandler(DroppingQueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *_target_handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    _configured_pid = os.getpid()
+
+def log_event(logger, event, level=logging.INFO, sampled=False, **fields):
+    """Log ``event`` with structured ``fields``.
+
+    ``sampled`` marks per-request success lines: only a
+    HEALTHGUARD_LOG_SAMPLE_RATE fraction of them are kept. Warnings and
+    errors are never sampled.
+    """
+    if sampled and level < logging.WARNING and settings.LOG_SAMPLE_RATE < 1.0:
+        if random.random() >= settings.LOG_SAMPLE_RATE:
+            return
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
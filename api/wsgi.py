@@ -0,0 +1,28 @@
+"""WSGI entry point for production serving.
+
+Importing this module loads the model, so with ``preload_app`` the master
+process loads it once and forked workers share the weights copy-on-write.
+Run from the repository root (where models/ lives)::
+
+    gunicorn -c api/gunicorn.conf.py
+"""
+import logging
+
+import settings
+from app import app
+from model_loader import load_model, enable_micro_batching
+
+logger = logging.getLogger(__name__)
+
+if not load_model():
+    raise RuntimeError("Failed to load model. Please run training_pipeline.py first!")
+
+if settings.MICRO_BATCHING_ENABLED:
+    # The batching thread starts lazily, so each worker gets its own after fork
+    enable_micro_batching(
+        max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=settings.MICRO_BATCH_MAX_WAIT_MS,
+        timeout_s=settings.MICRO_BATCH_TIMEOUT_SECONDS
+    )
+
+application = app
@@ -0,0 +1,44 @@
+"""Shared setup for the API tests.
+
+The API modules live in api/ and read models/ relative to the repository
+root, so every test runs from there.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+# Results must come from the model, not from a cache warmed by an earlier request
+os.environ['HEALTHGUARD_PREDICTION_CACHE_SIZE'] = '0'
+os.environ['HEALTHGUARD_MICRO_BATCHING'] = '0'
+
+SMOKING_HISTORIES = ['never', 'former', 'current', 'not current', 'ever', 'No Info']
+DISEASES = ['', 'hypertension', 'heart disease', 'diabetes', 'hypertension, heart disease']
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+@pytest.fixture
+def make_patients():
+    """Factory of random /predict-risk bodies covering every rule threshold"""
+    def make(n, seed=0):
+        rng = np.random.default_rng(seed)
+        return [{
+            'name': f'Patient {i}',
+            'age': int(rng.integers(18, 95)),
+            'gender': str(rng.choice(['Male', 'Female'])),
+            'smoking_history': str(rng.choice(SMOKING_HISTORIES)),
+            'bmi': round(float(rng.uniform(15, 45)), 1),
+            'hba1c': round(float(rng.uniform(4, 12)), 1),
+            'blood_glucose': round(float(rng.uniform(60, 320)), 1),
+            'sbp': f'{int(rng.integers(90, 200))}/{int(rng.integers(55, 110))}',
+            'disease': str(rng.choice(DISEASES)),
+            'hypertension': int(rng.integers(0, 2)),
+            'heart_disease': int(rng.integers(0, 2))
+        } for i in range(n)]
+    return make
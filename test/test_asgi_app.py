@@ -0,0 +1,78 @@
+"""ASGI app: the batch and admin routes match the Flask app's"""
+import pytest
+from starlette.testclient import TestClient
+
+import settings
+from app import app as flask_app
+from asgi_app import app
+from request_profiler import request_profiler
+
+TOKEN = {'X-Admin-Token': 'secret'}
+
+@pytest.fixture(scope='module')
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_TOKEN', 'secret')
+
+def without_timestamps(body):
+    body = dict(body)
+    body.pop('timestamp', None)
+    if 'results' in body:
+        body['results'] = [dict(result, body=without_timestamps(result['body'])) for result in body['results']]
+    return body
+
+def test_batch_matches_the_flask_app(client, make_patients):
+    payload = {'patients': make_patients(5, seed=3) + [{'gender': 'Female'}]}
+    response = client.post('/predict-risk/batch', json=payload)
+    assert response.status_code == 200
+    assert response.headers['X-Model-Version']
+
+    expected = flask_app.test_client().post('/predict-risk/batch', json=payload).get_json()
+    assert without_timestamps(response.json()) == without_timestamps(expected)
+    assert [result['status'] for result in response.json()['results']] == [200] * 5 + [400]
+
+def test_batch_rejects_empty_and_oversized_requests(client, monkeypatch):
+    assert client.post('/predict-risk/batch', json={'patients': []}).status_code == 400
+    monkeypatch.setattr('asgi_app.MAX_BATCH_RECORDS', 2)
+    response = client.post('/predict-risk/batch', json=[{'age': 40, 'gender': 'Male'}] * 3)
+    assert response.status_code == 413
+    assert response.json() == {'error': 'Too many patient records (max 2)'}
+
+def test_admin_routes_need_the_token(client, admin_token):
+    for method, path in (('POST', '/admin/reload-model'), ('GET', '/admin/profile'), ('GET', '/admin/profile/pstats')):
+        response = client.request(method, path, headers={'X-Admin-Token': 'wrong'})
+        assert response.status_code == 403
+        assert response.json() == {'error': 'Invalid admin token'}
+
+def test_admin_routes_are_localhost_only_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(settings, 'ADMIN_TOKEN', '')
+    assert client.get('/admin/profile').json() == {'error': 'Admin routes are only available from localhost'}
+
+def test_reload_of_an_unchanged_tree_is_a_no_op(client, admin_token):
+    response = client.post('/admin/reload-model', headers=TOKEN)
+    assert response.status_code == 200
+    assert response.json()['reloaded'] is False
+    assert response.json()['model_version_id'] == response.headers['X-Model-Version']
+
+def test_profiling_records_inference_calls(client, admin_token):
+    try:
+        assert client.post('/admin/profile', headers=TOKEN, json={'requests': 2}).json()['armed'] is True
+        for _ in range(3):
+            client.get('/test-prediction')
+
+        status = client.get('/admin/profile', headers=TOKEN).json()
+        assert status['armed'] is False
+        assert status['profiled_requests'] == 2
+        assert 'predict_risk' in client.get('/admin/profile/pstats.txt', headers=TOKEN).text
+        assert client.get('/admin/profile/pstats', headers=TOKEN).headers['Content-Disposition'].endswith('.pstats')
+        assert client.get('/admin/profile/flame', headers=TOKEN).status_code == 404
+    finally:
+        request_profiler.stop()
+
+def test_invalid_profiling_request_is_a_400(client, admin_token):
+    response = client.post('/admin/profile', headers=TOKEN, json={'mode': 'trace', 'requests': 1})
+    assert response.status_code == 400
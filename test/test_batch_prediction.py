@@ -0,0 +1,75 @@
+"""/predict-risk/batch and ModelLoader.predict_risk_batch against the single-record path"""
+import pytest
+
+import model_loader
+from app import app
+from model_loader import ModelLoader
+
+INVALID_PATIENTS = [
+    {},
+    {'gender': 'Female', 'bmi': 31.0},
+    {'age': 'forty', 'gender': 'Male'},
+    {'age': 52, 'gender': 'Male', 'bmi': 'heavy', 'sbp': '300/abc'},
+    {'age': 200, 'gender': 'Female', 'blood_glucose': '120 apples and 3 pears'},
+]
+
+# One row of a batched matmul can differ from the same row scored alone in the last float32 bits
+SCORE_FIELDS = ('risk_score', 'riskScorePercentage', 'confidence')
+
+def assert_same_prediction(batch_result, single_result):
+    """Equal apart from timestamps and float32 rounding of the scores"""
+    batch_result = dict(batch_result)
+    single_result = dict(single_result)
+    for body in (batch_result, single_result):
+        body.pop('timestamp', None)
+    for field in SCORE_FIELDS:
+        if field in single_result:
+            assert batch_result.pop(field) == pytest.approx(single_result.pop(field), rel=1e-6, abs=1e-6)
+    assert batch_result == single_result
+
+@pytest.fixture(scope='module')
+def client():
+    model_loader.load_model()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+def test_batch_endpoint_matches_single_endpoint(client, make_patients):
+    patients = make_patients(40, seed=1)
+    # Invalid records spread through the batch, so alignment is checked too
+    for offset, invalid in enumerate(INVALID_PATIENTS):
+        patients.insert(offset * 9, invalid)
+
+    response = client.post('/predict-risk/batch', json={'patients': patients})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert len(results) == len(patients)
+
+    statuses = []
+    for patient, result in zip(patients, results):
+        single = client.post('/predict-risk', json=patient)
+        statuses.append(single.status_code)
+        assert result['status'] == single.status_code
+        assert_same_prediction(result['body'], single.get_json())
+    assert statuses.count(400) == len(INVALID_PATIENTS)
+
+def test_batch_endpoint_rejects_empty_payload(client):
+    assert client.post('/predict-risk/batch', json={'patients': []}).status_code == 400
+    assert client.post('/predict-risk/batch', json={'records': 'none'}).status_code == 400
+
+@pytest.mark.parametrize('backend', ['torch', 'numpy'])
+def test_predict_risk_batch_matches_predict_risk(backend, make_patients):
+    loader = ModelLoader(backend=backend)
+    loader.load_enhanced_model()
+    patients = make_patients(64, seed=2) + INVALID_PATIENTS[2:]
+
+    batch = loader.predict_risk_batch(patients)
+    assert len(batch) == len(patients)
+    for patient, result in zip(patients, batch):
+        try:
+            single = loader.predict_risk(patient)
+        except Exception as e:
+            assert isinstance(result, Exception)
+            assert type(result) is type(e) and str(result) == str(e)
+            continue
+        assert_same_prediction(result, single)
@@ -0,0 +1,102 @@
+"""Fold checkpoints: resuming after a crash, refusing another run's checkpoint, clearing stale files"""
+import os
+
+import numpy as np
+import pytest
+import torch
+from sklearn.datasets import make_classification
+
+from training_pipeline import clear_checkpoints, save_atomically, snapshot_weights, train_advanced_model, train_fold
+
+HYPERPARAMETERS = {'hidden_layers': [16, 8], 'batch_size': 64, 'max_epochs': 6, 'early_stopping_patience': 50}
+
+class Crash(Exception):
+    pass
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = make_classification(n_samples=400, n_features=11, random_state=0)
+    X = X.astype(np.float32)
+    return {'X_train_fold': X[:320], 'y_train_fold': y[:320], 'X_val_fold': X[320:], 'y_val_fold': y[320:]}
+
+def fold(data, checkpoint_dir, **kwargs):
+    torch.set_num_threads(1)
+    return train_fold(0, **data, checkpoint_dir=str(checkpoint_dir), hyperparameters=HYPERPARAMETERS, **kwargs)
+
+def crash_at(epoch_to_crash):
+    def callback(epoch, val_auc, best_val_auc):
+        if epoch == epoch_to_crash:
+            raise Crash()
+    return callback
+
+def assert_same_weights(a, b):
+    assert a.keys() == b.keys()
+    for name in a:
+        assert torch.equal(a[name], b[name]), name
+
+def test_resume_after_a_crash_gives_the_same_weights(data, tmp_path):
+    uninterrupted = fold(data, tmp_path / 'uninterrupted')
+
+    with pytest.raises(Crash):
+        fold(data, tmp_path / 'crashed', epoch_callback=crash_at(2))
+    seen = []
+    resumed = fold(data, tmp_path / 'crashed', resume=True, epoch_callback=lambda epoch, *_: seen.append(epoch))
+
+    # Picked up after the last checkpoint rather than starting over
+    assert seen == list(range(3, HYPERPARAMETERS['max_epochs']))
+    assert resumed['epochs'] == uninterrupted['epochs'] == HYPERPARAMETERS['max_epochs']
+    assert resumed['best_val_auc'] == uninterrupted['best_val_auc']
+    assert_same_weights(resumed['best_state'], uninterrupted['best_state'])
+    assert_same_weights(torch.load(tmp_path / 'crashed' / 'fold_1_best.pt'), uninterrupted['best_state'])
+
+def test_finished_fold_is_not_retrained(data, tmp_path):
+    finished = fold(data, tmp_path)
+    resumed = fold(data, tmp_path, resume=True, epoch_callback=crash_at(0))
+    assert resumed['best_val_auc'] == finished['best_val_auc']
+    assert_same_weights(resumed['best_state'], finished['best_state'])
+
+def test_checkpoint_of_another_run_is_refused(data, tmp_path):
+    with pytest.raises(Crash):
+        fold(data, tmp_path, epoch_callback=crash_at(1))
+
+    with pytest.raises(ValueError, match='different run'):
+        fold(data, tmp_path, resume=True, seed=7)
+    with pytest.raises(ValueError, match='different run'):
+        fold(dict(data, X_train_fold=data['X_train_fold'][:300], y_train_fold=data['y_train_fold'][:300]),
+             tmp_path, resume=True)
+
+def test_save_atomically_leaves_no_temp_file(tmp_path):
+    model = torch.nn.Linear(3, 1)
+    path = str(tmp_path / 'weights.pt')
+    save_atomically(snapshot_weights(model), path)
+
+    assert os.listdir(tmp_path) == ['weights.pt']
+    assert_same_weights(torch.load(path), model.state_dict())
+
+def test_snapshot_does_not_follow_training(tmp_path):
+    model = torch.nn.Linear(3, 1)
+    snapshot = snapshot_weights(model)
+    with torch.no_grad():
+        model.weight += 1
+    assert not torch.equal(snapshot['weight'], model.weight)
+
+def test_clear_checkpoints_only_removes_fold_files(tmp_path):
+    for name in ('fold_1.pt', 'fold_1_best.pt', 'fold_6.pt', 'fold_2.pt.tmp', 'notes.txt', 'model.pt'):
+        (tmp_path / name).write_bytes(b'x')
+
+    assert clear_checkpoints(str(tmp_path)) == 4
+    assert sorted(os.listdir(tmp_path)) == ['model.pt', 'notes.txt']
+    assert clear_checkpoints(str(tmp_path / 'missing')) == 0
+
+def test_run_without_resume_clears_old_checkpoints(data, tmp_path):
+    stale = tmp_path / 'fold_9.pt'
+    stale.write_bytes(b'stale')
+    (tmp_path / 'fold_1.pt').write_bytes(b'corrupt checkpoint of an old run')
+
+    X = np.concatenate([data['X_train_fold'], data['X_val_fold']])
+    y = np.concatenate([data['y_train_fold'], data['y_val_fold']])
+    train_advanced_model(X, y, [f'f{i}' for i in range(X.shape[1])], checkpoint_dir=str(tmp_path),
+                         hyperparameters=dict(HYPERPARAMETERS, max_epochs=1))
+
+    assert not stale.exists()
+    assert torch.load(tmp_path / 'fold_1.pt')['result'] is not None
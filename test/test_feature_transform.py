@@ -0,0 +1,98 @@
+"""Training and serving encode features identically through FeatureTransform"""
+import json
+import logging
+import pickle
+
+import numpy as np
+import pytest
+
+from feature_transform import SMOKING_CATEGORIES, FeatureTransform, encoder_classes
+from model_loader import ModelLoader
+from payloads import parse_patient
+from training_pipeline import advanced_preprocessing, create_enhanced_dataset
+
+# Vocabulary order of the LabelEncoder the committed model was trained with
+TRAINED_SMOKING_ORDER = ['current', 'former', 'never', 'not_current']
+
+@pytest.fixture(scope='module')
+def model_info():
+    with open('models/enhanced_model_info.json', 'r') as f:
+        return json.load(f)
+
+@pytest.fixture(scope='module')
+def trained_transform(model_info):
+    with open('models/encoders.pkl', 'rb') as f:
+        return FeatureTransform.from_model_info(model_info, encoder_classes(pickle.load(f)))
+
+@pytest.fixture(scope='module')
+def loader():
+    loader = ModelLoader()
+    loader.load_enhanced_model()
+    return loader
+
+def as_payload(row):
+    """The /predict-risk body describing one training row"""
+    disease = ', '.join(name for name, flag in (('hypertension', row.hypertension), ('heart disease', row.heart_disease)) if flag)
+    return {
+        'age': int(row.age),
+        'gender': 'Male' if row.gender == 1 else 'Female',
+        'smoking_history': row.smoking_history,
+        'bmi': float(row.bmi),
+        'hba1c': float(row.HbA1c_level),
+        'blood_glucose': float(row.blood_glucose_level),
+        'sbp': 120,
+        'disease': disease
+    }
+
+def test_training_and_serving_build_the_same_matrix(loader, trained_transform):
+    logging.disable(logging.INFO)
+    try:
+        df = create_enhanced_dataset().iloc[:300]
+        X_scaled, _, scaler, _, feature_cols = advanced_preprocessing(df, trained_transform)
+    finally:
+        logging.disable(logging.NOTSET)
+    assert feature_cols == loader.feature_names
+    training_matrix = scaler.inverse_transform(X_scaled)
+
+    served = []
+    for row in df.itertuples(index=False):
+        features_tensor, _ = loader.preprocess_patient_data(as_payload(row))
+        served.append(features_tensor.numpy()[0])
+    served = np.array(served, dtype=np.float64)
+
+    expected = loader.scaler.transform(training_matrix)
+    np.testing.assert_allclose(served, expected, rtol=1e-5, atol=1e-5)
+
+def test_smoking_categories_land_on_the_trained_encoder_index(loader, trained_transform):
+    assert list(trained_transform.smoking_categories) == TRAINED_SMOKING_ORDER
+    column = loader.feature_names.index('smoking_history')
+
+    for category in SMOKING_CATEGORIES:
+        features = trained_transform.transform({
+            'gender': [1], 'age': [50], 'hypertension': [0], 'heart_disease': [0], 'smoking_history': [category],
+            'bmi': [25.0], 'HbA1c_level': [5.5], 'blood_glucose_level': [100.0]
+        })
+        assert trained_transform.matrix(features)[0, column] == TRAINED_SMOKING_ORDER.index(category)
+
+    # Unknown values encode as 'never'
+    never = TRAINED_SMOKING_ORDER.index('never')
+    for value in ('No Info', 'NEVER', 'never'):
+        _, matrix = loader._extract_features([parse_patient({'age': 40, 'gender': 'Male', 'smoking_history': value})])
+        assert matrix[0, column] == never
+
+def test_to_dict_round_trips(trained_transform):
+    spec = trained_transform.to_dict()
+    restored = FeatureTransform.from_dict(json.loads(json.dumps(spec)))
+    assert restored.to_dict() == spec
+
+    from_info = FeatureTransform.from_model_info({'feature_transform': spec})
+    assert from_info.feature_names == trained_transform.feature_names
+    assert from_info.smoking_categories == trained_transform.smoking_categories
+
+def test_legacy_model_info_uses_the_encoder_vocabulary(model_info):
+    legacy = {key: value for key, value in model_info.items() if key != 'feature_transform'}
+    transform = FeatureTransform.from_model_info(legacy, {'smoking_history': TRAINED_SMOKING_ORDER})
+    assert list(transform.smoking_categories) == TRAINED_SMOKING_ORDER
+    assert transform.feature_names == model_info['feature_names']
+
+    assert FeatureTransform.from_model_info({}).smoking_categories == SMOKING_CATEGORIES
@@ -0,0 +1,159 @@
+"""Hot reload: atomic bundle swap, failed reloads, version fingerprints and the directory watcher"""
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+
+import pytest
+import torch
+
+from hot_reload import ModelDirectoryWatcher
+from model_loader import ModelLoader, _fingerprint_files
+from payloads import parse_patient
+
+# No rule boosts apply, so the score is the model's own
+PATIENT = {'age': 38, 'gender': 'Male', 'sbp': '118/76', 'sugar': '95', 'bmi': 24.0, 'hba1c': 5.2}
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """A private copy of models/, with the tests running next to it"""
+    shutil.copytree('models', tmp_path / 'models')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / 'models'
+
+@pytest.fixture
+def loader(models_dir):
+    loader = ModelLoader(cache_size=100)
+    loader.load_enhanced_model()
+    return loader
+
+def perturb_weights(models_dir):
+    path = models_dir / 'enhanced_model.pth'
+    state_dict = torch.load(path, map_location='cpu')
+    state_dict['network.16.bias'] += 0.5
+    torch.save(state_dict, path)
+
+def test_version_is_the_fingerprint_of_the_loaded_files(loader):
+    _, source_files = loader._resolve_sources()
+    assert 'models/encoders.pkl' in source_files
+    assert loader.model_version_id == _fingerprint_files(source_files)
+
+def test_reload_with_new_files_swaps_the_bundle_and_clears_the_cache(loader, models_dir):
+    old_bundle = loader.bundle
+    old_score = loader.predict_risk(PATIENT)['risk_score']
+    assert loader.prediction_cache.stats()['entries'] == 1
+
+    perturb_weights(models_dir)
+    result = loader.reload_model()
+
+    assert result['reloaded'] is True
+    assert result['previous_model_version_id'] == old_bundle.version
+    assert loader.model_version_id == result['model_version_id'] != old_bundle.version
+    assert loader.bundle is not old_bundle
+    assert loader.prediction_cache.stats()['entries'] == 0
+
+    prediction = loader.predict_risk(PATIENT)
+    assert prediction['model_version_id'] == loader.model_version_id
+    assert prediction['risk_score'] != old_score
+    # Requests still holding the replaced bundle keep scoring with the old weights
+    _, features = loader._extract_features([parse_patient(PATIENT)], old_bundle)
+    assert float(loader._score_features(features, old_bundle)[0]) == pytest.approx(old_score)
+
+def test_encoders_change_the_version(loader, models_dir):
+    version = loader.model_version_id
+    with open(models_dir / 'encoders.pkl', 'rb') as f:
+        encoders = pickle.load(f)
+    with open(models_dir / 'encoders.pkl', 'wb') as f:
+        pickle.dump(encoders, f, protocol=2)
+
+    assert loader.reload_model()['reloaded'] is True
+    assert loader.model_version_id != version
+
+def test_corrupt_model_file_keeps_the_current_bundle(loader, models_dir):
+    bundle = loader.bundle
+    version = loader.model_version_id
+    (models_dir / 'enhanced_model.pth').write_bytes(b'not a checkpoint')
+
+    with pytest.raises(Exception):
+        loader.reload_model()
+
+    assert loader.bundle is bundle
+    assert loader.model_version_id == version
+    assert loader.predict_risk(PATIENT)['model_version_id'] == version
+
+def test_failed_warm_up_keeps_the_current_bundle(loader, models_dir, monkeypatch):
+    bundle = loader.bundle
+    perturb_weights(models_dir)
+
+    def fail(new_bundle):
+        raise RuntimeError('warm-up failed')
+    monkeypatch.setattr(loader, '_warm_up', fail)
+
+    with pytest.raises(RuntimeError, match='warm-up failed'):
+        loader.reload_model()
+    assert loader.bundle is bundle
+
+def test_unchanged_tree_is_a_no_op_unless_forced(loader):
+    bundle = loader.bundle
+    loader.predict_risk(PATIENT)
+
+    assert loader.reload_model() == {'reloaded': False, 'model_version_id': bundle.version}
+    assert loader.bundle is bundle
+    assert loader.prediction_cache.stats()['entries'] == 1
+
+    result = loader.reload_model(force=True)
+    assert result['reloaded'] is True
+    assert loader.bundle is not bundle
+    assert loader.model_version_id == bundle.version
+
+def test_model_info_edit_reloads(loader, models_dir):
+    path = models_dir / 'enhanced_model_info.json'
+    info = json.loads(path.read_text())
+    info['training_date'] = '2026-01-01T00:00:00'
+    path.write_text(json.dumps(info))
+
+    assert loader.reload_model()['reloaded'] is True
+
+def test_watcher_debounces_several_writes_into_one_reload(tmp_path):
+    reloads = []
+    watcher = ModelDirectoryWatcher(lambda: reloads.append(time.monotonic()), directory=str(tmp_path),
+                                    interval_seconds=0.2)
+    watcher.start()
+    try:
+        time.sleep(0.1)
+        # A training run writing several files, each change sooner than one poll interval
+        for i in range(30):
+            with open(os.path.join(tmp_path, f'artifact_{i % 4}.bin'), 'ab') as f:
+                f.write(b'x' * (i + 1))
+            time.sleep(0.02)
+        writes_done = time.monotonic()
+        time.sleep(1.0)
+    finally:
+        watcher.stop()
+
+    assert len(reloads) == 1
+    assert reloads[0] >= writes_done
+
+def test_watcher_survives_a_failed_reload(tmp_path):
+    calls = []
+    done = threading.Event()
+
+    def reload_fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('bad files')
+        done.set()
+
+    watcher = ModelDirectoryWatcher(reload_fn, directory=str(tmp_path), interval_seconds=0.05)
+    watcher.start()
+    try:
+        time.sleep(0.1)
+        (tmp_path / 'a.bin').write_bytes(b'1')
+        time.sleep(0.4)
+        (tmp_path / 'a.bin').write_bytes(b'22')
+        assert done.wait(2)
+    finally:
+        watcher.stop()
+    assert len(calls) == 2
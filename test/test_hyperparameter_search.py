@@ -0,0 +1,30 @@
+"""Hyperparameter search: latency budgets measured once per architecture on the serving backend"""
+import pytest
+
+import hyperparameter_search
+from hyperparameter_search import measure_search_latencies, measure_trial_latency, sample_hyperparameters
+
+CONFIG = {'seed': 42, 'latency_batch_size': 1, 'latency_backend': 'numpy'}
+
+def test_each_architecture_is_measured_once(monkeypatch):
+    measured = []
+
+    def fake_latency(hyperparameters, n_features, batch_size, backend):
+        measured.append((tuple(hyperparameters['hidden_layers']), batch_size, backend))
+        return float(sum(hyperparameters['hidden_layers']))
+    monkeypatch.setattr(hyperparameter_search, 'measure_trial_latency', fake_latency)
+
+    trial_ids = list(range(30))
+    latencies = measure_search_latencies(trial_ids, CONFIG, n_features=11)
+
+    architectures = {tuple(sample_hyperparameters(42, trial_id)['hidden_layers']) for trial_id in trial_ids}
+    assert len(measured) == len(architectures) < len(trial_ids)
+    assert {backend for _, _, backend in measured} == {'numpy'}
+    for trial_id in trial_ids:
+        assert latencies[trial_id] == sum(sample_hyperparameters(42, trial_id)['hidden_layers'])
+
+@pytest.mark.parametrize('backend', ['torch', 'numpy'])
+def test_both_serving_backends_can_be_timed(backend):
+    hyperparameters = {'hidden_layers': [32, 16], 'dropout_rate': 0.2}
+    latency_ms = measure_trial_latency(hyperparameters, n_features=11, batch_size=4, backend=backend)
+    assert 0 < latency_ms < 100
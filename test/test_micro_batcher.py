@@ -0,0 +1,125 @@
+"""MicroBatcher coalescing, per-caller results, failures and timeouts"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+import model_loader
+from micro_batcher import MicroBatcher
+
+def submit_concurrently(batcher, records):
+    """Submit every record from its own thread; returns results or raised exceptions, aligned"""
+    start = threading.Barrier(len(records))
+
+    def call(record):
+        start.wait()
+        try:
+            return batcher.submit(record)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(records)) as pool:
+        return list(pool.map(call, records))
+
+def test_concurrent_submits_share_batches_up_to_the_limit():
+    batch_sizes = []
+
+    def double(records):
+        batch_sizes.append(len(records))
+        return [record * 2 for record in records]
+
+    batcher = MicroBatcher(double, max_batch_size=4, max_wait_ms=200)
+    results = submit_concurrently(batcher, list(range(10)))
+
+    assert results == [i * 2 for i in range(10)]
+    assert sum(batch_sizes) == 10
+    assert max(batch_sizes) <= 4
+    assert len(batch_sizes) < 10
+    assert batcher.stats()['requests'] == 10
+
+def test_each_caller_gets_its_own_row():
+    def echo_or_fail(records):
+        return [ValueError(f'bad {record}') if record % 3 == 0 else f'ok {record}' for record in records]
+
+    batcher = MicroBatcher(echo_or_fail, max_batch_size=8, max_wait_ms=100)
+    results = submit_concurrently(batcher, list(range(8)))
+
+    for record, result in zip(range(8), results):
+        if record % 3 == 0:
+            assert isinstance(result, ValueError) and str(result) == f'bad {record}'
+        else:
+            assert result == f'ok {record}'
+
+def test_failing_batch_raises_in_every_caller():
+    def fail(records):
+        raise ValueError('model exploded')
+
+    batcher = MicroBatcher(fail, max_batch_size=8, max_wait_ms=100)
+    results = submit_concurrently(batcher, list(range(6)))
+
+    assert all(isinstance(result, ValueError) and str(result) == 'model exploded' for result in results)
+
+def test_short_result_list_fails_the_unmatched_callers():
+    batcher = MicroBatcher(lambda records: records[:1], max_batch_size=8, max_wait_ms=200)
+    results = submit_concurrently(batcher, ['a', 'b', 'c'])
+
+    assert sum(1 for result in results if isinstance(result, str)) >= 1
+    assert all(isinstance(result, (str, RuntimeError)) for result in results)
+    assert any(isinstance(result, RuntimeError) for result in results)
+
+def test_stalled_batch_times_out():
+    release = threading.Event()
+
+    def stall(records):
+        release.wait(5)
+        return records
+
+    batcher = MicroBatcher(stall, max_batch_size=4, max_wait_ms=0, timeout_s=0.2)
+    started = time.perf_counter()
+    with pytest.raises(FutureTimeoutError):
+        batcher.submit('record')
+    assert time.perf_counter() - started < 2
+    release.set()
+
+def test_dead_thread_is_restarted():
+    class Crash(BaseException):
+        pass
+
+    calls = []
+
+    def crash_once(records):
+        calls.append(records)
+        if len(calls) == 1:
+            raise Crash()
+        return records
+
+    batcher = MicroBatcher(crash_once, max_batch_size=4, max_wait_ms=0, timeout_s=0.5)
+    with pytest.raises(FutureTimeoutError):
+        batcher.submit('lost')
+    batcher._thread.join(1)
+    assert batcher.submit('next') == 'next'
+
+def test_predict_health_risk_scores_directly_when_the_batcher_stalls(monkeypatch):
+    model_loader.load_model()
+    release = threading.Event()
+
+    def stall(records):
+        release.wait(5)
+        return model_loader.model_loader.predict_risk_batch(records)
+
+    fallbacks = []
+    monkeypatch.setattr(model_loader, 'micro_batcher', MicroBatcher(stall, max_wait_ms=0, timeout_s=0.2))
+    monkeypatch.setattr(model_loader, 'record_fallback', lambda reason, count=1: fallbacks.append(reason))
+
+    patient = {'age': 67, 'gender': 'Female', 'sbp': '165/95', 'sugar': '210 mg/dL', 'bmi': 33.1}
+    try:
+        result = model_loader.predict_health_risk(patient)
+    finally:
+        release.set()
+
+    direct = model_loader.model_loader.predict_risk(patient)
+    assert fallbacks == ['MicroBatchTimeout']
+    assert result['risk_score'] == direct['risk_score']
+    assert result['risk_factors'] == direct['risk_factors']
@@ -0,0 +1,101 @@
+"""NDJSON streaming: line splitting, per-line errors and /predict-risk/stream"""
+import io
+import json
+
+import pytest
+
+import bulk_scoring
+import model_loader
+import settings
+from app import app
+from bulk_scoring import NDJSONLineSplitter, score_ndjson_chunk, score_patient_records, stream_ndjson_scores
+
+PATIENTS = [
+    {'age': 45, 'gender': 'Male', 'sbp': '130/85', 'sugar': '110 mg/dL', 'bmi': 27.0},
+    {'age': 71, 'gender': 'Female', 'sbp': 182, 'blood_glucose': 215, 'bmi': 33.4, 'hba1c': 8.1},
+    {'age': 29, 'gender': 'Female', 'smoking_history': 'current'},
+]
+
+@pytest.fixture(scope='module', autouse=True)
+def loaded_model():
+    model_loader.load_model()
+
+def decode(output):
+    return [json.loads(line) for line in output.splitlines()]
+
+def test_lines_split_across_feeds_are_joined():
+    splitter = NDJSONLineSplitter(max_line_bytes=100)
+    assert splitter.feed(b'{"age": ') == []
+    assert splitter.feed(b'40}\n{"ag') == [(1, b'{"age": 40}')]
+    assert splitter.feed(b'e": 50}\n') == [(2, b'{"age": 50}')]
+    assert splitter.flush() == []
+
+def test_final_line_without_newline_is_flushed():
+    splitter = NDJSONLineSplitter(max_line_bytes=100)
+    assert splitter.feed(b'a\nb') == [(1, b'a')]
+    assert splitter.flush() == [(2, b'b')]
+
+def test_blank_lines_keep_their_numbers():
+    splitter = NDJSONLineSplitter(max_line_bytes=100)
+    assert splitter.feed(b'a\n\n  \nb\n') == [(1, b'a'), (2, b''), (3, b'  '), (4, b'b')]
+
+def test_oversized_lines_are_dropped_as_they_stream_in():
+    splitter = NDJSONLineSplitter(max_line_bytes=10)
+    assert splitter.feed(b'0123456789\n') == [(1, b'0123456789')]
+    assert splitter.feed(b'0123456') == []
+    assert splitter.feed(b'789ABCDEF') == []
+    assert splitter._buffer == bytearray()
+    assert splitter.feed(b'\nok\n0123456789AB') == [(2, None), (3, b'ok')]
+    assert splitter.flush() == [(4, None)]
+
+def test_chunk_reports_each_bad_line_and_scores_the_rest():
+    lines = [
+        (1, json.dumps(PATIENTS[0]).encode()),
+        (2, None),
+        (3, b''),
+        (4, b'{"age": 50, "gender": '),
+        (5, b'[1, 2]'),
+        (6, json.dumps({'age': 'old', 'gender': 'Male'}).encode()),
+        (7, json.dumps(PATIENTS[1]).encode()),
+    ]
+    results = {result['line']: result for result in decode(score_ndjson_chunk(lines, max_line_bytes=64))}
+
+    assert sorted(results) == [1, 2, 4, 5, 6, 7]
+    assert results[2] == {'line': 2, 'status': 400, 'body': {'error': 'Line exceeds 64 bytes'}}
+    assert results[4]['status'] == 400 and results[4]['body']['error'].startswith('Malformed JSON')
+    assert results[5] == {'line': 5, 'status': 400, 'body': {'error': 'No patient data provided'}}
+    assert results[6]['status'] == 400 and 'age' in results[6]['body']['field_errors']
+
+    expected = score_patient_records([PATIENTS[0], PATIENTS[1]])
+    for line, single in ((1, expected[0]), (7, expected[1])):
+        assert results[line]['status'] == 200
+        assert results[line]['body']['risk_score'] == pytest.approx(single['body']['risk_score'], abs=1e-6)
+        assert results[line]['body']['risk_factors'] == single['body']['risk_factors']
+
+def test_stream_scores_across_read_and_chunk_boundaries(monkeypatch):
+    monkeypatch.setattr(bulk_scoring, 'STREAM_READ_BYTES', 7)
+    body = b'\n'.join(json.dumps(patient).encode() for patient in PATIENTS * 3) + b'\n\nnot json\n' + \
+        json.dumps(PATIENTS[0]).encode()
+
+    outputs = list(stream_ndjson_scores(io.BytesIO(body), chunk_size=4, max_line_bytes=1024))
+    results = [result for output in outputs for result in decode(output)]
+
+    assert len(outputs) > 1
+    assert [result['line'] for result in results] == list(range(1, 10)) + [11, 12]
+    assert [result['status'] for result in results] == [200] * 9 + [400, 200]
+    assert results[0]['body']['risk_level'] == results[-1]['body']['risk_level']
+
+def test_stream_endpoint(monkeypatch):
+    monkeypatch.setattr(settings, 'STREAM_MAX_LINE_BYTES', 256)
+    monkeypatch.setattr(settings, 'STREAM_CHUNK_SIZE', 2)
+    lines = [json.dumps(PATIENTS[0]), '', '{"age": 50,', json.dumps({'age': 40, 'gender': 'Male', 'name': 'x' * 300}),
+             json.dumps(PATIENTS[1]), json.dumps(PATIENTS[2])]
+
+    with app.test_client() as client:
+        response = client.post('/predict-risk/stream', data='\n'.join(lines), content_type='application/x-ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        results = decode(response.get_data())
+
+    assert [(result['line'], result['status']) for result in results] == [(1, 200), (3, 400), (4, 400), (5, 200), (6, 200)]
+    assert results[2]['body'] == {'error': 'Line exceeds 256 bytes'}
@@ -0,0 +1,57 @@
+"""The fused NumPy engine against the torch model it was folded from"""
+import numpy as np
+import pytest
+
+from model_loader import NUMPY_BACKEND_TOLERANCE, ModelLoader
+
+def _loaded(**kwargs):
+    loader = ModelLoader(**kwargs)
+    loader.load_enhanced_model()
+    return loader
+
+@pytest.fixture(scope='module')
+def torch_loader():
+    return _loaded(backend='torch')
+
+def _random_features(bundle, n, seed):
+    """Raw feature rows spread around the training distribution, outliers included"""
+    rng = np.random.default_rng(seed)
+    return bundle.scaler.mean_ + bundle.scaler.scale_ * rng.standard_normal((n, len(bundle.feature_names))) * 2
+
+@pytest.mark.parametrize('fast_start', [False, True])
+def test_numpy_backend_matches_torch(torch_loader, fast_start):
+    numpy_loader = _loaded(backend='numpy', fast_start=fast_start)
+    assert numpy_loader.engine is not None
+    if fast_start:
+        # Served from the .npz artifact, without building a torch model
+        assert numpy_loader.model is None
+
+    features = _random_features(torch_loader.bundle, 4096, seed=7)
+    expected = torch_loader._score_features(features)
+    actual = numpy_loader._score_features(features)
+
+    assert actual.shape == expected.shape
+    assert np.max(np.abs(actual - expected)) <= NUMPY_BACKEND_TOLERANCE
+
+@pytest.mark.parametrize('fast_start', [False, True])
+def test_numpy_backend_predictions_match_torch(torch_loader, fast_start, make_patients):
+    numpy_loader = _loaded(backend='numpy', fast_start=fast_start)
+    patients = make_patients(256, seed=3)
+
+    for expected, actual in zip(torch_loader.predict_risk_batch(patients), numpy_loader.predict_risk_batch(patients)):
+        assert actual['risk_score'] == pytest.approx(expected['risk_score'], abs=NUMPY_BACKEND_TOLERANCE)
+        assert actual['risk_factors'] == expected['risk_factors']
+
+def test_fast_start_torch_backend_matches_checkpoint(torch_loader):
+    artifact_loader = _loaded(backend='torch', fast_start=True)
+    features = _random_features(torch_loader.bundle, 1024, seed=11)
+
+    np.testing.assert_allclose(artifact_loader._score_features(features), torch_loader._score_features(features),
+                               rtol=0, atol=1e-6)
+
+def test_verification_rejects_a_diverging_engine():
+    loader = _loaded(backend='numpy')
+    loader.bundle.engine.biases[-1] += 0.5
+
+    with pytest.raises(RuntimeError, match='disagrees with torch'):
+        loader._verify_numpy_engine(loader.bundle)
@@ -0,0 +1,119 @@
+"""Patient payload parsing: coercions, rejected values, 400 bodies and date of birth"""
+from datetime import date
+
+import pytest
+
+from feature_transform import patient_columns
+from payloads import REQUIRED_FIELDS, PatientDataError, parse_patient
+
+TODAY = date(2026, 6, 15)
+
+def parse(**fields):
+    return parse_patient(dict({'age': 50, 'gender': 'Female'}, **fields), required=REQUIRED_FIELDS, today=TODAY)
+
+def field_errors(**fields):
+    with pytest.raises(PatientDataError) as excinfo:
+        parse(**fields)
+    return excinfo.value.field_errors
+
+@pytest.mark.parametrize('fields, name, expected', [
+    ({'sbp': '140/90'}, 'sbp', 140),
+    ({'sbp': ' 155 / 95 '}, 'sbp', 155),
+    ({'sbp': 132}, 'sbp', 132),
+    ({'sugar': '132 mg/dL'}, 'blood_glucose', 132.0),
+    ({'blood_glucose': '98.5'}, 'blood_glucose', 98.5),
+    ({'bmi': ' 31.2 '}, 'bmi', 31.2),
+    ({'hba1c': '7.1%'}, 'hba1c', 7.1),
+    ({'HbA1c_level': 6.4}, 'hba1c', 6.4),
+    ({'age': '61'}, 'age', 61),
+    ({'hypertension': 'yes', 'heart_disease': '0'}, 'hypertension', 1),
+])
+def test_values_are_coerced(fields, name, expected):
+    assert parse(**fields)[name] == expected
+
+@pytest.mark.parametrize('placeholder', ['Not recorded', 'n/a', 'Unknown', '', '  ', None])
+def test_placeholders_take_defaults(placeholder):
+    record = parse(bmi=placeholder, sugar=placeholder, sbp=placeholder, smoking_history=placeholder)
+    assert (record['bmi'], record['blood_glucose'], record['sbp'], record['smoking_history']) == (25.0, 100.0, 120, 'never')
+
+@pytest.mark.parametrize('field, value', [
+    ('bmi', '31,2'),
+    ('bmi', 'abc 120'),
+    ('bmi', float('nan')),
+    ('bmi', True),
+    ('sugar', 'was 7, now 140'),
+    ('sugar', '120 apples and 3 pears'),
+    ('hba1c', '7.1.2'),
+    ('sbp', 'abc/80'),
+    ('age', 'forty'),
+    ('hypertension', 2),
+])
+def test_malformed_values_are_rejected(field, value):
+    name = {'sugar': 'blood_glucose'}.get(field, field)
+    assert name in field_errors(**{field: value})
+
+def test_out_of_range_values_are_rejected():
+    assert field_errors(sbp=999) == {'sbp': '999 is outside 50-300'}
+    assert field_errors(age=200)['age'] == '200 is outside 0-130'
+
+def test_every_bad_field_is_reported():
+    errors = field_errors(bmi='abc', sbp='999/80', smoking_history=3)
+    assert set(errors) == {'bmi', 'sbp', 'smoking_history'}
+    assert errors['bmi'] == "expected a number, got 'abc'"
+
+def test_error_bodies():
+    with pytest.raises(PatientDataError) as excinfo:
+        parse_patient({'gender': 'Male'}, required=REQUIRED_FIELDS)
+    assert excinfo.value.to_body() == {'error': 'Missing required field: age', 'field_errors': {'age': 'required'}}
+
+    with pytest.raises(PatientDataError) as excinfo:
+        parse(bmi='heavy')
+    assert excinfo.value.to_body() == {'error': 'Invalid patient data',
+                                       'field_errors': {'bmi': "expected a number, got 'heavy'"}}
+
+def test_flags_do_not_feed_the_model():
+    records = [
+        parse(hypertension=1, heart_disease=1),
+        parse(disease='Hypertension, heart disease'),
+        parse(sbp='150/95'),
+    ]
+    columns = patient_columns(records)
+    assert columns['hypertension'].tolist() == [0, 1, 1]
+    assert columns['heart_disease'].tolist() == [0, 1, 0]
+    # Still validated and kept on the record
+    assert records[0]['hypertension'] == 1 and records[0]['heart_disease'] == 1
+
+def test_dob_gives_the_age():
+    assert parse(dob='1970-06-16')['age'] == 55
+    assert parse(dob='1970-06-15')['age'] == 56
+
+def test_dob_can_replace_age():
+    record = parse_patient({'gender': 'Male', 'dob': '1990-01-01'}, required=REQUIRED_FIELDS, today=TODAY)
+    assert record['age'] == 36
+
+def test_invalid_dob_falls_back_to_age():
+    assert parse(dob='March 1970')['age'] == 50
+
+    with pytest.raises(PatientDataError) as excinfo:
+        parse_patient({'gender': 'Male', 'dob': 'March 1970'}, required=REQUIRED_FIELDS, today=TODAY)
+    assert excinfo.value.field_errors == {'dob': "expected a YYYY-MM-DD date, got 'March 1970'"}
+
+def test_age_or_dob_is_required():
+    with pytest.raises(PatientDataError) as excinfo:
+        parse_patient({'gender': 'Male', 'dob': 'Not recorded'}, required=REQUIRED_FIELDS, today=TODAY)
+    assert excinfo.value.missing_field == 'age'
+
+def test_endpoint_returns_field_errors():
+    import model_loader
+    from app import app
+
+    model_loader.load_model()
+    with app.test_client() as client:
+        response = client.post('/predict-risk', json={'age': 40, 'gender': 'Male', 'bmi': '31,2', 'sbp': 999})
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Invalid patient data', 'field_errors': {
+            'bmi': "expected a number, got '31,2'", 'sbp': '999 is outside 50-300'}}
+
+        response = client.post('/predict-risk', json={'gender': 'Female', 'dob': '1960-02-29'})
+        assert response.status_code == 200
+        assert response.get_json()['patient_info']['age'] >= 66
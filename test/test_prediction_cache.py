@@ -0,0 +1,90 @@
+"""Prediction cache: canonical keys, model versions, TTL, LRU eviction and copies on hit"""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import prediction_cache
+from model_loader import ModelLoader
+from payloads import parse_patient
+from prediction_cache import PredictionCache
+
+PATIENT = {'age': 47, 'gender': 'Female', 'sbp': '120/80', 'sugar': '100 mg/dL', 'bmi': 27.5, 'hba1c': '6.1%'}
+
+@pytest.fixture(scope='module')
+def loader():
+    loader = ModelLoader(cache_size=100)
+    loader.load_enhanced_model()
+    return loader
+
+@pytest.fixture
+def cache(loader):
+    loader.prediction_cache = PredictionCache(max_entries=100)
+    return loader.prediction_cache
+
+def test_equivalent_payloads_share_one_entry(loader, cache):
+    loader.predict_risk(PATIENT)
+    loader.predict_risk(dict(PATIENT, sbp=120, sugar=100, hba1c=6.1))
+    loader.predict_risk(dict(PATIENT, sbp='120', sugar='100.0', name='Someone else'))
+
+    stats = cache.stats()
+    assert (stats['entries'], stats['misses'], stats['hits']) == (1, 1, 2)
+
+def test_batch_and_single_share_entries(loader, cache):
+    loader.predict_risk_batch([PATIENT, dict(PATIENT, age=48)])
+    loader.predict_risk(dict(PATIENT, sbp=120))
+    assert cache.stats()['hits'] == 1
+
+def test_another_model_version_misses(loader, cache):
+    loader.predict_risk(PATIENT)
+    raw_features, _ = loader._extract_features([parse_patient(PATIENT)])
+
+    assert cache.get(loader._cache_key(raw_features[0], loader.bundle)) is not None
+    assert cache.get(loader._cache_key(raw_features[0], SimpleNamespace(version='other'))) is None
+
+def test_hit_returns_an_independent_copy_with_a_fresh_timestamp(loader, cache):
+    first = loader.predict_risk(PATIENT)
+    time.sleep(0.002)
+    second = loader.predict_risk(PATIENT)
+
+    assert cache.stats()['hits'] == 1
+    assert second['timestamp'] > first['timestamp']
+    assert {k: v for k, v in second.items() if k != 'timestamp'} == {k: v for k, v in first.items() if k != 'timestamp'}
+
+    second['risk_factors'].append('tampered')
+    second['recommendations'].clear()
+    second['features_used']['age'] = 0
+    third = loader.predict_risk(PATIENT)
+    assert third['risk_factors'] == first['risk_factors']
+    assert third['recommendations'] == first['recommendations']
+    assert third['features_used'] == first['features_used']
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+
+    cache.put('key', 'value')
+    now[0] += 59
+    assert cache.get('key') == 'value'
+    now[0] += 1
+    assert cache.get('key') is None
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['entries'] == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+def test_zero_size_disables_the_cache():
+    cache = PredictionCache(max_entries=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    assert cache.stats()['enabled'] is False
@@ -0,0 +1,250 @@
+"""The rule table against the if/elif ladders it replaced, for single records and batches"""
+import numpy as np
+import pytest
+
+from risk_rules import load_risk_rules
+
+TRIALS = 20000
+
+# Every threshold of the ladders, so strict comparisons are exercised at the boundary
+BOUNDARIES = {
+    'systolic_bp': [120, 130, 140, 160, 180],
+    'blood_glucose_level': [100, 120, 126, 140, 200],
+    'age': [45, 50, 60, 65],
+    'bmi': [25, 27, 28, 30],
+    'HbA1c_level': [5.7, 6.5, 7.0],
+}
+RANGES = {
+    'systolic_bp': (80, 220),
+    'blood_glucose_level': (50, 350),
+    'age': (0, 100),
+    'bmi': (12, 50),
+    'HbA1c_level': (3.5, 14),
+}
+
+# --- Baseline ladders, as ModelLoader implemented them before the rule table ---
+
+def baseline_risk_level(risk_score):
+    if risk_score >= 0.3:
+        return 'HIGH'
+    elif risk_score >= 0.15:
+        return 'MEDIUM'
+    return 'LOW'
+
+def baseline_boosted_level(risk_level, risk_score):
+    if risk_score >= 0.4:
+        return 'HIGH'
+    elif risk_score >= 0.2:
+        return 'MEDIUM'
+    return risk_level
+
+def baseline_apply_risk_boosting(base_score, features):
+    boosted_score = base_score
+
+    sbp = features.get('systolic_bp', 120)
+    if sbp > 180:
+        boosted_score += 0.3
+    elif sbp > 160:
+        boosted_score += 0.2
+    elif sbp > 140:
+        boosted_score += 0.1
+
+    glucose = features.get('blood_glucose_level', 100)
+    if glucose > 200:
+        boosted_score += 0.3
+    elif glucose > 140:
+        boosted_score += 0.2
+    elif glucose > 126:
+        boosted_score += 0.1
+
+    age = features.get('age', 30)
+    if age > 65:
+        boosted_score += 0.1
+    elif age > 50:
+        boosted_score += 0.05
+
+    if sbp > 140 and glucose > 140:
+        boosted_score += 0.15
+
+    return min(boosted_score, 1.0)
+
+def baseline_generate_recommendations(risk_level, features):
+    recommendations = []
+
+    if risk_level == 'HIGH':
+        recommendations.extend([
+            "🚨 Seek immediate medical attention",
+            "📊 Monitor vital signs daily",
+            "💊 Review medications with doctor",
+            "🏥 Consider emergency consultation"
+        ])
+    elif risk_level == 'MEDIUM':
+        recommendations.extend([
+            "⚠️ Schedule doctor appointment within 1 week",
+            "📈 Monitor health metrics twice weekly",
+            "🥗 Follow strict dietary guidelines",
+            "💪 Begin supervised exercise program"
+        ])
+    else:
+        recommendations.extend([
+            "✅ Continue current healthy practices",
+            "📅 Schedule routine annual checkup",
+            "🥗 Maintain balanced nutrition",
+            "🏃 Regular moderate exercise"
+        ])
+
+    sbp = features.get('systolic_bp', 120)
+    glucose = features.get('blood_glucose_level', 100)
+    bmi = features.get('bmi', 25)
+    age = features.get('age', 30)
+
+    if sbp > 140:
+        recommendations.append("🩸 Blood pressure management critical")
+    if glucose > 140:
+        recommendations.append("🍯 Strict blood sugar control needed")
+    if bmi > 30:
+        recommendations.append("⚖️ Weight management program recommended")
+    if age > 60 and (sbp > 130 or glucose > 120):
+        recommendations.append("👴 Age-related risk monitoring essential")
+
+    return recommendations[:6]
+
+def baseline_identify_risk_factors(features):
+    risk_factors = []
+
+    age = features.get('age', 0)
+    if age > 60:
+        risk_factors.append("Advanced age (high risk)")
+    elif age > 45:
+        risk_factors.append("Middle age consideration")
+
+    bmi = features.get('bmi', 25)
+    if bmi > 30:
+        risk_factors.append("Obesity (BMI > 30)")
+    elif bmi > 27:
+        risk_factors.append("Overweight (BMI > 27)")
+    elif bmi > 25:
+        risk_factors.append("Above normal weight")
+
+    glucose = features.get('blood_glucose_level', 100)
+    if glucose > 200:
+        risk_factors.append("Severe hyperglycemia")
+    elif glucose > 140:
+        risk_factors.append("High blood glucose")
+    elif glucose > 126:
+        risk_factors.append("Diabetic range glucose")
+    elif glucose > 100:
+        risk_factors.append("Elevated fasting glucose")
+
+    hba1c = features.get('HbA1c_level', 5.5)
+    if hba1c > 7.0:
+        risk_factors.append("Poor diabetes control")
+    elif hba1c > 6.5:
+        risk_factors.append("Diabetic HbA1c level")
+    elif hba1c > 5.7:
+        risk_factors.append("Pre-diabetic HbA1c")
+
+    sbp = features.get('systolic_bp', 120)
+    if sbp > 180:
+        risk_factors.append("Severe hypertension crisis")
+    elif sbp > 160:
+        risk_factors.append("Stage 2 hypertension")
+    elif sbp > 140:
+        risk_factors.append("Stage 1 hypertension")
+    elif sbp > 130:
+        risk_factors.append("Elevated blood pressure")
+    elif sbp > 120:
+        risk_factors.append("Above normal blood pressure")
+
+    if features.get('hypertension', 0) == 1:
+        risk_factors.append("Diagnosed hypertension")
+    if features.get('heart_disease', 0) == 1:
+        risk_factors.append("Heart disease history")
+
+    smoking = features.get('smoking_history', 0)
+    if smoking == 2:
+        risk_factors.append("Current smoker")
+    elif smoking == 1:
+        risk_factors.append("Former smoker")
+
+    if sbp > 140 and glucose > 140:
+        risk_factors.append("Multiple critical conditions")
+    if age > 50 and bmi > 28:
+        risk_factors.append("Age-obesity combination risk")
+
+    return risk_factors
+
+def baseline_evaluate(model_score, features):
+    """(boosted score, risk level, recommendations, risk factors) the way predict_risk used to build them"""
+    risk_level = baseline_risk_level(model_score)
+    risk_score = baseline_apply_risk_boosting(model_score, features)
+    risk_level = baseline_boosted_level(risk_level, risk_score)
+    return (risk_score, risk_level, baseline_generate_recommendations(risk_level, features),
+            baseline_identify_risk_factors(features))
+
+# --- Randomized comparison ---
+
+def random_cases(n, seed):
+    """(model score, feature dict) pairs: continuous values, exact thresholds and missing features"""
+    rng = np.random.default_rng(seed)
+    cases = []
+    for _ in range(n):
+        features = {}
+        for feature, (low, high) in RANGES.items():
+            draw = rng.random()
+            if draw < 0.05:
+                continue  # missing: the ladder's default applies
+            if draw < 0.35:
+                features[feature] = rng.choice(BOUNDARIES[feature]).item()
+            elif feature == 'age':
+                features[feature] = int(rng.integers(low, high))
+            else:
+                features[feature] = round(float(rng.uniform(low, high)), int(rng.integers(0, 3)))
+        for feature, values in (('hypertension', 2), ('heart_disease', 2), ('smoking_history', 5)):
+            if rng.random() > 0.05:
+                features[feature] = int(rng.integers(0, values))
+        # Scores on and around the level cut-offs as well as anywhere in [0, 1]
+        if rng.random() < 0.2:
+            score = float(rng.choice([0.0, 0.15, 0.2, 0.3, 0.4, 1.0]))
+        else:
+            score = float(rng.random())
+        cases.append((score, features))
+    return cases
+
+@pytest.fixture(scope='module')
+def engine():
+    return load_risk_rules()
+
+@pytest.fixture(scope='module')
+def cases():
+    return random_cases(TRIALS, seed=0)
+
+def test_single_records_match_baseline_ladders(engine, cases):
+    mismatches = []
+    for score, features in cases:
+        boosted, levels, recommendations, factors = engine.evaluate([score], [features])
+        actual = (boosted[0], levels[0], recommendations[0], factors[0])
+        if actual != baseline_evaluate(score, features):
+            mismatches.append((score, features, actual))
+    assert mismatches == []
+
+def test_batch_matches_baseline_ladders(engine, cases):
+    scores = np.array([score for score, _ in cases])
+    boosted, levels, recommendations, factors = engine.evaluate(scores, [features for _, features in cases])
+
+    mismatches = []
+    for i, (score, features) in enumerate(cases):
+        actual = (float(boosted[i]), levels[i], recommendations[i], factors[i])
+        if actual != baseline_evaluate(score, features):
+            mismatches.append((score, features, actual))
+    assert mismatches == []
+
+def test_model_loader_helpers_match_baseline_ladders(engine, cases):
+    from model_loader import ModelLoader
+
+    loader = ModelLoader()
+    for score, features in cases[:2000]:
+        level = baseline_risk_level(score)
+        assert loader._apply_risk_boosting(score, features) == baseline_apply_risk_boosting(score, features)
+        assert loader._identify_risk_factors(features) == baseline_identify_risk_factors(features)
+        assert loader._generate_recommendations(level, features) == baseline_generate_recommendations(level, features)